@@ -0,0 +1,44 @@
+"""add embedding model tags, next_embedding and organizations.embedding_model
+
+Revision ID: 2f6e8a0c4b19
+Revises: 9d3b7f2a6c41
+Create Date: 2026-10-18 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+from src.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = "2f6e8a0c4b19"
+down_revision = "9d3b7f2a6c41"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Com um DEFAULT constante o ADD COLUMN não reescreve a tabela (PostgreSQL 11+):
+    # os chunks existentes passam a indicar o modelo atual. O default é removido
+    # em seguida, pois a ingestão grava o modelo explicitamente.
+    op.add_column(
+        "document_chunks",
+        sa.Column("embedding_model", sa.String(), nullable=True, server_default=settings.EMBEDDING_MODEL_NAME),
+    )
+    op.alter_column("document_chunks", "embedding_model", server_default=None)
+
+    op.add_column("document_chunks", sa.Column("next_embedding", Vector(), nullable=True))
+    op.add_column("document_chunks", sa.Column("next_embedding_model", sa.String(), nullable=True))
+    op.add_column("organizations", sa.Column("embedding_model", sa.String(), nullable=True))
+    # O índice ANN de 'next_embedding' depende da dimensão do modelo de destino
+    # e é criado ao iniciar o backfill (ver 'ensure_next_embedding_index').
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_document_chunks_next_embedding_hnsw")
+    op.drop_column("organizations", "embedding_model")
+    op.drop_column("document_chunks", "next_embedding_model")
+    op.drop_column("document_chunks", "next_embedding")
+    op.drop_column("document_chunks", "embedding_model")
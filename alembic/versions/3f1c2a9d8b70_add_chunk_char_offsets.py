@@ -0,0 +1,26 @@
+"""add char offsets to document_chunks
+
+Revision ID: 3f1c2a9d8b70
+Revises:
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f1c2a9d8b70"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("document_chunks", sa.Column("char_start", sa.Integer(), nullable=True))
+    op.add_column("document_chunks", sa.Column("char_end", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("document_chunks", "char_end")
+    op.drop_column("document_chunks", "char_start")
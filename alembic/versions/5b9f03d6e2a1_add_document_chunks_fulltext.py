@@ -0,0 +1,37 @@
+"""add generated tsvector column and GIN index to document_chunks
+
+Revision ID: 5b9f03d6e2a1
+Revises: c7d2e5a14f08
+Create Date: 2026-10-18 13:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "5b9f03d6e2a1"
+down_revision = "c7d2e5a14f08"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_document_chunks_content_tsv"
+
+
+def upgrade() -> None:
+    # Coluna STORED: calculada uma vez na escrita, nunca na busca.
+    # Atenção: adicionar a coluna reescreve a tabela (lock exclusivo durante a migração).
+    op.execute(
+        "ALTER TABLE document_chunks ADD COLUMN content_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('portuguese', content)) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} "
+            "ON document_chunks USING gin (content_tsv)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
+    op.drop_column("document_chunks", "content_tsv")
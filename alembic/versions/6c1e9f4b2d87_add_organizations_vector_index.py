@@ -0,0 +1,25 @@
+"""add organizations.vector_index
+
+Revision ID: 6c1e9f4b2d87
+Revises: 2f6e8a0c4b19
+Create Date: 2026-10-18 17:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6c1e9f4b2d87"
+down_revision = "2f6e8a0c4b19"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # None = VECTOR_INDEX_BACKEND; o índice local é construído ao trocar o backend
+    op.add_column("organizations", sa.Column("vector_index", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("organizations", "vector_index")
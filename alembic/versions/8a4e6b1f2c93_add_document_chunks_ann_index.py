@@ -0,0 +1,48 @@
+"""add ANN index on document_chunks.embedding
+
+Revision ID: 8a4e6b1f2c93
+Revises: 3f1c2a9d8b70
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+
+from src.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = "8a4e6b1f2c93"
+down_revision = "3f1c2a9d8b70"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_document_chunks_embedding_ann"
+
+
+def upgrade() -> None:
+    # Antes era executado a cada requisição de busca em search_service
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    if settings.VECTOR_INDEX_TYPE == "ivfflat":
+        index_sql = (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} "
+            "ON document_chunks USING ivfflat (embedding vector_cosine_ops) "
+            f"WITH (lists = {int(settings.IVFFLAT_LISTS)})"
+        )
+    elif settings.VECTOR_INDEX_TYPE == "hnsw":
+        index_sql = (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} "
+            "ON document_chunks USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = {int(settings.HNSW_M)}, ef_construction = {int(settings.HNSW_EF_CONSTRUCTION)})"
+        )
+    else:
+        raise ValueError(f"VECTOR_INDEX_TYPE inválido: {settings.VECTOR_INDEX_TYPE}")
+
+    # CONCURRENTLY não bloqueia escritas na tabela, mas não roda dentro de transação
+    with op.get_context().autocommit_block():
+        op.execute(index_sql)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
@@ -0,0 +1,33 @@
+"""add last_committed_page checkpoint to documents
+
+Revision ID: 9d3b7f2a6c41
+Revises: e4a8c1b7d352
+Create Date: 2026-10-18 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9d3b7f2a6c41"
+down_revision = "e4a8c1b7d352"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("last_committed_page", sa.Integer(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_document_chunks_document_id_page_number",
+            "document_chunks",
+            ["document_id", "page_number"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_document_chunks_document_id_page_number", table_name="document_chunks")
+    op.drop_column("documents", "last_committed_page")
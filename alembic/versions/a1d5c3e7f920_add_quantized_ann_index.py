@@ -0,0 +1,63 @@
+"""add quantized (halfvec/binary) ANN index on document_chunks.embedding
+
+Revision ID: a1d5c3e7f920
+Revises: 6c1e9f4b2d87
+Create Date: 2026-10-18 18:00:00
+
+"""
+from alembic import op
+
+from src.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = "a1d5c3e7f920"
+down_revision = "6c1e9f4b2d87"
+branch_labels = None
+depends_on = None
+
+FULL_INDEX_NAME = "ix_document_chunks_embedding_ann"
+INDEX_NAME = "ix_document_chunks_embedding_quantized"
+# Dimensão de document_chunks.embedding (paraphrase-multilingual-MiniLM-L12-v2)
+DIMENSION = 384
+
+# Expressões e operadores do pgvector >= 0.7. A expressão precisa ser
+# idêntica à da consulta (ver 'QUANTIZED_DISTANCES' em search_service).
+# A API confere na subida se o índice criado aqui corresponde ao
+# VECTOR_QUANTIZATION dela (ver 'check_vector_index')
+QUANTIZED_EXPRESSIONS = {
+    "halfvec": (f"(embedding::halfvec({DIMENSION}))", "halfvec_cosine_ops"),
+    "binary": (f"(binary_quantize(embedding)::bit({DIMENSION}))", "bit_hamming_ops"),
+}
+
+
+def index_options() -> str:
+    if settings.VECTOR_INDEX_TYPE == "ivfflat":
+        return f"WITH (lists = {int(settings.IVFFLAT_LISTS)})"
+    return f"WITH (m = {int(settings.HNSW_M)}, ef_construction = {int(settings.HNSW_EF_CONSTRUCTION)})"
+
+
+def upgrade() -> None:
+    if settings.VECTOR_QUANTIZATION == "none":
+        return
+    if settings.VECTOR_QUANTIZATION not in QUANTIZED_EXPRESSIONS:
+        raise ValueError(f"VECTOR_QUANTIZATION inválido: {settings.VECTOR_QUANTIZATION}")
+
+    expression, opclass = QUANTIZED_EXPRESSIONS[settings.VECTOR_QUANTIZATION]
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON document_chunks "
+            f"USING {settings.VECTOR_INDEX_TYPE} ({expression} {opclass}) {index_options()}"
+        )
+        # A busca passa a usar só o índice quantizado; o de precisão total é
+        # o que ocupa memória (a coluna float32 continua para o rescore)
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {FULL_INDEX_NAME}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {FULL_INDEX_NAME} ON document_chunks "
+            f"USING {settings.VECTOR_INDEX_TYPE} (embedding vector_cosine_ops) {index_options()}"
+        )
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
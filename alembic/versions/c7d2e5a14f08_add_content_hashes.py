@@ -0,0 +1,42 @@
+"""add content hashes to documents and document_chunks
+
+Revision ID: c7d2e5a14f08
+Revises: 8a4e6b1f2c93
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c7d2e5a14f08"
+down_revision = "8a4e6b1f2c93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.add_column("document_chunks", sa.Column("content_hash", sa.String(length=64), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_documents_organization_id_content_hash",
+            "documents",
+            ["organization_id", "content_hash"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_document_chunks_content_hash",
+            "document_chunks",
+            ["content_hash"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_document_chunks_content_hash", table_name="document_chunks")
+    op.drop_index("ix_documents_organization_id_content_hash", table_name="documents")
+    op.drop_column("document_chunks", "content_hash")
+    op.drop_column("documents", "content_hash")
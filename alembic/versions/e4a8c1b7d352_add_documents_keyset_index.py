@@ -0,0 +1,29 @@
+"""add (organization_id, created_at, id) index to documents
+
+Revision ID: e4a8c1b7d352
+Revises: 5b9f03d6e2a1
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "e4a8c1b7d352"
+down_revision = "5b9f03d6e2a1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_documents_organization_id_created_at_id",
+            "documents",
+            ["organization_id", "created_at", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_documents_organization_id_created_at_id", table_name="documents")
@@ -0,0 +1,135 @@
+"""
+Benchmark de recall x latência do índice ANN contra a busca exata.
+
+Usa embeddings de chunks já salvos como consultas, executa a busca exata
+(índices desligados) e a busca pelo índice com vários valores de
+ef_search (HNSW) ou probes (IVFFlat), e imprime recall@k e latência.
+
+O índice ANN é um só para todas as organizações e o filtro por organização
+vem depois da varredura, então uma organização pequena em um corpus grande
+recebe menos que top_k resultados (ou nenhum). Com --organization, as
+consultas saem só dessa organização; além do recall do índice, a tabela
+mostra a fração de consultas com menos de top_k resultados e o recall com
+a busca exata refeita nesses casos (o que a API faz com SEARCH_EXACT_FALLBACK).
+
+Corpus com várias organizações (benchmarks.synthetic):
+    python -m benchmarks.synthetic corpus --chunks 1000000 --name bench-grande
+    python -m benchmarks.synthetic corpus --chunks 2000 --name bench-pequena --seed 1
+
+Uso:
+    python -m benchmarks.ann_recall --queries 200 --top-k 10 --params 10,20,40,80,160
+    python -m benchmarks.ann_recall --organization bench-pequena --top-k 10
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from benchmarks.synthetic import count_chunks, find_organization
+from src.core.config import settings
+from src.db.session import SessionLocal
+
+SEARCH_SQL = text(
+    """
+    SELECT dc.id
+    FROM document_chunks AS dc
+    JOIN documents AS d ON dc.document_id = d.id
+    WHERE d.organization_id = :organization_id
+    ORDER BY dc.embedding <=> CAST(:query_embedding AS vector)
+    LIMIT :top_k
+    """
+)
+
+EXACT_SETUP = ["SET LOCAL enable_indexscan = off", "SET LOCAL enable_bitmapscan = off"]
+
+
+def sample_queries(db, n: int, organization_id: int | None = None) -> list[tuple[int, str]]:
+    rows = db.execute(
+        text(
+            """
+            SELECT d.organization_id, dc.embedding::text AS embedding
+            FROM document_chunks AS dc
+            JOIN documents AS d ON dc.document_id = d.id
+            WHERE dc.embedding IS NOT NULL
+              AND (CAST(:organization_id AS integer) IS NULL OR d.organization_id = :organization_id)
+            ORDER BY random()
+            LIMIT :n
+            """
+        ),
+        {"n": n, "organization_id": organization_id},
+    ).fetchall()
+    return [(row.organization_id, row.embedding) for row in rows]
+
+
+def run_queries(db, queries, top_k: int, setup_sql: list[str]) -> tuple[list[set[int]], list[float]]:
+    results, latencies = [], []
+    for organization_id, embedding in queries:
+        for statement in setup_sql:
+            db.execute(text(statement))
+        start = time.perf_counter()
+        ids = db.execute(
+            SEARCH_SQL,
+            {"organization_id": organization_id, "query_embedding": embedding, "top_k": top_k},
+        ).scalars().all()
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(set(ids))
+        db.rollback()  # Descarta os SET LOCAL
+    return results, latencies
+
+
+def recall(approx: list[set[int]], exact: list[set[int]]) -> float:
+    return statistics.mean(len(a & e) / len(e) for a, e in zip(approx, exact) if e)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--params", default="10,20,40,80,160", help="valores de ef_search/probes")
+    parser.add_argument("--organization", help="nome da organização de onde saem as consultas (padrão: todas)")
+    args = parser.parse_args()
+
+    index_param = "ivfflat.probes" if settings.VECTOR_INDEX_TYPE == "ivfflat" else "hnsw.ef_search"
+    db = SessionLocal()
+    try:
+        organization_id = None
+        if args.organization:
+            organization = find_organization(db, args.organization)
+            if organization is None:
+                print(f"Organização '{args.organization}' não encontrada.")
+                return
+            organization_id = organization.id
+            total = db.scalar(text("SELECT count(*) FROM document_chunks"))
+            chunks = count_chunks(db, organization_id)
+            print(f"Organização '{args.organization}': {chunks} de {total} chunks "
+                  f"({chunks / total:.2%} do índice).")
+
+        queries = sample_queries(db, args.queries, organization_id)
+        if not queries:
+            print("Nenhum chunk com embedding encontrado.")
+            return
+
+        exact, exact_latencies = run_queries(db, queries, args.top_k, EXACT_SETUP)
+        print(f"{'modo':<24} {'recall@' + str(args.top_k):>10} {'< top_k':>8} {'c/ exata':>9} "
+              f"{'p50 (ms)':>10} {'p95 (ms)':>10}")
+        print(f"{'exato':<24} {1.0:>10.3f} {'':>8} {'':>9} {statistics.median(exact_latencies):>10.2f} "
+              f"{statistics.quantiles(exact_latencies, n=20)[-1]:>10.2f}")
+
+        for value in [int(v) for v in args.params.split(",")]:
+            approx, latencies = run_queries(
+                db, queries, args.top_k, [f"SET LOCAL {index_param} = {value}"]
+            )
+            # Consultas com menos de top_k resultados: a API refaz a busca exata
+            short = [len(a) < min(args.top_k, len(e)) for a, e in zip(approx, exact)]
+            with_fallback = [e if is_short else a for a, e, is_short in zip(approx, exact, short)]
+            print(f"{index_param + '=' + str(value):<24} {recall(approx, exact):>10.3f} "
+                  f"{sum(short) / len(short):>8.1%} {recall(with_fallback, exact):>9.3f} "
+                  f"{statistics.median(latencies):>10.2f} {statistics.quantiles(latencies, n=20)[-1]:>10.2f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Teste de carga da API sob concorrência crescente.
+
+Dispara requisições autenticadas contra uma instância da API já em execução,
+com C clientes simultâneos para cada nível de concorrência, e imprime
+req/s e latência (p50/p95/p99) por nível. Rode o mesmo comando contra a
+versão com endpoints síncronos (SessionLocal + threadpool) e contra a
+versão assíncrona (AsyncSessionLocal + asyncpg) para comparar até onde a
+vazão escala: na síncrona ela estaciona no tamanho do threadpool; na
+assíncrona, no pool de conexões (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+
+Uso:
+    python -m benchmarks.api_concurrency --base-url http://localhost:8000 \\
+        --token "$FIREBASE_ID_TOKEN" --endpoint documents --levels 10,50,100,200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+QUERIES = [
+    "contratos que vencem este mês",
+    "valor total do contrato de merenda escolar",
+    "termo aditivo do convênio de saúde",
+    "notas fiscais emitidas pela secretaria de obras",
+]
+
+
+def build_request(endpoint: str, i: int) -> tuple[str, str, dict | None]:
+    if endpoint == "documents":
+        return "GET", "/api/v1/documents/?limit=20", None
+    if endpoint == "search":
+        return "POST", "/api/v1/search/", {"query": QUERIES[i % len(QUERIES)], "top_k": 5}
+    return "GET", "/api/v1/users/me", None
+
+
+async def run_level(client: httpx.AsyncClient, endpoint: str, concurrency: int, requests: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            method, url, body = build_request(endpoint, i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+        "errors": errors,
+    }
+
+
+async def main_async(args) -> None:
+    levels = [int(level) for level in args.levels.split(",")]
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        headers={"Authorization": f"Bearer {args.token}"},
+        limits=limits,
+        timeout=args.timeout,
+    ) as client:
+        await run_level(client, args.endpoint, 4, 20)  # Aquecimento (caches, conexões)
+
+        print(f"endpoint={args.endpoint} requisições por nível={args.requests}")
+        print(f"{'concorrência':>12} {'req/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'erros':>7}")
+        for level in levels:
+            r = await run_level(client, args.endpoint, level, args.requests)
+            print(f"{level:>12} {r['rps']:>10.1f} {r['p50_ms']:>10.1f} {r['p95_ms']:>10.1f} "
+                  f"{r['p99_ms']:>10.1f} {r['errors']:>7}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="ID token do Firebase de um usuário com organização")
+    parser.add_argument("--endpoint", choices=["documents", "search", "me"], default="documents")
+    parser.add_argument("--levels", default="10,50,100,200")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
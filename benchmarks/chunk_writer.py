@@ -0,0 +1,88 @@
+"""
+Micro-benchmark da gravação de DocumentChunks: ORM (bulk_save_objects)
+contra COPY em CSV e COPY binário.
+
+Cria uma organização, um usuário e um documento temporários e grava N chunks
+sintéticos (embeddings de 384 dimensões) com cada método, em lotes de
+--batch-size com commit lógico por lote (SAVEPOINT). Tudo roda em uma
+transação que é desfeita no final, então o banco não é alterado.
+
+Uso:
+    python -m benchmarks.chunk_writer --chunks 20000 --batch-size 256
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from src.db.copy_writer import copy_document_chunks
+from src.db.session import SessionLocal
+from src.models.document import Document, DocumentChunk
+from src.models.organization import Organization
+from src.models.user import User
+
+
+def make_chunks(n: int, document_id: int, dimension: int, seed: int) -> list[DocumentChunk]:
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((n, dimension), dtype=np.float32)
+    return [
+        DocumentChunk(
+            document_id=document_id,
+            content=f"Trecho sintético {i} do contrato nº {i:06d}/2024 " * 8,
+            content_hash=uuid.uuid4().hex,
+            page_number=i // 4 + 1,
+            char_start=0,
+            char_end=400,
+            embedding=embeddings[i].tolist(),
+        )
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--dimension", type=int, default=384)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        organization = Organization(name="benchmark")
+        db.add(organization)
+        db.flush()
+        user = User(firebase_uid=f"bench-{uuid.uuid4()}", email=f"{uuid.uuid4()}@bench.local",
+                    organization_id=organization.id)
+        db.add(user)
+        db.flush()
+        document = Document(file_name="bench.pdf", file_path="/dev/null", file_size=0,
+                            mime_type="application/pdf", organization_id=organization.id,
+                            uploaded_by_id=user.id)
+        db.add(document)
+        db.flush()
+
+        writers = {
+            "orm": lambda batch: db.bulk_save_objects(batch),
+            "copy csv": lambda batch: copy_document_chunks(db, batch, binary=False),
+            "copy binário": lambda batch: copy_document_chunks(db, batch, binary=True),
+        }
+
+        print(f"{'método':<14} {'chunks/s':>10} {'total (s)':>10}")
+        for seed, (name, write) in enumerate(writers.items()):
+            chunks = make_chunks(args.chunks, document.id, args.dimension, seed)
+            start = time.perf_counter()
+            for i in range(0, len(chunks), args.batch_size):
+                savepoint = db.begin_nested()
+                write(chunks[i:i + args.batch_size])
+                savepoint.commit()
+            elapsed = time.perf_counter() - start
+            print(f"{name:<14} {args.chunks / elapsed:>10.0f} {elapsed:>10.2f}")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
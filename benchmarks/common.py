@@ -0,0 +1,101 @@
+"""
+Utilitários compartilhados pelos benchmarks: percentis de latência e
+gravação dos resultados em JSON (para comparar execuções com
+'python -m benchmarks.compare').
+"""
+
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+from src.core.config import settings
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Configurações que mudam o resultado dos benchmarks, gravadas junto com cada execução
+RELEVANT_SETTINGS = (
+    "EMBEDDING_MODEL_NAME",
+    "EMBEDDING_BACKEND",
+    "EMBEDDING_BATCH_SIZE",
+    "INGESTION_BATCH_SIZE",
+    "INGESTION_WRITER",
+    "VECTOR_INDEX_TYPE",
+    "VECTOR_QUANTIZATION",
+    "VECTOR_INDEX_BACKEND",
+    "SEARCH_HNSW_EF_SEARCH",
+    "SEARCH_IVFFLAT_PROBES",
+    "SEARCH_RESCORE_FACTOR",
+    "QUERY_MICROBATCH_ENABLED",
+    "DB_POOL_SIZE",
+    "LLM_MODEL",
+    "FAKE_LLM_TOKEN_DELAY_MS",
+)
+
+
+def latency_summary(latencies_ms: list[float]) -> dict:
+    """
+    p50/p95/p99, média e máximo de uma lista de latências em ms.
+    """
+    if not latencies_ms:
+        return {"count": 0}
+    if len(latencies_ms) == 1:
+        value = latencies_ms[0]
+        return {"count": 1, "p50_ms": value, "p95_ms": value, "p99_ms": value, "mean_ms": value, "max_ms": value}
+    quantiles = statistics.quantiles(latencies_ms, n=100, method="inclusive")
+    return {
+        "count": len(latencies_ms),
+        "p50_ms": round(quantiles[49], 3),
+        "p95_ms": round(quantiles[94], 3),
+        "p99_ms": round(quantiles[98], 3),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "max_ms": round(max(latencies_ms), 3),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def add_output_argument(parser) -> None:
+    parser.add_argument(
+        "--output",
+        help="arquivo JSON com os resultados (padrão: benchmarks/results/<benchmark>-<data>.json)",
+    )
+
+
+def write_results(benchmark: str, parameters: dict, results, output: str | None = None) -> str:
+    """
+    Grava os resultados com o contexto da execução (commit, máquina e
+    configurações relevantes) e retorna o caminho do arquivo.
+    """
+    started_at = datetime.now(timezone.utc)
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{benchmark}-{started_at:%Y%m%dT%H%M%SZ}.json")
+    payload = {
+        "benchmark": benchmark,
+        "created_at": started_at.isoformat(),
+        "git_commit": _git_commit(),
+        "host": {
+            "hostname": socket.gethostname(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {name: getattr(settings, name, None) for name in RELEVANT_SETTINGS},
+        "parameters": parameters,
+        "results": results,
+    }
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False, default=str)
+    print(f"Resultados gravados em {output}")
+    return output
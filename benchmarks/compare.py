@@ -0,0 +1,84 @@
+"""
+Compara dois arquivos de resultados dos benchmarks (benchmarks/results/*.json)
+e imprime, para cada métrica numérica, o valor de cada execução e a
+variação percentual. Também lista as configurações que mudaram entre elas.
+
+Itens de listas são pareados pela chave que os identifica (concurrency,
+pages...), não pela posição, então níveis extras em uma das execuções
+aparecem só de um lado.
+
+Uso:
+    python -m benchmarks.compare benchmarks/results/antes.json benchmarks/results/depois.json
+"""
+
+import argparse
+import json
+
+# Campos que identificam um item de uma lista de resultados
+ITEM_KEYS = ("run", "concurrency", "pages", "chunks", "variant")
+
+
+def flatten(value, prefix: str = "") -> dict[str, float]:
+    """
+    {"a": {"b": 1}, "c": [{"pages": 10, "x": 2}]} -> {"a.b": 1, "c[pages=10].x": 2}
+    """
+    if isinstance(value, bool):
+        return {}
+    if isinstance(value, (int, float)):
+        return {prefix: value}
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            label = str(index)
+            if isinstance(item, dict):
+                key = next((key for key in ITEM_KEYS if key in item), None)
+                if key is not None:
+                    label = f"{key}={item[key]}"
+                    item = {k: v for k, v in item.items() if k != key}
+            flat.update(flatten(item, f"{prefix}[{label}]"))
+    return flat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.0, help="só mostra variações acima deste percentual")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    if baseline.get("benchmark") != candidate.get("benchmark"):
+        print(f"Atenção: benchmarks diferentes ({baseline.get('benchmark')} x {candidate.get('benchmark')}).")
+    print(f"Base:      {args.baseline} (commit {baseline.get('git_commit')}, {baseline.get('created_at')})")
+    print(f"Candidato: {args.candidate} (commit {candidate.get('git_commit')}, {candidate.get('created_at')})")
+
+    for section in ("settings", "parameters"):
+        before, after = baseline.get(section, {}), candidate.get(section, {})
+        for key in sorted(set(before) | set(after)):
+            if before.get(key) != after.get(key):
+                print(f"  {section}.{key}: {before.get(key)!r} -> {after.get(key)!r}")
+
+    before = flatten(baseline.get("results"))
+    after = flatten(candidate.get("results"))
+    width = max((len(key) for key in before.keys() | after.keys()), default=10)
+    print(f"\n{'métrica':<{width}} {'base':>12} {'candidato':>12} {'variação':>9}")
+    for key in sorted(before.keys() | after.keys()):
+        old, new = before.get(key), after.get(key)
+        if old is None or new is None:
+            print(f"{key:<{width}} {old if old is not None else '-':>12} {new if new is not None else '-':>12}")
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        if abs(change) < args.threshold:
+            continue
+        print(f"{key:<{width}} {old:>12.3f} {new:>12.3f} {change:>+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
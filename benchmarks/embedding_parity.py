@@ -0,0 +1,76 @@
+"""
+Checagem de paridade e desempenho dos backends de embedding.
+
+Compara cada backend com o modelo FP32 de referência ("torch"): similaridade
+de cosseno entre os vetores, latência de 'encode' e memória do processo.
+Sai com código 1 se algum backend ficar abaixo de EMBEDDING_PARITY_MIN_COSINE,
+então pode ser usado como portão no CI antes de trocar EMBEDDING_BACKEND.
+
+Uso:
+    python -m benchmarks.embedding_parity --backends torch-int8,onnx --texts 512
+"""
+
+import argparse
+import resource
+import sys
+import time
+
+from src.core.config import settings
+from src.services.embedding_backends import cosine_parity, get_embedding_backend
+
+SAMPLE_TEXTS = [
+    "O presente contrato tem por objeto a prestação de serviços de limpeza urbana.",
+    "Fica prorrogado o prazo de vigência por mais 12 (doze) meses, a contar da assinatura.",
+    "A CONTRATADA, inscrita no CNPJ sob o nº 12.345.678/0001-90, compromete-se a entregar os materiais.",
+    "Relatório trimestral de execução orçamentária da Secretaria Municipal de Saúde.",
+    "Termo de referência para aquisição de gêneros alimentícios destinados à merenda escolar.",
+    "The supplier shall deliver the goods within thirty days of the purchase order.",
+    "Valor global estimado: R$ 1.250.000,00 (um milhão, duzentos e cinquenta mil reais).",
+    "Ata da sessão pública do pregão eletrônico nº 45/2024.",
+]
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed_encode(backend, texts: list[str]):
+    backend.encode(texts[:8])  # Aquecimento
+    start = time.perf_counter()
+    embeddings = backend.encode(texts, batch_size=settings.EMBEDDING_BATCH_SIZE)
+    return embeddings, (time.perf_counter() - start) * 1000 / len(texts)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch-int8,onnx")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--min-cosine", type=float, default=settings.EMBEDDING_PARITY_MIN_COSINE)
+    args = parser.parse_args()
+
+    texts = [f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} (trecho {i})" for i in range(args.texts)]
+
+    rss_before = rss_mb()
+    reference = get_embedding_backend("torch")
+    rss_reference = rss_mb() - rss_before
+    reference_vectors, reference_ms = timed_encode(reference, texts)
+    print(f"{'backend':<12} {'cos mín':>8} {'cos médio':>10} {'ms/texto':>9} {'+RSS (MB)':>10}")
+    print(f"{'torch':<12} {1.0:>8.4f} {1.0:>10.4f} {reference_ms:>9.2f} {rss_reference:>10.0f}")
+
+    ok = True
+    for name in args.backends.split(","):
+        rss_before = rss_mb()
+        backend = get_embedding_backend(name)
+        rss_delta = rss_mb() - rss_before
+        vectors, ms = timed_encode(backend, texts)
+        similarity = cosine_parity(reference_vectors, vectors)
+        print(f"{name:<12} {similarity.min():>8.4f} {similarity.mean():>10.4f} {ms:>9.2f} {rss_delta:>10.0f}")
+        if similarity.min() < args.min_cosine:
+            print(f"[FALHA] {name}: cosseno mínimo abaixo de {args.min_cosine}")
+            ok = False
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
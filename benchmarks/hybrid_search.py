@@ -0,0 +1,105 @@
+"""
+Benchmark da busca híbrida (full-text + vetorial com RRF) contra a busca só vetorial.
+
+Monta consultas a partir de chunks reais do banco, em dois tipos:
+- "identificador": um token com dígitos do chunk (nº de contrato, CNPJ, processo...);
+- "frase": uma sequência de palavras do chunk.
+Um acerto é quando o chunk de origem aparece entre os top_k resultados.
+Imprime a taxa de acerto e a latência de cada modo.
+
+Uso:
+    python -m benchmarks.hybrid_search --queries 200 --top-k 10 --candidate-k 50
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import statistics
+import time
+
+from sqlalchemy import text
+
+from src.db.session import AsyncSessionLocal, SessionLocal
+from src.services import search_service
+
+IDENTIFIER_RE = re.compile(r"\b[\w./-]*\d[\w./-]*\b")
+
+
+def build_queries(db, n: int, seed: int) -> list[tuple[str, str, int, int, str]]:
+    """
+    Retorna tuplas (tipo, consulta, organization_id, document_id, content).
+    """
+    rng = random.Random(seed)
+    db.execute(text("SELECT setseed(:seed)"), {"seed": (seed % 1000) / 1000})
+    rows = db.execute(
+        text(
+            """
+            SELECT d.organization_id, dc.document_id, dc.content
+            FROM document_chunks AS dc
+            JOIN documents AS d ON dc.document_id = d.id
+            ORDER BY random()
+            LIMIT :n
+            """
+        ),
+        {"n": n * 2},
+    ).fetchall()
+
+    queries = []
+    for row in rows:
+        identifiers = [token for token in IDENTIFIER_RE.findall(row.content) if len(token) >= 4]
+        if identifiers:
+            queries.append(("identificador", rng.choice(identifiers), row.organization_id, row.document_id, row.content))
+        words = row.content.split()
+        if len(words) >= 8:
+            start = rng.randrange(0, len(words) - 7)
+            phrase = " ".join(words[start:start + 8])
+            queries.append(("frase", phrase, row.organization_id, row.document_id, row.content))
+    return queries[:n * 2]
+
+
+async def run(args, queries) -> None:
+    async with AsyncSessionLocal() as db:
+        print(f"{'modo':<8} {'tipo':<14} {'acerto@' + str(args.top_k):>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+        for mode in ("vector", "hybrid"):
+            by_kind: dict[str, tuple[list[bool], list[float]]] = {}
+            for kind, query, organization_id, document_id, content in queries:
+                start = time.perf_counter()
+                results = await search_service.semantic_search(
+                    db, query=query, organization_id=organization_id, top_k=args.top_k,
+                    mode=mode, candidate_k=args.candidate_k,
+                )
+                elapsed = (time.perf_counter() - start) * 1000
+                await db.rollback()
+                hit = any(r.document_id == document_id and r.content == content for r in results)
+                hits, latencies = by_kind.setdefault(kind, ([], []))
+                hits.append(hit)
+                latencies.append(elapsed)
+
+            for kind, (hits, latencies) in by_kind.items():
+                p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+                print(f"{mode:<8} {kind:<14} {sum(hits) / len(hits):>10.3f} "
+                      f"{statistics.median(latencies):>10.2f} {p95:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--candidate-k", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        queries = build_queries(db, args.queries, args.seed)
+    finally:
+        db.close()
+    for _, query, *_ in queries:
+        search_service.encode_query(query)  # Tira o encode da medição
+
+    asyncio.run(run(args, queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Vazão da ingestão (process_document_task) em PDFs sintéticos.
+
+Para cada tamanho em --pages, gera um PDF (benchmarks.synthetic), cria o
+documento em uma organização temporária e executa a tarefa no próprio
+processo (sem broker), medindo páginas/s, chunks/s e o tempo de cada
+etapa (spans de src.core.metrics): embeddings, gravação no banco e
+índice local. O restante (extração do texto e chunking) é informado
+como 'extract_and_chunk_ms'.
+
+As tarefas do fluxo (chord de extração, embeddings em fatias e conclusão)
+rodam em sequência no próprio processo (task_always_eager). Ao final, a organização e seus dados são apagados (--keep para manter).
+
+Uso:
+    python -m benchmarks.ingestion_throughput --pages 10,100,500 --runs 3
+"""
+
+import argparse
+import hashlib
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+
+from sqlalchemy import delete, func, select
+
+from benchmarks.common import add_output_argument, write_results
+from benchmarks.synthetic import create_organization, write_pdf
+from src.core import metrics
+from src.db.session import SessionLocal
+from src.models.document import Document, DocumentChunk
+from src.models.organization import Organization
+from src.models.user import User
+from src.tasks.celery_app import celery_app
+from src.tasks.document_tasks import process_document_task
+
+
+def run_once(db, organization_id: int, user_id: int, path: str, pages: int) -> dict:
+    with open(path, "rb") as f:
+        data = f.read()
+    document = Document(
+        file_name=os.path.basename(path),
+        file_path=path,
+        file_size=len(data),
+        mime_type="application/pdf",
+        content_hash=hashlib.sha256(data).hexdigest(),
+        status="PENDING_PROCESSING",
+        organization_id=organization_id,
+        uploaded_by_id=user_id,
+    )
+    db.add(document)
+    db.commit()
+
+    start = time.perf_counter()
+    with metrics.trace("ingestion") as root:
+        process_document_task.apply(args=[document.id]).get()
+    seconds = time.perf_counter() - start
+
+    stages = defaultdict(float)
+    for child in root.children:
+        stages[child.name] += child.duration_ms or 0.0
+    db.refresh(document)
+    chunks = db.scalar(select(func.count(DocumentChunk.id)).where(DocumentChunk.document_id == document.id))
+    return {
+        "status": document.status,
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": seconds,
+        "pages_per_s": pages / seconds,
+        "chunks_per_s": chunks / seconds,
+        "stages_ms": {
+            **{name: round(ms, 1) for name, ms in stages.items()},
+            "extract_and_chunk_ms": round(seconds * 1000 - sum(stages.values()), 1),
+        },
+    }
+
+
+def cleanup(db, organization_id: int) -> None:
+    document_ids = select(Document.id).where(Document.organization_id == organization_id)
+    db.execute(delete(DocumentChunk).where(DocumentChunk.document_id.in_(document_ids)))
+    db.execute(delete(Document).where(Document.organization_id == organization_id))
+    db.execute(delete(User).where(User.organization_id == organization_id))
+    db.execute(delete(Organization).where(Organization.id == organization_id))
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="10,100,500")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="mantém a organização e os documentos criados")
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    celery_app.conf.task_always_eager = True
+    sizes = [int(size) for size in args.pages.split(",")]
+
+    db = SessionLocal()
+    organization, user = create_organization(db, f"bench-ingestion-{uuid.uuid4().hex[:8]}")
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            print(f"{'páginas':>8} {'execução':>9} {'páginas/s':>10} {'chunks/s':>10} {'total (s)':>10}")
+            for size in sizes:
+                runs = []
+                for run in range(args.runs):
+                    # Uma semente por PDF: textos diferentes não reaproveitam embeddings entre execuções
+                    path = write_pdf(os.path.join(directory, f"bench-{size}-{run}.pdf"), size,
+                                     seed=args.seed * 1000 + size * 10 + run)
+                    r = {"run": run + 1, **run_once(db, organization.id, user.id, path, size)}
+                    runs.append(r)
+                    print(f"{size:>8} {run + 1:>9} {r['pages_per_s']:>10.1f} {r['chunks_per_s']:>10.1f} "
+                          f"{r['seconds']:>10.2f}")
+                results.append({
+                    "pages": size,
+                    "pages_per_s_median": statistics.median(r["pages_per_s"] for r in runs),
+                    "chunks_per_s_median": statistics.median(r["chunks_per_s"] for r in runs),
+                    "runs": runs,
+                })
+    finally:
+        if not args.keep:
+            cleanup(db, organization.id)
+        db.close()
+
+    write_results("ingestion_throughput", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark do índice vetorial local (NumPy + memmap) contra o pgvector.
+
+Carrega os vetores de uma organização, constrói o índice local em um
+diretório temporário (exato em float32/float16/int8 e IVF) e mede
+latência e recall@k de cada variante e da busca ANN do pgvector, usando
+embeddings de chunks salvos como consultas. A referência do recall é a busca exata em float32.
+
+--synthetic N acrescenta N vetores aleatórios ao índice local (o pgvector
+não é medido nesse caso), para estimar a latência de organizações maiores.
+
+Uso:
+    python -m benchmarks.local_vector_index --organization-id 1 --queries 200 --top-k 10 --probes 4,8,16
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from src.core.config import settings
+from src.db.session import SessionLocal
+from src.services.local_vector_store import LocalVectorStore
+from src.tasks.index_tasks import load_organization_vectors
+
+PGVECTOR_SQL = text(
+    """
+    SELECT dc.id
+    FROM document_chunks AS dc
+    JOIN documents AS d ON dc.document_id = d.id
+    WHERE d.organization_id = :organization_id
+    ORDER BY dc.embedding <=> CAST(:query_embedding AS vector)
+    LIMIT :top_k
+    """
+)
+
+
+def build_store(root: str, name: str, ids, vectors, dtype: str, ivf_lists: int | None) -> LocalVectorStore:
+    settings.LOCAL_INDEX_DTYPE = dtype
+    settings.LOCAL_INDEX_IVF_MIN_VECTORS = 1 if ivf_lists else len(ids) + 1
+    settings.LOCAL_INDEX_IVF_LISTS = ivf_lists or settings.LOCAL_INDEX_IVF_LISTS
+    store = LocalVectorStore(0, name, root=root)
+    start = time.perf_counter()
+    store.rebuild(lambda: (ids, vectors))
+    print(f"{name}: construído em {(time.perf_counter() - start) * 1000:.0f} ms")
+    return store
+
+
+def measure(search, queries, reference: list[set[int]] | None, top_k: int) -> tuple[list[set[int]], str]:
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        ids = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(set(ids))
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    recall = (
+        statistics.mean(len(r & e) / top_k for r, e in zip(results, reference)) if reference else 1.0
+    )
+    return results, f"{statistics.median(latencies):>9.2f} {p95:>9.2f} {recall:>9.3f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--organization-id", type=int, required=True)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--probes", default="4,8,16", help="partições lidas por consulta no modo IVF")
+    parser.add_argument("--ivf-lists", type=int, default=settings.LOCAL_INDEX_IVF_LISTS)
+    parser.add_argument("--synthetic", type=int, default=0)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        ids, vectors = load_organization_vectors(db, args.organization_id, settings.EMBEDDING_MODEL_NAME)
+        if len(ids) == 0:
+            print("Nenhum chunk com embedding encontrado para a organização.")
+            return
+        print(f"{len(ids)} vetores da organização ID: {args.organization_id} (dimensão {vectors.shape[1]})")
+
+        rng = np.random.default_rng(0)
+        query_rows = rng.choice(len(ids), min(args.queries, len(ids)), replace=False)
+        queries = vectors[query_rows]
+        if args.synthetic:
+            synthetic = rng.standard_normal((args.synthetic, vectors.shape[1])).astype(np.float32)
+            ids = np.concatenate([ids, -np.arange(1, args.synthetic + 1, dtype=np.int64)])
+            vectors = np.concatenate([vectors, synthetic])
+            print(f"+ {args.synthetic} vetores sintéticos (pgvector não medido)")
+
+        def local_search(store: LocalVectorStore):
+            return lambda query: [chunk_id for chunk_id, _ in store.search(query, args.top_k)]
+
+        with tempfile.TemporaryDirectory() as root:
+            exact = build_store(root, "flat-float32", ids, vectors, "float32", None)
+            half = build_store(root, "flat-float16", ids, vectors, "float16", None)
+            int8 = build_store(root, "flat-int8", ids, vectors, "int8", None)
+            ivf = build_store(root, "ivf-float32", ids, vectors, "float32", args.ivf_lists)
+
+            print(f"{'variante':>20} {'p50 (ms)':>9} {'p95 (ms)':>9} {'recall':>9}")
+            reference, line = measure(local_search(exact), queries, None, args.top_k)
+            print(f"{'local exato f32':>20} {line}")
+            _, line = measure(local_search(half), queries, reference, args.top_k)
+            print(f"{'local exato f16':>20} {line}")
+            _, line = measure(local_search(int8), queries, reference, args.top_k)
+            print(f"{'local exato int8':>20} {line}")
+            for probes in [int(p) for p in args.probes.split(",")]:
+                _, line = measure(
+                    lambda query: [chunk_id for chunk_id, _ in ivf.search(query, args.top_k, probes=probes)],
+                    queries, reference, args.top_k
+                )
+                print(f"{f'local IVF p={probes}':>20} {line}")
+
+        if not args.synthetic:
+            def pgvector_search(query):
+                return db.execute(PGVECTOR_SQL, {
+                    "organization_id": args.organization_id,
+                    "query_embedding": str(query.tolist()),
+                    "top_k": args.top_k,
+                }).scalars().all()
+
+            _, line = measure(pgvector_search, queries, reference, args.top_k)
+            print(f"{'pgvector ' + settings.VECTOR_INDEX_TYPE:>20} {line}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
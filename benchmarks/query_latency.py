@@ -0,0 +1,131 @@
+"""
+Latência da busca e do RAG em vários níveis de concorrência, no próprio
+processo (sem HTTP): C tarefas asyncio, cada uma com a sua AsyncSession,
+chamam 'semantic_search' (--workload search) ou 'answer_question'
+(--workload rag) até completar N consultas por nível.
+
+Para cada nível, grava p50/p95/p99, consultas/s e os percentis de cada
+etapa (spans de src.core.metrics: query_encode, search_sql, llm...).
+No RAG, o LLM é o "fake" (local, FAKE_LLM_TOKEN_DELAY_MS entre tokens) e
+o cache semântico de respostas é desligado, então todas as perguntas
+passam pelo fluxo completo.
+
+Use uma organização criada com 'python -m benchmarks.synthetic corpus'
+(as consultas são frases sintéticas; só a latência importa aqui).
+
+Uso:
+    python -m benchmarks.query_latency --organization bench-1000000 --workload search \\
+        --levels 1,8,32,64 --queries 500 --mode vector
+    python -m benchmarks.query_latency --organization bench-10000 --workload rag --token-delay-ms 5
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+
+from benchmarks.common import add_output_argument, latency_summary, write_results
+from benchmarks.synthetic import SyntheticText, find_organization
+from src.core import metrics
+from src.core.config import settings
+from src.db.session import AsyncSessionLocal, SessionLocal
+from src.services import search_service
+
+
+async def run_query(workload: str, query: str, organization_id: int, mode: str, top_k: int) -> None:
+    async with AsyncSessionLocal() as db:
+        if workload == "rag":
+            await search_service.answer_question(db, query, organization_id, mode=mode)
+        else:
+            await search_service.semantic_search(db, query, organization_id, top_k=top_k, mode=mode)
+
+
+async def run_level(args, organization_id: int, queries: list[str], concurrency: int) -> dict:
+    latencies: list[float] = []
+    stages: dict[str, list[float]] = defaultdict(list)
+    errors = 0
+    counter = iter(range(len(queries)))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            with metrics.trace(args.workload) as root:
+                try:
+                    await run_query(args.workload, queries[i], organization_id, args.mode, args.top_k)
+                except Exception as e:
+                    errors += 1
+                    print(f"Erro na consulta {i}: {e}")
+                    continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            for child in root.children:
+                stages[child.name].append(child.duration_ms or 0.0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "queries_per_s": round(len(latencies) / elapsed, 2),
+        "errors": errors,
+        "latency": latency_summary(latencies),
+        "stages": {name: latency_summary(values) for name, values in sorted(stages.items())},
+    }
+
+
+async def run(args, organization_id: int) -> list[dict]:
+    text = SyntheticText(args.seed)
+    # Aquecimento: carrega o modelo, abre as conexões do pool e preenche os caches
+    for _ in range(args.warmup):
+        await run_query(args.workload, text.query(), organization_id, args.mode, args.top_k)
+
+    results = []
+    print(f"{'concorr.':>9} {'consultas/s':>12} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'erros':>6}")
+    for concurrency in [int(level) for level in args.levels.split(",")]:
+        queries = [text.query() for _ in range(args.queries)]
+        r = await run_level(args, organization_id, queries, concurrency)
+        latency = r["latency"]
+        print(f"{concurrency:>9} {r['queries_per_s']:>12.1f} {latency.get('p50_ms', 0):>9.1f} "
+              f"{latency.get('p95_ms', 0):>9.1f} {latency.get('p99_ms', 0):>9.1f} {r['errors']:>6}")
+        results.append(r)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--organization", required=True, help="nome (ou ID) da organização com o corpus")
+    parser.add_argument("--workload", choices=["search", "rag"], default="search")
+    parser.add_argument("--mode", choices=["vector", "hybrid"], default="vector")
+    parser.add_argument("--levels", default="1,8,32,64")
+    parser.add_argument("--queries", type=int, default=500, help="consultas por nível de concorrência")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--token-delay-ms", type=float, default=settings.FAKE_LLM_TOKEN_DELAY_MS)
+    parser.add_argument("--seed", type=int, default=0)
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    if args.workload == "rag":
+        settings.LLM_MODEL = "fake"
+        settings.FAKE_LLM_TOKEN_DELAY_MS = args.token_delay_ms
+        settings.ANSWER_CACHE_ENABLED = False
+
+    if args.organization.isdigit():
+        organization_id = int(args.organization)
+    else:
+        db = SessionLocal()
+        try:
+            organization = find_organization(db, args.organization)
+        finally:
+            db.close()
+        if organization is None:
+            print(f"Organização '{args.organization}' não encontrada. Crie-a com 'benchmarks.synthetic corpus'.")
+            return
+        organization_id = organization.id
+
+    results = asyncio.run(run(args, organization_id))
+    write_results(f"query_latency-{args.workload}", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Teste de carga do micro-batching de embeddings de consultas.
+
+Dispara N consultas distintas a partir de C threads concorrentes (simulando
+o threadpool do FastAPI), primeiro chamando o modelo uma consulta por vez e
+depois através do MicroBatchEncoder, e compara throughput e latência.
+
+Uso:
+    python -m benchmarks.query_microbatch_load --concurrency 50 --requests 2000
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sentence_transformers import SentenceTransformer
+
+from src.core.config import settings
+from src.services.embedding_batcher import MicroBatchEncoder
+
+TEMPLATES = [
+    "contratos que vencem em {n} dias",
+    "qual o valor total do contrato número {n}",
+    "licitação de merenda escolar do lote {n}",
+    "notas fiscais emitidas no mês {n}",
+    "termo aditivo do convênio {n}",
+]
+
+
+def make_queries(n: int) -> list[str]:
+    return [TEMPLATES[i % len(TEMPLATES)].format(n=i) for i in range(n)]
+
+
+def run(encode, queries: list[str], concurrency: int) -> dict:
+    latencies = []
+
+    def one(query: str) -> None:
+        start = time.perf_counter()
+        encode(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, queries))
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "qps": len(queries) / elapsed,
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    model = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
+    queries = make_queries(args.requests)
+    model.encode(queries[:8])  # Aquecimento
+
+    batcher = MicroBatchEncoder(model.encode, args.max_batch_size, args.max_wait_ms)
+    results = {
+        "uma por vez": run(model.encode, queries, args.concurrency),
+        "micro-batch": run(batcher.encode, queries, args.concurrency),
+    }
+
+    print(f"concorrência={args.concurrency} requisições={args.requests} "
+          f"lote médio={batcher.stats()['avg_batch_size']:.1f}")
+    print(f"{'modo':<14} {'req/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<14} {r['qps']:>10.1f} {r['p50_ms']:>10.1f} {r['p95_ms']:>10.1f} {r['p99_ms']:>10.1f}")
+    print(f"ganho de throughput: {results['micro-batch']['qps'] / results['uma por vez']['qps']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
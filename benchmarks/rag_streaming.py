@@ -0,0 +1,86 @@
+"""
+Compara o tempo percebido pelo usuário entre '/search/ask' (resposta completa)
+e '/search/ask/stream' (Server-Sent Events), medidos do lado do cliente:
+tempo até as fontes, tempo até o primeiro token (TTFT) e tempo total.
+
+Com LLM_MODEL=fake no servidor, a geração é local e determinística
+(FAKE_LLM_TOKEN_DELAY_MS entre tokens), o que permite rodar sem chave de API.
+
+Uso:
+    python -m benchmarks.rag_streaming --base-url http://localhost:8000 \\
+        --token "$FIREBASE_ID_TOKEN" --questions 20
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+
+QUESTIONS = [
+    "Quais contratos vencem este mês?",
+    "Qual o valor total do contrato de merenda escolar?",
+    "O que diz o termo aditivo do convênio de saúde?",
+    "Quem assinou as notas fiscais da secretaria de obras?",
+]
+
+
+def ask(client: httpx.Client, question: str) -> float:
+    start = time.perf_counter()
+    client.post("/api/v1/search/ask", json={"query": question}).raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+def ask_stream(client: httpx.Client, question: str) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    with client.stream("POST", "/api/v1/search/ask/stream", json={"query": question}) as response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                elapsed = (time.perf_counter() - start) * 1000
+                if event == "sources":
+                    timings["sources_ms"] = elapsed
+                elif event == "token":
+                    timings.setdefault("ttft_ms", elapsed)
+                elif event == "done":
+                    timings["server"] = json.loads(line[len("data: "):])
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="ID token do Firebase de um usuário com organização")
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+    with httpx.Client(
+        base_url=args.base_url,
+        headers={"Authorization": f"Bearer {args.token}"},
+        timeout=args.timeout,
+    ) as client:
+        blocking = [ask(client, q) for q in questions]
+        streaming = [ask_stream(client, q) for q in questions]
+
+    def median(key: str) -> float:
+        return statistics.median(t[key] for t in streaming if key in t)
+
+    print(f"perguntas={args.questions}")
+    print(f"{'modo':<10} {'fontes (ms)':>12} {'1º token (ms)':>14} {'total (ms)':>11}")
+    print(f"{'/ask':<10} {'-':>12} {statistics.median(blocking):>14.0f} {statistics.median(blocking):>11.0f}")
+    print(f"{'/stream':<10} {median('sources_ms'):>12.0f} {median('ttft_ms'):>14.0f} {median('total_ms'):>11.0f}")
+    server_ttft = [t["server"]["ttft_ms"] for t in streaming if "server" in t]
+    if server_ttft:
+        print(f"TTFT do LLM medido no servidor (mediana): {statistics.median(server_ttft):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Latência do cross-encoder de rerank por número de candidatos, para
+escolher RERANK_CANDIDATES e RERANK_TIMEOUT_MS.
+
+Usa trechos reais de document_chunks e mede um forward pass por
+consulta (todos os pares em um único lote), como na API.
+
+Uso:
+    python -m benchmarks.rerank_latency --candidates 10,20,50,100 --repeats 20
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from src.db.session import SessionLocal
+from src.services.reranker import reranker
+
+QUERY = "qual o valor total do contrato e a data de vencimento"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", default="10,20,50,100")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.candidates.split(",")]
+    db = SessionLocal()
+    try:
+        contents = db.execute(
+            text("SELECT content FROM document_chunks LIMIT :n"), {"n": max(levels)}
+        ).scalars().all()
+    finally:
+        db.close()
+    if len(contents) < max(levels):
+        raise SystemExit(f"Apenas {len(contents)} chunks no banco; reduza --candidates.")
+
+    start = time.perf_counter()
+    reranker.score(QUERY, contents[:2])
+    print(f"carga do modelo + 1ª chamada: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"{'candidatos':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for level in levels:
+        latencies = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            reranker.score(QUERY, contents[:level])
+            latencies.append((time.perf_counter() - start) * 1000)
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        print(f"{level:>10} {statistics.median(latencies):>10.1f} {p95:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
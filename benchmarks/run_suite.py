@@ -0,0 +1,116 @@
+"""
+Suíte reproduzível de benchmarks de ingestão e busca.
+
+1. Vazão da ingestão em PDFs sintéticos (benchmarks.ingestion_throughput);
+2. para cada tamanho de corpus em --sizes (10k -> 10M chunks), completa a
+   organização sintética (benchmarks.synthetic, incremental: cada tamanho
+   só grava a diferença para o anterior), roda ANALYZE e mede a latência
+   da busca e do RAG com LLM "fake" em cada nível de concorrência
+   (benchmarks.query_latency).
+
+Tudo vai para um único JSON (benchmarks/results/suite-<data>.json), que
+pode ser comparado com outra execução por 'python -m benchmarks.compare'.
+
+Rode contra um Postgres com pgvector local, com o banco migrado:
+    docker compose up -d postgres_db redis_cache
+    alembic upgrade head
+
+Uso:
+    python -m benchmarks.run_suite --sizes 10000,100000,1000000 --levels 1,8,32 --queries 300
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from sqlalchemy import text
+
+from benchmarks import query_latency
+from benchmarks.common import add_output_argument, write_results
+from benchmarks.synthetic import load_corpus
+from src.core.config import settings
+from src.db.session import SessionLocal, engine
+
+
+def run_ingestion(pages: str, runs: int, seed: int) -> list[dict]:
+    # Processo separado: a ingestão altera 'settings' e carrega o modelo do worker
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "ingestion.json")
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.ingestion_throughput", "--pages", pages,
+             "--runs", str(runs), "--seed", str(seed), "--output", output],
+            check=True,
+        )
+        with open(output) as f:
+            return json.load(f)["results"]
+
+
+def analyze() -> None:
+    # Estatísticas atualizadas depois de cada carga, senão o planejador ignora o índice ANN
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE document_chunks"))
+        connection.execute(text("ANALYZE documents"))
+
+
+async def run_corpus(args) -> list[dict]:
+    # Um único event loop para todos os tamanhos: o pool do asyncpg fica preso ao loop que o criou
+    entries = []
+    for size in sorted(int(size) for size in args.sizes.split(",")):
+        print(f"== Corpus com {size} chunks ==")
+        db = SessionLocal()
+        try:
+            organization_id = load_corpus(db, args.name, size, seed=args.seed)
+        finally:
+            db.close()
+        analyze()
+
+        entry = {"chunks": size}
+        for workload, queries in (("search", args.queries), ("rag", args.rag_queries)):
+            if not queries:
+                continue
+            print(f"-- {workload} --")
+            workload_args = argparse.Namespace(
+                workload=workload, mode=args.mode, levels=args.levels, queries=queries,
+                top_k=args.top_k, warmup=20, seed=args.seed,
+            )
+            entry[workload] = await query_latency.run(workload_args, organization_id)
+        entries.append(entry)
+    return entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="tamanhos do corpus, em chunks")
+    parser.add_argument("--name", default="bench-suite", help="organização do corpus sintético")
+    parser.add_argument("--levels", default="1,8,32")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--mode", choices=["vector", "hybrid"], default="vector")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--rag-queries", type=int, default=100, help="0 desliga a medição do RAG")
+    parser.add_argument("--token-delay-ms", type=float, default=0.0)
+    parser.add_argument("--ingestion-pages", default="10,100", help="vazio desliga a medição da ingestão")
+    parser.add_argument("--ingestion-runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    add_output_argument(parser)
+    args = parser.parse_args()
+
+    results = {}
+    if args.ingestion_pages:
+        print("== Ingestão ==")
+        results["ingestion"] = run_ingestion(args.ingestion_pages, args.ingestion_runs, args.seed)
+
+    settings.LLM_MODEL = "fake"
+    settings.FAKE_LLM_TOKEN_DELAY_MS = args.token_delay_ms
+    settings.ANSWER_CACHE_ENABLED = False
+
+    results["corpus"] = asyncio.run(run_corpus(args))
+
+    write_results("suite", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Geradores de dados sintéticos para os benchmarks.
+
+- PDFs com várias páginas de texto administrativo em português (contratos,
+  licitações, notas fiscais), com identificadores numéricos realistas;
+- corpora de chunks com embeddings sintéticos (mistura de gaussianas
+  normalizadas, o que dá vizinhanças parecidas com as de textos reais),
+  gravados direto em document_chunks com COPY.
+
+Tudo é determinístico a partir de --seed, então duas execuções com os
+mesmos parâmetros geram os mesmos dados.
+
+Uso:
+    python -m benchmarks.synthetic pdf --pages 300 --output /tmp/bench.pdf
+    python -m benchmarks.synthetic corpus --chunks 1000000 --name bench-1m
+"""
+
+import argparse
+import hashlib
+import random
+import time
+import uuid
+from typing import NamedTuple
+
+import fitz  # PyMuPDF
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.db.copy_writer import copy_document_chunks
+from src.db.session import SessionLocal
+from src.models.document import Document, DocumentChunk
+from src.models.organization import Organization
+from src.models.user import User, UserRole
+
+SUBJECTS = [
+    "o contrato", "a licitação", "o convênio", "o termo aditivo", "a nota fiscal",
+    "o empenho", "a ata de registro de preços", "o processo administrativo", "o edital",
+]
+VERBS = [
+    "estabelece", "prorroga", "reajusta", "suspende", "homologa", "autoriza", "rescinde", "registra",
+]
+OBJECTS = [
+    "o fornecimento de merenda escolar", "a manutenção da frota municipal", "a reforma da unidade de saúde",
+    "a aquisição de material de expediente", "a prestação de serviços de limpeza",
+    "a locação de imóvel para a secretaria de educação", "a pavimentação de vias urbanas",
+    "o transporte escolar da zona rural", "a compra de medicamentos básicos",
+]
+DETAILS = [
+    "no valor global de R$ {value}", "com vigência de {months} meses", "a contar de {day:02d}/{month:02d}/2024",
+    "conforme o processo nº {process}/2024", "em favor da empresa inscrita no CNPJ {cnpj}",
+    "com dotação orçamentária da secretaria de {department}",
+]
+DEPARTMENTS = ["obras", "saúde", "educação", "administração", "finanças", "assistência social"]
+QUERY_TEMPLATES = [
+    "contratos para {object}",
+    "qual o valor de {object}",
+    "processo nº {process}/2024",
+    "vigência do convênio para {object}",
+    "empresa do CNPJ {cnpj}",
+]
+
+DIMENSION = 384
+
+
+class SyntheticText:
+    """
+    Frases administrativas aleatórias (mas reproduzíveis) em português.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+
+    def cnpj(self) -> str:
+        d = [self.rng.randrange(10) for _ in range(14)]
+        return f"{d[0]}{d[1]}.{d[2]}{d[3]}{d[4]}.{d[5]}{d[6]}{d[7]}/{d[8]}{d[9]}{d[10]}{d[11]}-{d[12]}{d[13]}"
+
+    def _fill(self, template: str) -> str:
+        return template.format(
+            value=f"{self.rng.uniform(1_000, 5_000_000):,.2f}".translate(str.maketrans(",.", ".,")),
+            months=self.rng.choice([6, 12, 24, 36, 48]),
+            day=self.rng.randint(1, 28),
+            month=self.rng.randint(1, 12),
+            process=self.rng.randint(1, 99999),
+            cnpj=self.cnpj(),
+            department=self.rng.choice(DEPARTMENTS),
+            object=self.rng.choice(OBJECTS),
+        )
+
+    def sentence(self) -> str:
+        details = ", ".join(self._fill(t) for t in self.rng.sample(DETAILS, self.rng.randint(1, 3)))
+        return (f"{self.rng.choice(SUBJECTS).capitalize()} {self.rng.choice(VERBS)} "
+                f"{self.rng.choice(OBJECTS)}, {details}.")
+
+    def paragraph(self, sentences: int) -> str:
+        return " ".join(self.sentence() for _ in range(sentences))
+
+    def query(self) -> str:
+        return self._fill(self.rng.choice(QUERY_TEMPLATES))
+
+
+def write_pdf(path: str, pages: int, seed: int = 0, paragraphs_per_page: int = 4) -> str:
+    """
+    Gera um PDF com 'pages' páginas de texto (A4, fonte padrão).
+    """
+    text = SyntheticText(seed)
+    document = fitz.open()
+    for page_number in range(1, pages + 1):
+        page = document.new_page()
+        body = "\n\n".join(text.paragraph(4) for _ in range(paragraphs_per_page))
+        page.insert_textbox(
+            fitz.Rect(50, 50, page.rect.width - 50, page.rect.height - 50),
+            f"Página {page_number}\n\n{body}",
+            fontsize=9,
+        )
+    document.save(path)
+    document.close()
+    return path
+
+
+class SyntheticChunk(NamedTuple):
+    # Os atributos de 'copy_writer.CHUNK_COLUMNS'; bem mais leve que um
+    # DocumentChunk do ORM quando são milhões de linhas
+    document_id: int
+    content: str
+    content_hash: str
+    page_number: int
+    char_start: int
+    char_end: int
+    embedding: np.ndarray
+    embedding_model: str
+    next_embedding: None
+    next_embedding_model: None
+
+
+class ClusteredEmbeddings:
+    """
+    Vetores unitários em torno de 'clusters' centros aleatórios: textos
+    reais formam grupos de assuntos, e um ANN se comporta bem diferente
+    em dados agrupados e em ruído uniforme.
+    """
+
+    def __init__(self, dimension: int = DIMENSION, clusters: int = 1000, spread: float = 0.35, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        centers = self.rng.standard_normal((clusters, dimension), dtype=np.float32)
+        self.centers = centers / np.linalg.norm(centers, axis=1, keepdims=True)
+        self.spread = spread
+
+    def sample(self, n: int) -> np.ndarray:
+        centers = self.centers[self.rng.integers(0, len(self.centers), n)]
+        noise = self.rng.standard_normal(centers.shape, dtype=np.float32) * (self.spread / np.sqrt(centers.shape[1]))
+        vectors = centers + noise
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def create_organization(db: Session, name: str) -> tuple[Organization, User]:
+    """
+    Organização e usuário administrador para os dados do benchmark.
+    """
+    organization = Organization(name=name)
+    db.add(organization)
+    db.flush()
+    user = User(
+        firebase_uid=f"bench-{uuid.uuid4()}",
+        email=f"{uuid.uuid4().hex[:12]}@bench.local",
+        role=UserRole.ADMIN,
+        organization_id=organization.id,
+    )
+    db.add(user)
+    db.commit()
+    return organization, user
+
+
+def find_organization(db: Session, name: str) -> Organization | None:
+    return db.execute(select(Organization).where(Organization.name == name)).scalars().first()
+
+
+def count_chunks(db: Session, organization_id: int) -> int:
+    return db.scalar(
+        select(func.count(DocumentChunk.id))
+        .join(Document, DocumentChunk.document_id == Document.id)
+        .where(Document.organization_id == organization_id)
+    )
+
+
+def load_corpus(
+    db: Session,
+    name: str,
+    chunks: int,
+    chunks_per_document: int = 200,
+    batch_size: int = 5000,
+    seed: int = 0,
+) -> int:
+    """
+    Cria (ou completa) a organização 'name' com 'chunks' chunks sintéticos.
+    Retorna o id da organização. Rodar de novo com um número maior só
+    acrescenta a diferença, então os tamanhos (10k -> 10M) podem ser
+    construídos incrementalmente.
+    """
+    organization = find_organization(db, name)
+    if organization is None:
+        organization, _ = create_organization(db, name)
+    user_id = db.scalar(select(User.id).where(User.organization_id == organization.id))
+
+    existing = count_chunks(db, organization.id)
+    if existing >= chunks:
+        print(f"Organização '{name}' (ID: {organization.id}) já tem {existing} chunks.")
+        return organization.id
+
+    # Os centros dos grupos vêm só de 'seed' (iguais em todos os tamanhos);
+    # o restante depende do ponto de partida, para não repetir os chunks já gravados
+    text = SyntheticText(seed + existing)
+    embeddings = ClusteredEmbeddings(seed=seed)
+    embeddings.rng = np.random.default_rng(seed + existing)
+
+    start = time.perf_counter()
+    written = existing
+    document = None
+    while written < chunks:
+        n = min(batch_size, chunks - written)
+        vectors = embeddings.sample(n)
+        batch = []
+        for i in range(n):
+            position = written + i
+            if document is None or position % chunks_per_document == 0:
+                db.flush()
+                document = Document(
+                    file_name=f"sintetico-{position // chunks_per_document:07d}.pdf",
+                    file_path="/dev/null",
+                    file_size=0,
+                    mime_type="application/pdf",
+                    status="COMPLETED",
+                    organization_id=organization.id,
+                    uploaded_by_id=user_id,
+                )
+                db.add(document)
+                db.flush()
+            content = text.paragraph(2)
+            batch.append(SyntheticChunk(
+                document_id=document.id,
+                content=content,
+                content_hash=hashlib.sha256(content.encode("utf-8")).hexdigest(),
+                page_number=(position % chunks_per_document) // 4 + 1,
+                char_start=0,
+                char_end=len(content),
+                embedding=vectors[i],
+                embedding_model=settings.EMBEDDING_MODEL_NAME,
+                next_embedding=None,
+                next_embedding_model=None,
+            ))
+        copy_document_chunks(db, batch, binary=True)
+        db.commit()
+        written += n
+        elapsed = time.perf_counter() - start
+        print(f"  {written}/{chunks} chunks ({(written - existing) / elapsed:.0f} chunks/s)")
+
+    print(f"Organização '{name}' (ID: {organization.id}) com {written} chunks. Rode ANALYZE antes de medir.")
+    return organization.id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pdf = subparsers.add_parser("pdf", help="gera um PDF sintético")
+    pdf.add_argument("--pages", type=int, default=100)
+    pdf.add_argument("--output", required=True)
+    pdf.add_argument("--seed", type=int, default=0)
+
+    corpus = subparsers.add_parser("corpus", help="grava um corpus sintético no banco")
+    corpus.add_argument("--chunks", type=int, default=10_000)
+    corpus.add_argument("--name", default=None, help="nome da organização (padrão: bench-<chunks>)")
+    corpus.add_argument("--chunks-per-document", type=int, default=200)
+    corpus.add_argument("--batch-size", type=int, default=5000)
+    corpus.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "pdf":
+        print(write_pdf(args.output, args.pages, args.seed))
+        return
+
+    db = SessionLocal()
+    try:
+        load_corpus(
+            db, args.name or f"bench-{args.chunks}", args.chunks,
+            chunks_per_document=args.chunks_per_document, batch_size=args.batch_size, seed=args.seed,
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
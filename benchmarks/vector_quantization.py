@@ -0,0 +1,173 @@
+"""
+Benchmark do índice ANN quantizado (halfvec / binário) com rescore exato,
+contra o índice em precisão total: tamanho do índice, recall@k e latência.
+
+Para cada variante, cria o índice correspondente se ele ainda não existir
+(e o remove ao final, a menos que --keep seja usado). Os índices
+quantizados do benchmark têm nomes próprios, independentes da migração.
+As consultas são embeddings de chunks salvos; a referência do recall é a
+busca exata (sem índice). Requer pgvector >= 0.7.
+
+Uso:
+    python -m benchmarks.vector_quantization --queries 200 --top-k 10 --rescore-factors 1,2,4,8
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from src.core.config import settings
+from src.db.session import engine, SessionLocal
+
+DIMENSION = 384
+
+# variante -> (nome do índice, expressão indexada + operadores, distância da primeira passada)
+VARIANTS = {
+    "float32": (
+        "ix_document_chunks_embedding_ann",
+        "embedding vector_cosine_ops",
+        "dc.embedding <=> CAST(:query_embedding AS vector)",
+    ),
+    "halfvec": (
+        "ix_benchmark_embedding_halfvec",
+        f"(embedding::halfvec({DIMENSION})) halfvec_cosine_ops",
+        f"CAST(dc.embedding AS halfvec({DIMENSION})) <=> CAST(:query_embedding AS halfvec({DIMENSION}))",
+    ),
+    "binary": (
+        "ix_benchmark_embedding_binary",
+        f"(binary_quantize(embedding)::bit({DIMENSION})) bit_hamming_ops",
+        f"CAST(binary_quantize(dc.embedding) AS bit({DIMENSION})) "
+        f"<~> binary_quantize(CAST(:query_embedding AS vector({DIMENSION})))",
+    ),
+}
+
+RESCORE_SQL = """
+    SELECT id
+    FROM (
+        SELECT dc.id, dc.embedding <=> CAST(:query_embedding AS vector) AS distance
+        FROM document_chunks AS dc
+        JOIN documents AS d ON dc.document_id = d.id
+        WHERE d.organization_id = :organization_id
+        ORDER BY {first_pass}
+        LIMIT :rescore_k
+    ) AS q
+    ORDER BY distance
+    LIMIT :top_k
+    """
+
+
+def sample_queries(db, n: int) -> list[tuple[int, str]]:
+    rows = db.execute(
+        text(
+            """
+            SELECT d.organization_id, dc.embedding::text AS embedding
+            FROM document_chunks AS dc
+            JOIN documents AS d ON dc.document_id = d.id
+            WHERE dc.embedding IS NOT NULL
+            ORDER BY random()
+            LIMIT :n
+            """
+        ),
+        {"n": n},
+    ).fetchall()
+    return [(row.organization_id, row.embedding) for row in rows]
+
+
+def index_size(db, name: str) -> int | None:
+    return db.execute(text("SELECT pg_relation_size(to_regclass(:name))"), {"name": name}).scalar()
+
+
+def ensure_index(name: str, expression: str) -> bool:
+    """
+    Cria o índice se não existir. Retorna True se ele foi criado aqui.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+            return False
+        options = (
+            f"WITH (lists = {settings.IVFFLAT_LISTS})" if settings.VECTOR_INDEX_TYPE == "ivfflat"
+            else f"WITH (m = {settings.HNSW_M}, ef_construction = {settings.HNSW_EF_CONSTRUCTION})"
+        )
+        start = time.perf_counter()
+        connection.execute(text(
+            f"CREATE INDEX {name} ON document_chunks USING {settings.VECTOR_INDEX_TYPE} ({expression}) {options}"
+        ))
+        print(f"  índice {name} criado em {time.perf_counter() - start:.1f} s")
+        return True
+
+
+def drop_index(name: str) -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def run_queries(db, sql, queries, top_k: int, rescore_k: int, setup_sql: list[str]) -> tuple[list[set[int]], list[float]]:
+    results, latencies = [], []
+    for organization_id, embedding in queries:
+        for statement in setup_sql:
+            db.execute(text(statement))
+        start = time.perf_counter()
+        ids = db.execute(sql, {
+            "organization_id": organization_id,
+            "query_embedding": embedding,
+            "top_k": top_k,
+            "rescore_k": rescore_k,
+        }).scalars().all()
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(set(ids))
+        db.rollback()  # Descarta os SET LOCAL
+    return results, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rescore-factors", default="1,2,4,8")
+    parser.add_argument("--variants", default="float32,halfvec,binary")
+    parser.add_argument("--keep", action="store_true", help="mantém os índices criados pelo benchmark")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        queries = sample_queries(db, args.queries)
+        if not queries:
+            print("Nenhum chunk com embedding encontrado.")
+            return
+
+        exact_sql = text(RESCORE_SQL.format(first_pass=VARIANTS["float32"][2]))
+        exact_setup = ["SET LOCAL enable_indexscan = off", "SET LOCAL enable_bitmapscan = off"]
+        reference, _ = run_queries(db, exact_sql, queries, args.top_k, args.top_k, exact_setup)
+
+        index_param = "ivfflat.probes" if settings.VECTOR_INDEX_TYPE == "ivfflat" else "hnsw.ef_search"
+        print(f"{'variante':>10} {'rescore':>8} {'índice (MB)':>12} {'p50 (ms)':>9} {'p95 (ms)':>9} {'recall':>8}")
+        for variant in args.variants.split(","):
+            name, expression, first_pass = VARIANTS[variant]
+            created = ensure_index(name, expression)
+            try:
+                size_mb = (index_size(db, name) or 0) / 1024 / 1024
+                sql = text(RESCORE_SQL.format(first_pass=first_pass))
+                for factor in [int(f) for f in args.rescore_factors.split(",")]:
+                    rescore_k = args.top_k * factor
+                    if index_param == "hnsw.ef_search":
+                        # O HNSW nunca devolve mais que 'ef_search' candidatos
+                        value = max(settings.SEARCH_HNSW_EF_SEARCH, rescore_k)
+                    else:
+                        value = settings.SEARCH_IVFFLAT_PROBES
+                    setup = [f"SET LOCAL {index_param} = {value}"]
+                    results, latencies = run_queries(db, sql, queries, args.top_k, rescore_k, setup)
+                    recall = statistics.mean(len(r & e) / args.top_k for r, e in zip(results, reference))
+                    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+                    print(f"{variant:>10} {factor:>7}x {size_mb:>12.1f} {statistics.median(latencies):>9.2f} "
+                          f"{p95:>9.2f} {recall:>8.3f}")
+            finally:
+                if created and not args.keep:
+                    drop_index(name)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Memória de um worker do Celery (processo principal + processos filhos do
+prefork), lida de /proc/<pid>/smaps_rollup (somente Linux).
+
+RSS conta as páginas compartilhadas em cada processo; PSS divide cada
+página compartilhada entre os processos que a usam, então a soma do PSS
+é a memória realmente ocupada pelo worker. Com WORKER_PRELOAD_MODEL, o
+modelo carregado antes do fork aparece como 'Shared' nos filhos; compare
+com WORKER_PRELOAD_MODEL=false (cada filho carrega a sua cópia).
+
+Processe alguns documentos antes de medir: o copy-on-write só se desfaz
+(ou não) quando os filhos usam o modelo.
+
+Uso:
+    python -m benchmarks.worker_memory --pid $(pgrep -o -f "celery.*-Q embedding")
+"""
+
+import argparse
+import os
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_rollup(pid: int) -> dict[str, int]:
+    """
+    Campos de memória do processo, em KiB.
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in FIELDS:
+                values[name] = int(rest.split()[0])
+    return values
+
+
+def children(pid: int) -> list[int]:
+    path = f"/proc/{pid}/task/{pid}/children"
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [int(child) for child in f.read().split()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pid", type=int, required=True, help="PID do processo principal do worker")
+    args = parser.parse_args()
+
+    processes = [("principal", args.pid)] + [("filho", child) for child in children(args.pid)]
+    totals = dict.fromkeys(FIELDS, 0)
+    print(f"{'processo':>10} {'pid':>8} {'RSS (MiB)':>10} {'PSS (MiB)':>10} {'compart. (MiB)':>15} {'privada (MiB)':>14}")
+    for role, pid in processes:
+        values = read_rollup(pid)
+        for name in FIELDS:
+            totals[name] += values.get(name, 0)
+        shared = values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0)
+        private = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+        print(f"{role:>10} {pid:>8} {values.get('Rss', 0) / 1024:>10.1f} {values.get('Pss', 0) / 1024:>10.1f} "
+              f"{shared / 1024:>15.1f} {private / 1024:>14.1f}")
+
+    print(f"\n{len(processes)} processos: RSS somado {totals['Rss'] / 1024:.1f} MiB, "
+          f"PSS somado (memória real) {totals['Pss'] / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
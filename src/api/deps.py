@@ -1,11 +1,11 @@
 # src/api/deps.py
 
-from typing import Generator
+from typing import AsyncGenerator
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.session import SessionLocal
+from src.db.session import AsyncSessionLocal
 from src.core import security
 from src.models import user as user_model
 from src.services import user_service
@@ -18,32 +18,30 @@ reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl="/api/v1/auth/register" 
 )
 
-def get_db() -> Generator:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependência que gera uma nova sessão de banco de dados (SessionLocal)
-    para cada requisição. Usa um 'yield' para injetar a sessão no endpoint
-    e garante que 'db.close()' seja chamado ao final, mesmo se um erro ocorrer.
+    Dependência que gera uma nova sessão assíncrona de banco de dados
+    (AsyncSessionLocal) para cada requisição. Usa um 'yield' para injetar a
+    sessão no endpoint e o 'async with' garante que ela seja fechada ao final,
+    mesmo se um erro ocorrer.
     """
-    try:
-        db = SessionLocal()
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
+async def get_current_user(
+    db: AsyncSession = Depends(get_db), token: str = Depends(reusable_oauth2)
 ) -> user_model.User:
     """
     Dependência para obter o usuário atual.
     1. Obtém o token string do header 'Authorization'.
-    2. Valida o token com o Firebase Admin.
-    3. Busca o usuário correspondente no nosso banco de dados PostgreSQL.
+    2. Valida o token com o Firebase Admin (ou reaproveita a validação em cache).
+    3. Busca o usuário correspondente no nosso banco de dados PostgreSQL (com cache curto).
     4. Levanta um erro 404 se o usuário não estiver registrado no nosso banco.
     """
-    decoded_token = security.validate_firebase_token(token)
+    decoded_token = await security.validate_firebase_token_async(token)
     firebase_uid = decoded_token.get("uid")
     
-    user = user_service.get_user_by_firebase_uid(db, firebase_uid=firebase_uid)
+    user = await user_service.get_user_by_firebase_uid_cached(db, firebase_uid=firebase_uid)
     
     if not user:
         raise HTTPException(
@@ -52,7 +50,7 @@ def get_current_user(
         )
     return user
 
-def get_current_admin_user(
+async def get_current_admin_user(
     current_user: user_model.User = Depends(get_current_user),
 ) -> user_model.User:
     """
@@ -67,7 +65,7 @@ def get_current_admin_user(
         )
     return current_user
 
-def get_current_editor_user(
+async def get_current_editor_user(
     current_user: user_model.User = Depends(get_current_user),
 ) -> user_model.User:
     """
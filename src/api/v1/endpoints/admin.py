@@ -0,0 +1,83 @@
+# src/api/v1/endpoints/admin.py
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api import deps
+from src.core import metrics
+from src.models.organization import Organization
+from src.models.user import User
+from src.schemas.organization import VectorIndexUpdate
+from src.services import embedding_migration, search_service
+from src.tasks.celery_app import celery_app
+
+router = APIRouter()
+
+
+@router.get("/embedding-migration")
+async def read_embedding_migration(
+    db: AsyncSession = Depends(deps.get_db),
+    admin_user: User = Depends(deps.get_current_admin_user)
+):
+    """
+    (Rota Protegida - Admin)
+    Progresso da migração de modelo de embedding da organização do administrador.
+    """
+    if not embedding_migration.migration_configured():
+        return {"target_model": None, "detail": "Nenhuma migração de modelo configurada."}
+    return await embedding_migration.get_migration_progress(db, admin_user.organization_id)
+
+
+@router.post("/embedding-migration", status_code=status.HTTP_202_ACCEPTED)
+async def start_embedding_migration(
+    admin_user: User = Depends(deps.get_current_admin_user)
+):
+    """
+    (Rota Protegida - Admin)
+    Inicia (ou retoma) o backfill dos vetores do modelo de destino para a
+    organização. A busca da organização troca de modelo sozinha ao final.
+    """
+    if not embedding_migration.migration_configured():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Configure EMBEDDING_NEXT_MODEL_NAME e EMBEDDING_NEXT_DIMENSION antes de migrar."
+        )
+    celery_app.send_task("backfill_embeddings_task", args=[admin_user.organization_id])
+    return {"organization_id": admin_user.organization_id, "status": "backfill enfileirado"}
+
+
+@router.put("/vector-index", status_code=status.HTTP_202_ACCEPTED)
+async def update_vector_index(
+    index_in: VectorIndexUpdate,
+    db: AsyncSession = Depends(deps.get_db),
+    admin_user: User = Depends(deps.get_current_admin_user)
+):
+    """
+    (Rota Protegida - Admin)
+    Troca o backend da busca vetorial da organização. Ao ativar o índice
+    local, ele é construído em segundo plano; até lá a busca usa o pgvector.
+    """
+    await db.execute(
+        update(Organization)
+        .where(Organization.id == admin_user.organization_id)
+        .values(vector_index=index_in.backend)
+    )
+    await db.commit()
+    search_service.invalidate_cached_vector_index(admin_user.organization_id)
+    if index_in.backend == "local":
+        celery_app.send_task("rebuild_local_index_task", args=[admin_user.organization_id])
+    return {"organization_id": admin_user.organization_id, "vector_index": index_in.backend}
+
+
+@router.get("/traces")
+async def read_recent_traces(
+    limit: int = 50,
+    admin_user: User = Depends(deps.get_current_admin_user)
+):
+    """
+    (Rota Protegida - Admin)
+    Últimos traces (árvores de spans com a duração de cada etapa) das
+    requisições atendidas por esta réplica da API, do mais recente ao mais antigo.
+    """
+    return list(reversed(metrics.recent_traces))[:limit]
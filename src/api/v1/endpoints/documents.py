@@ -1,6 +1,6 @@
 from typing import List
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api import deps
 from src.models.user import User
@@ -11,15 +11,16 @@ from src.services import document_service
 router = APIRouter()
 
 @router.post("/upload", response_model=doc_schema.DocumentRead)
-def upload_document(
+async def upload_document(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
     file: UploadFile = File(...)
 ):
     """
     Endpoint para fazer o upload de um novo documento.
     Salva o arquivo e cria o registro no banco.
+    A cópia do arquivo (em blocos) roda no threadpool e não bloqueia o event loop.
     """
     if not current_user.organization_id:
         raise HTTPException(
@@ -28,7 +29,7 @@ def upload_document(
         )
     
     # Cria o documento no banco de dados
-    document = document_service.create_document(db=db, upload_file=file, current_user=current_user)
+    document = await document_service.create_document(db=db, upload_file=file, current_user=current_user)
     
     # Dispara a tarefa em background para processamento de IA (OCR, embeddings)
     # process_document_task.delay(document_id=document.id)
@@ -37,14 +38,21 @@ def upload_document(
 
 
 @router.get("/", response_model=List[doc_schema.DocumentRead])
-def list_documents(
-    db: Session = Depends(deps.get_db),
+async def list_documents(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
     skip: int = 0,
-    limit: int = 100
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = None,
+    status_filter: str | None = Query(default=None, alias="status"),
+    category: str | None = None
 ):
     """
     Endpoint para listar todos os documentos da organização do usuário logado.
+    Paginação recomendada: envie o valor do header 'X-Next-Cursor' da resposta
+    anterior no parâmetro 'cursor'. 'skip' continua aceito por compatibilidade.
+    Filtros opcionais: 'status' e 'category'.
     """
     if not current_user.organization_id:
         raise HTTPException(
@@ -52,7 +60,21 @@ def list_documents(
             detail="Usuário não está associado a uma organização."
         )
         
-    documents = document_service.get_documents_by_organization(
-        db, organization_id=current_user.organization_id, skip=skip, limit=limit
-    )
+    try:
+        documents = await document_service.get_documents_by_organization(
+            db,
+            organization_id=current_user.organization_id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            status=status_filter,
+            category=category
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Página cheia: pode haver mais itens depois do último
+    if len(documents) == limit:
+        last = documents[-1]
+        response.headers["X-Next-Cursor"] = document_service.encode_cursor(last.created_at, last.id)
     return documents
\ No newline at end of file
@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api import deps
+from src.core.config import settings
 from src.models.user import User
-from src.schemas.search import SearchQuery, SearchResponse
+from src.schemas.search import QAQuery, QAResponse, SearchQuery, SearchResponse
 from src.services import search_service
+from src.services.answer_cache import answer_cache
+from src.services.embedding_cache import query_embedding_cache
+from src.services.reranker import reranker
 
 router = APIRouter()
 
 @router.post("/", response_model=SearchResponse)
-def search_documents(
+async def search_documents(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
     search_query: SearchQuery
 ):
@@ -26,11 +33,119 @@ def search_documents(
             detail="Usuário não está associado a uma organização."
         )
 
-    results = search_service.semantic_search(
+    # Com rerank, busca mais candidatos e deixa o cross-encoder escolher os top_k
+    fetch_k = search_query.top_k
+    if search_query.rerank:
+        fetch_k = max(search_query.rerank_candidates or settings.RERANK_CANDIDATES, search_query.top_k)
+
+    results = await search_service.semantic_search(
         db=db,
         query=search_query.query,
         organization_id=current_user.organization_id,
-        top_k=search_query.top_k
+        top_k=fetch_k,
+        ef_search=search_query.ef_search,
+        probes=search_query.probes,
+        mode=search_query.mode,
+        candidate_k=search_query.candidate_k
+    )
+
+    if not search_query.rerank:
+        return SearchResponse(results=results)
+
+    results, rerank_ms, reranked = await reranker.rerank(
+        search_query.query, results, top_k=search_query.top_k, timeout_ms=settings.RERANK_TIMEOUT_MS
+    )
+    return SearchResponse(results=results, reranked=reranked, rerank_ms=round(rerank_ms, 1))
+
+
+@router.post("/ask", response_model=QAResponse)
+async def ask_question(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+    qa_query: QAQuery
+):
+    """
+    Responde uma pergunta com base nos documentos da organização (RAG).
+    """
+    if not current_user.organization_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Usuário não está associado a uma organização."
+        )
+
+    return await search_service.answer_question(
+        db, query=qa_query.query, organization_id=current_user.organization_id, mode=qa_query.mode
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/ask/stream")
+async def ask_question_stream(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+    qa_query: QAQuery
+):
+    """
+    Versão em streaming de '/ask' via Server-Sent Events.
+    Envia primeiro as fontes ('sources'), depois os tokens do LLM ('token')
+    à medida que chegam e, por fim, 'done' com TTFT e tempo total.
+    Se o cliente desconectar, a chamada ao LLM é interrompida.
+    """
+    if not current_user.organization_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Usuário não está associado a uma organização."
+        )
+
+    cached, cache_key = await search_service.lookup_cached_answer(
+        db, qa_query.query, current_user.organization_id, mode=qa_query.mode
+    )
+    if cached is not None:
+        events = search_service.stream_cached_answer(cached)
+    else:
+        # A busca (única etapa que usa o banco) termina antes do streaming começar
+        context_chunks = await search_service.retrieve_context(
+            db, qa_query.query, current_user.organization_id, mode=qa_query.mode
+        )
+        events = search_service.stream_answer(qa_query.query, context_chunks, cache_key)
+
+    async def event_stream():
+        try:
+            async for event, data in events:
+                if await request.is_disconnected():
+                    print("[QA] Cliente desconectou; interrompendo a geração.")
+                    break
+                yield _sse(event, data)
+        finally:
+            # Fecha o gerador (e o stream do LLM) também em caso de cancelamento
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    
-    return SearchResponse(results=results)
\ No newline at end of file
+
+
+@router.get("/cache-stats")
+async def read_cache_stats(
+    admin_user: User = Depends(deps.get_current_admin_user)
+):
+    """
+    (Rota Protegida - Admin)
+    Retorna os contadores do cache de embeddings de consultas, do micro-batching,
+    do cache semântico de respostas (taxa de acerto e latência de LLM economizada)
+    e do rerank (chamadas, estouros de orçamento e tempo médio).
+    """
+    return {
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "query_microbatch": search_service.query_encoder.stats(),
+        "answer_cache": answer_cache.stats(),
+        "reranker": reranker.stats(),
+    }
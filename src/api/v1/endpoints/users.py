@@ -1,7 +1,7 @@
 # src/api/v1/endpoints/users.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 # Importações do nosso projeto
@@ -16,7 +16,7 @@ router = APIRouter()
 
 
 @router.get("/me", response_model=user_schema.UserRead)
-def read_user_me(
+async def read_user_me(
     current_user: user_model.User = Depends(deps.get_current_user),
 ):
     """
@@ -26,8 +26,8 @@ def read_user_me(
 
 
 @router.get("/", response_model=List[user_schema.UserRead])
-def list_users_in_organization(
-    db: Session = Depends(deps.get_db),
+async def list_users_in_organization(
+    db: AsyncSession = Depends(deps.get_db),
     # Esta dependência garante que só um admin pode chamar este endpoint.
     admin_user: user_model.User = Depends(deps.get_current_admin_user)
 ):
@@ -35,7 +35,7 @@ def list_users_in_organization(
     (Rota Protegida - Admin) 
     Lista todos os usuários na organização do administrador que está fazendo a requisição.
     """
-    users = user_service.get_users_by_organization(
+    users = await user_service.get_users_by_organization(
         db, organization_id=admin_user.organization_id
     )
     return users
@@ -43,10 +43,10 @@ def list_users_in_organization(
 
 # --- NOVO ENDPOINT ---
 @router.patch("/{user_id}/role", response_model=user_schema.UserRead)
-def update_user_role(
+async def update_user_role(
     user_id: int,  # O ID do usuário que queremos modificar
     role_update: user_schema.UserRoleUpdate, # O corpo da requisição com a nova role
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     admin_user: user_model.User = Depends(deps.get_current_admin_user)
 ):
     """
@@ -55,7 +55,7 @@ def update_user_role(
     """
     
     # 1. Busca o usuário que será modificado
-    user_to_update = user_service.get_user_by_id(db, user_id=user_id)
+    user_to_update = await user_service.get_user_by_id(db, user_id=user_id)
 
     # 2. Verifica se o usuário existe
     if not user_to_update:
@@ -79,7 +79,7 @@ def update_user_role(
         )
 
     # 5. Se tudo estiver ok, atualiza o papel
-    updated_user = user_service.update_user_role(
+    updated_user = await user_service.update_user_role(
         db=db, db_user=user_to_update, new_role=role_update.role
     )
     
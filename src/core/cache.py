@@ -0,0 +1,78 @@
+# src/core/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Hashable
+
+import redis
+
+from src.core.config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache LRU em memória, limitado em tamanho e com expiração por entrada.
+    Seguro para uso entre as threads do threadpool do FastAPI.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """
+        Guarda um valor. 'ttl' (em segundos) sobrescreve o TTL padrão do cache.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+            return item[1] if item else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+@lru_cache
+def get_redis() -> redis.Redis:
+    """
+    Cliente Redis compartilhado (o mesmo Redis usado como broker do Celery).
+    """
+    return redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, socket_timeout=0.5)
@@ -6,6 +6,12 @@ class Settings(BaseSettings):
     """
     # Variáveis do Banco de Dados
     DATABASE_URL: str
+    # Pool de conexões da engine assíncrona (API)
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    # Tamanho do cache de prepared statements do asyncpg (0 = desligado, ex: com PgBouncer)
+    DB_STATEMENT_CACHE_SIZE: int = 100
 
     # Variáveis do Redis
     REDIS_HOST: str
@@ -14,9 +20,192 @@ class Settings(BaseSettings):
     # Variáveis do Firebase
     FIREBASE_PROJECT_ID: str
 
+    # Variáveis do Cache de Autenticação
+    # Tokens já verificados ficam em cache até o seu 'exp'
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    # Dados do usuário (id, role, organização) ficam em cache por pouco tempo
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30
+
     # Variáveis do Modelo de IA
     GROQ_API_KEY: str
 
+    # Variáveis do Modelo de Embedding
+    EMBEDDING_MODEL_NAME: str = "paraphrase-multilingual-MiniLM-L12-v2"
+    # Backend de execução: "torch" (FP32), "torch-int8" ou "onnx"
+    EMBEDDING_BACKEND: str = "torch"
+    # Arquivo ONNX usado pelo backend "onnx" (variante int8 publicada com o modelo)
+    EMBEDDING_ONNX_FILE_NAME: str = "onnx/model_quint8_avx2.onnx"
+    # Similaridade de cosseno mínima exigida em relação ao modelo FP32
+    EMBEDDING_PARITY_MIN_COSINE: float = 0.98
+
+    # Migração de Modelo de Embedding (sem downtime)
+    # Modelo de destino, gravado em 'document_chunks.next_embedding'. None = nenhuma migração em andamento
+    EMBEDDING_NEXT_MODEL_NAME: str | None = None
+    EMBEDDING_NEXT_BACKEND: str = "torch"
+    # Dimensão dos vetores do modelo de destino (usada no índice ANN e nas consultas)
+    EMBEDDING_NEXT_DIMENSION: int | None = None
+    # Backfill: chunks por lote, lotes por execução da tarefa e pausa entre execuções
+    EMBEDDING_BACKFILL_BATCH_SIZE: int = 256
+    EMBEDDING_BACKFILL_BATCHES_PER_RUN: int = 20
+    EMBEDDING_BACKFILL_PAUSE_SECONDS: float = 5.0
+    # Por quanto tempo a API guarda em memória o modelo de busca de cada organização
+    EMBEDDING_ORG_MODEL_CACHE_TTL_SECONDS: int = 30
+
+    # Variáveis do Upload de Arquivos
+    # Raiz do storage local; os arquivos ficam em <raiz>/ab/cd/<sha256><ext>
+    UPLOAD_ROOT: str = "./uploads"
+    UPLOAD_MAX_BYTES: int = 1024 * 1024 * 1024  # 1 GiB
+    # Tamanho de cada bloco lido/escrito durante o upload
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1 MiB
+
+    # Variáveis da Ingestão de Documentos
+    # Quantos chunks são acumulados antes de gerar os embeddings e salvar no banco
+    INGESTION_BATCH_SIZE: int = 32
+    # Tamanho do lote interno usado pelo 'encode' do modelo de embedding
+    EMBEDDING_BATCH_SIZE: int = 32
+    # Janela deslizante do chunker, em tokens do modelo de embedding.
+    # O MiniLM aceita 128 tokens, incluindo os tokens especiais [CLS] e [SEP].
+    CHUNK_MAX_TOKENS: int = 120
+    CHUNK_OVERLAP_TOKENS: int = 24
+    # Documentos a partir deste número de páginas têm a extração paralelizada
+    PARALLEL_EXTRACTION_MIN_PAGES: int = 200
+    # Em quantos intervalos de páginas (subtarefas do Celery) a extração é dividida
+    EXTRACTION_PARALLELISM: int = 4
+    # Onde cada intervalo extraído guarda o texto até a conclusão do documento
+    # (fora do broker; precisa ser visível para os workers de extração e de embeddings)
+    EXTRACTION_SPOOL_ROOT: str = "./uploads/extracted"
+    # Páginas processadas por execução de 'embed_extracted_pages_task'; o restante volta
+    # para o fim da fila, para documentos pequenos não esperarem pelos grandes (0 = sem limite)
+    EMBEDDING_TASK_MAX_PAGES: int = 50
+    # Como os chunks são gravados: "copy" (COPY do PostgreSQL) ou "orm" (bulk_save_objects)
+    INGESTION_WRITER: str = "copy"
+    # Usa o formato binário do COPY (senão, CSV)
+    INGESTION_COPY_BINARY: bool = True
+    # Novas tentativas (com backoff exponencial) após erros transitórios de banco/Redis
+    INGESTION_MAX_RETRIES: int = 5
+    INGESTION_RETRY_BACKOFF_MAX_SECONDS: int = 600
+    # Limite de tempo de cada execução de uma tarefa da ingestão (uma fatia de
+    # embeddings, por exemplo); a trava do documento no Redis expira logo depois
+    INGESTION_TASK_TIME_LIMIT_SECONDS: int = 3600
+    # Espera antes de tentar de novo quando outra execução está com o documento
+    DOCUMENT_LOCK_RETRY_SECONDS: int = 30
+    # Quanto a tarefa espera pela trava antes de voltar para a fila (cobre a
+    # passagem de uma etapa para a seguinte, disparada antes de a trava ser solta)
+    DOCUMENT_LOCK_WAIT_SECONDS: int = 5
+
+    # Variáveis do Índice Vetorial (pgvector)
+    # Tipo do índice ANN em document_chunks.embedding: "hnsw" ou "ivfflat"
+    VECTOR_INDEX_TYPE: str = "hnsw"
+    # Parâmetros de construção (lidos pela migração do Alembic)
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 64
+    IVFFLAT_LISTS: int = 100
+    # Parâmetros de busca padrão (podem ser sobrescritos por consulta)
+    SEARCH_HNSW_EF_SEARCH: int = 40
+    SEARCH_IVFFLAT_PROBES: int = 10
+    # O filtro por organização vem depois da varredura do índice ANN (compartilhado
+    # por todas as organizações): com menos de top_k resultados, refaz a busca exata
+    SEARCH_EXACT_FALLBACK: bool = True
+    # Quantização do índice ANN (pgvector >= 0.7): "none", "halfvec" (índice 2x menor)
+    # ou "binary" (32x menor). O índice é uma expressão sobre 'embedding', que
+    # continua em float32 para reordenar os candidatos pela distância exata.
+    VECTOR_QUANTIZATION: str = "none"
+    # A API não sobe se o índice do banco não corresponder a VECTOR_QUANTIZATION
+    # (a migração usa o valor do momento do 'alembic upgrade')
+    VECTOR_INDEX_STARTUP_CHECK: bool = True
+    # Candidatos da primeira passada (quantizada) por resultado pedido
+    SEARCH_RESCORE_FACTOR: int = 4
+
+    # Variáveis da Busca Híbrida (full-text + vetorial)
+    # Candidatos trazidos por cada perna antes da fusão (pode ser sobrescrito por consulta)
+    SEARCH_HYBRID_CANDIDATES: int = 50
+    # Constante 'k' do Reciprocal Rank Fusion
+    SEARCH_RRF_K: int = 60
+
+    # Variáveis do Cache de Embeddings de Consultas
+    QUERY_EMBEDDING_CACHE_SIZE: int = 4096
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: int = 3600
+    # Habilita o segundo nível do cache no Redis, compartilhado entre réplicas
+    QUERY_EMBEDDING_CACHE_REDIS: bool = False
+
+    # Variáveis do Micro-batching de Consultas
+    # Agrupa consultas concorrentes em um único 'encode'
+    QUERY_MICROBATCH_ENABLED: bool = True
+    QUERY_MICROBATCH_MAX_SIZE: int = 32
+    # Tempo máximo que uma consulta espera por outras para formar o lote
+    QUERY_MICROBATCH_MAX_WAIT_MS: float = 5.0
+
+    # Variáveis do LLM (geração das respostas do RAG)
+    # Modelo no formato do litellm; "fake" usa um LLM local que apenas ecoa o contexto
+    LLM_MODEL: str = "groq/mixtral-8x7b-32768"
+    LLM_TEMPERATURE: float = 0.1
+    # Intervalo entre os tokens emitidos pelo LLM "fake"
+    FAKE_LLM_TOKEN_DELAY_MS: float = 30.0
+
+    # Variáveis do Cache Semântico de Respostas (RAG)
+    ANSWER_CACHE_ENABLED: bool = True
+    # Similaridade de cosseno mínima entre as perguntas para reaproveitar a resposta
+    ANSWER_CACHE_MIN_SIMILARITY: float = 0.95
+    # Respostas guardadas por organização (as mais antigas saem primeiro)
+    ANSWER_CACHE_MAX_ENTRIES: int = 256
+    ANSWER_CACHE_TTL_SECONDS: int = 24 * 3600
+
+    # Variáveis da Montagem do Contexto do RAG
+    # Candidatos trazidos da busca antes da seleção por MMR
+    RAG_CANDIDATES: int = 20
+    # Peso da relevância no MMR (1.0 = só relevância, 0.0 = só diversidade)
+    RAG_MMR_LAMBDA: float = 0.7
+    # Candidatos com similaridade de cosseno acima disto com um já escolhido são descartados
+    RAG_NEAR_DUPLICATE_SIMILARITY: float = 0.95
+    # Tamanho máximo do contexto enviado ao LLM, em tokens do LLM
+    RAG_CONTEXT_TOKEN_BUDGET: int = 1500
+
+    # Variáveis do Rerank (cross-encoder, opcional por consulta)
+    # Modelo multilíngue (inclui português)
+    RERANK_MODEL_NAME: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    RERANK_MAX_LENGTH: int = 256
+    # Candidatos reordenados quando a consulta não informa 'rerank_candidates'
+    RERANK_CANDIDATES: int = 20
+    # Orçamento por requisição; se estourar, a ordem do bi-encoder é mantida
+    RERANK_TIMEOUT_MS: float = 300.0
+    # Carrega (e aquece) o cross-encoder na subida da API, fora do orçamento acima;
+    # desligado, o modelo é carregado na primeira consulta com rerank
+    RERANK_PRELOAD: bool = True
+    # Pontuações em andamento no threadpool, contando as que já estouraram o
+    # orçamento e continuam rodando; acima disso o rerank é pulado
+    RERANK_MAX_IN_FLIGHT: int = 2
+
+    # Variáveis do Índice Vetorial Local (NumPy + memmap, por organização)
+    # Backend das organizações sem escolha própria: "pgvector" ou "local"
+    VECTOR_INDEX_BACKEND: str = "pgvector"
+    # Os arquivos ficam em <raiz>/<organização>/<modelo>/. A API e todos os workers
+    # precisam enxergar o mesmo diretório (no docker-compose, o volume 'vector_index'),
+    # e as travas de escrita (fcntl) só funcionam entre processos do mesmo host:
+    # o backend "local" não serve para API e workers em máquinas diferentes
+    LOCAL_INDEX_ROOT: str = "./vector_index"
+    # "float32", "float16" (metade da memória e do disco) ou "int8" (um quarto)
+    LOCAL_INDEX_DTYPE: str = "float32"
+    # A partir de quantos vetores o índice local passa a usar partições IVF
+    LOCAL_INDEX_IVF_MIN_VECTORS: int = 50000
+    LOCAL_INDEX_IVF_LISTS: int = 256
+    # Partições lidas por consulta (pode ser sobrescrito por 'probes' na consulta)
+    LOCAL_INDEX_IVF_PROBES: int = 8
+
+    # Variáveis de Métricas (Prometheus) e Tracing
+    METRICS_ENABLED: bool = True
+    # Traces (árvores de spans das requisições) mantidos em memória para exportação
+    TRACE_BUFFER_SIZE: int = 200
+    # Porta do servidor de métricas dos workers do Celery (0 = desligado)
+    METRICS_WORKER_PORT: int = 9100
+
+    # Variáveis dos Workers do Celery
+    # Carrega o modelo de embedding no processo principal do worker, antes do fork:
+    # os processos filhos compartilham as páginas de memória do modelo (copy-on-write)
+    WORKER_PRELOAD_MODEL: bool = True
+    # Threads do PyTorch por processo filho (0 = núcleos da máquina / concurrency do worker)
+    WORKER_TORCH_THREADS: int = 0
+
     class Config:
         # Informa ao Pydantic para ler as variáveis de um arquivo .env
         env_file = ".env"
@@ -0,0 +1,198 @@
+# src/core/metrics.py
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+from src.core.config import settings
+
+# Métricas em formato Prometheus. Com vários processos (workers do uvicorn
+# ou processos filhos do Celery), defina PROMETHEUS_MULTIPROC_DIR para que
+# a exportação some os valores de todos eles.
+
+# Faixas em segundos: de 1 ms (cache, encode em lote) até 30 s (LLM, páginas grandes)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_LATENCY = Histogram(
+    "intellidocs_request_latency_seconds",
+    "Latência das requisições HTTP por rota (até o envio dos cabeçalhos)",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "intellidocs_stage_latency_seconds",
+    "Duração de cada etapa (span) do caminho quente: query_encode, search_sql, llm...",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+INGESTION_PAGES_PER_SECOND = Histogram(
+    "intellidocs_ingestion_pages_per_second",
+    "Vazão de páginas por execução de ingestão",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+INGESTION_CHUNKS_PER_SECOND = Histogram(
+    "intellidocs_ingestion_chunks_per_second",
+    "Vazão de chunks por execução de ingestão",
+    buckets=(5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+INGESTED_PAGES = Counter("intellidocs_ingested_pages", "Páginas ingeridas")
+INGESTED_CHUNKS = Counter("intellidocs_ingested_chunks", "Chunks ingeridos")
+SEARCH_EXACT_FALLBACKS = Counter(
+    "intellidocs_search_exact_fallbacks",
+    "Buscas refeitas sem o índice ANN por trazerem menos que top_k resultados",
+)
+CELERY_QUEUE_WAIT = Histogram(
+    "intellidocs_celery_queue_wait_seconds",
+    "Tempo entre a publicação de uma tarefa e o início da execução",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+)
+
+
+# --- Tracing (spans aninhados) ---
+
+class Span:
+    """
+    Uma etapa cronometrada; os spans abertos dentro dela viram filhos.
+    """
+
+    __slots__ = ("name", "started_at", "duration_ms", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.time()
+        self.duration_ms: float | None = None
+        self.children: list["Span"] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "duration_ms": round(self.duration_ms or 0.0, 3),
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+_current_span: ContextVar[Span | None] = ContextVar("intellidocs_current_span", default=None)
+
+# Últimos traces completos deste processo, para exportação
+recent_traces: deque[dict] = deque(maxlen=settings.TRACE_BUFFER_SIZE)
+
+
+@contextmanager
+def span(name: str):
+    """
+    Cronometra um bloco: registra a duração no histograma da etapa e, se
+    houver um trace ativo (ver 'trace'), acrescenta o span à árvore.
+    O contexto é propagado pelo asyncio e pelo 'run_in_threadpool'.
+    """
+    parent = _current_span.get()
+    current = Span(name)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        elapsed = time.perf_counter() - start
+        current.duration_ms = elapsed * 1000
+        _current_span.reset(token)
+        if parent is not None:
+            parent.children.append(current)
+        if settings.METRICS_ENABLED:
+            STAGE_LATENCY.labels(stage=name).observe(elapsed)
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    """
+    Registra uma duração medida fora de um bloco 'with' (ex: tempo até o
+    primeiro token de um streaming), também como span do trace ativo.
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        child = Span(name)
+        child.started_at = time.time() - seconds
+        child.duration_ms = seconds * 1000
+        parent.children.append(child)
+    if settings.METRICS_ENABLED:
+        STAGE_LATENCY.labels(stage=name).observe(seconds)
+
+
+@contextmanager
+def trace(name: str):
+    """
+    Abre o span raiz de uma requisição. Ao final, a árvore completa vai
+    para 'recent_traces'.
+    """
+    root = Span(name)
+    token = _current_span.set(root)
+    start = time.perf_counter()
+    try:
+        yield root
+    finally:
+        root.duration_ms = (time.perf_counter() - start) * 1000
+        _current_span.reset(token)
+        recent_traces.append(root.to_dict())
+
+
+def server_timing(root: Span) -> str:
+    """
+    Cabeçalho Server-Timing com as etapas de primeiro nível (visível nas
+    ferramentas de desenvolvedor do navegador).
+    """
+    return ", ".join(
+        f"{child.name.replace('.', '_')};dur={child.duration_ms or 0.0:.1f}" for child in root.children
+    )
+
+
+# --- Exportação ---
+
+def _registry() -> CollectorRegistry | None:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return None
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_latest() -> tuple[bytes, str]:
+    registry = _registry()
+    payload = generate_latest(registry) if registry is not None else generate_latest()
+    return payload, CONTENT_TYPE_LATEST
+
+
+_worker_server_lock = threading.Lock()
+_worker_server_started = False
+
+
+def start_worker_metrics_server() -> None:
+    """
+    Servidor HTTP de métricas dos workers do Celery (porta METRICS_WORKER_PORT),
+    iniciado uma vez no processo principal do worker.
+    """
+    global _worker_server_started
+    if not settings.METRICS_ENABLED or not settings.METRICS_WORKER_PORT:
+        return
+    with _worker_server_lock:
+        if _worker_server_started:
+            return
+        registry = _registry()
+        if registry is not None:
+            start_http_server(settings.METRICS_WORKER_PORT, registry=registry)
+        else:
+            start_http_server(settings.METRICS_WORKER_PORT)
+        _worker_server_started = True
+    print(f"[MÉTRICAS] Servidor de métricas do worker na porta {settings.METRICS_WORKER_PORT}.")
@@ -1,7 +1,12 @@
+import hashlib
+import time
+
 import firebase_admin
 from firebase_admin import credentials, auth
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 
+from src.core.cache import TTLCache
 from src.core.config import settings
 
 # Inicializa o Firebase Admin SDK
@@ -18,9 +23,22 @@ except Exception:
         firebase_admin.initialize_app()
 
 
+# Tokens decodificados, indexados pelo hash do token (o token em si não é guardado).
+# Cada entrada expira junto com o 'exp' do próprio token.
+_token_cache = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=0)
+
+
 def validate_firebase_token(token: str) -> dict:
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    decoded_token = _token_cache.get(token_hash)
+    if decoded_token is not None:
+        return decoded_token
+
     try:
         decoded_token = auth.verify_id_token(token)
+        ttl = decoded_token.get("exp", 0) - time.time()
+        if ttl > 0:
+            _token_cache.set(token_hash, decoded_token, ttl=ttl)
         return decoded_token
     except auth.ExpiredIdTokenError:
         raise HTTPException(
@@ -33,4 +51,16 @@ def validate_firebase_token(token: str) -> dict:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid token: {e}",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+
+async def validate_firebase_token_async(token: str) -> dict:
+    """
+    Versão para endpoints assíncronos: o acerto no cache é resolvido direto
+    no event loop; só a verificação criptográfica (e a eventual busca das
+    chaves públicas do Google) vai para o threadpool.
+    """
+    decoded_token = _token_cache.get(hashlib.sha256(token.encode()).hexdigest())
+    if decoded_token is not None:
+        return decoded_token
+    return await run_in_threadpool(validate_firebase_token, token)
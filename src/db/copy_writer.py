@@ -0,0 +1,129 @@
+# src/db/copy_writer.py
+
+import csv
+import io
+import struct
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+# Colunas gravadas pelo COPY, na ordem em que aparecem em cada linha.
+# 'content_tsv' é gerada pelo próprio Postgres e 'id' vem da sequence.
+CHUNK_COLUMNS = (
+    "document_id",
+    "content",
+    "content_hash",
+    "page_number",
+    "char_start",
+    "char_end",
+    "embedding",
+    "embedding_model",
+    "next_embedding",
+    "next_embedding_model",
+)
+
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_PGCOPY_TRAILER = struct.pack("!h", -1)
+_NULL = struct.pack("!i", -1)
+
+
+def _binary_int(value: int | None) -> bytes:
+    if value is None:
+        return _NULL
+    return struct.pack("!ii", 4, value)
+
+
+def _binary_text(value: str | None) -> bytes:
+    if value is None:
+        return _NULL
+    data = value.encode("utf-8")
+    return struct.pack("!i", len(data)) + data
+
+
+def _binary_vector(value) -> bytes:
+    # Formato binário do pgvector: int16 dimensões, int16 reservado, float4[] big-endian
+    if value is None:
+        return _NULL
+    vector = np.asarray(value, dtype=">f4")
+    data = struct.pack("!hh", len(vector), 0) + vector.tobytes()
+    return struct.pack("!i", len(data)) + data
+
+
+def encode_binary_rows(chunks: Iterable) -> bytes:
+    """
+    Serializa os chunks no formato binário do COPY do PostgreSQL.
+    Evita a conversão dos 384 floats de cada embedding para texto (e de volta).
+    """
+    buffer = io.BytesIO()
+    buffer.write(_PGCOPY_HEADER)
+    field_count = struct.pack("!h", len(CHUNK_COLUMNS))
+    for chunk in chunks:
+        buffer.write(field_count)
+        buffer.write(_binary_int(chunk.document_id))
+        buffer.write(_binary_text(chunk.content))
+        buffer.write(_binary_text(chunk.content_hash))
+        buffer.write(_binary_int(chunk.page_number))
+        buffer.write(_binary_int(chunk.char_start))
+        buffer.write(_binary_int(chunk.char_end))
+        buffer.write(_binary_vector(chunk.embedding))
+        buffer.write(_binary_text(chunk.embedding_model))
+        buffer.write(_binary_vector(chunk.next_embedding))
+        buffer.write(_binary_text(chunk.next_embedding_model))
+    buffer.write(_PGCOPY_TRAILER)
+    return buffer.getvalue()
+
+
+def _csv_vector(value) -> str | None:
+    if value is None:
+        return None
+    return "[" + ",".join(repr(float(x)) for x in value) + "]"
+
+
+def encode_csv_rows(chunks: Iterable) -> str:
+    """
+    Serializa os chunks em CSV (formato de texto do COPY), usado quando o
+    formato binário não está disponível (ex: proxies que não suportam COPY binário).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for chunk in chunks:
+        writer.writerow([
+            chunk.document_id,
+            chunk.content,
+            chunk.content_hash,
+            chunk.page_number,
+            chunk.char_start,
+            chunk.char_end,
+            _csv_vector(chunk.embedding),
+            chunk.embedding_model,
+            _csv_vector(chunk.next_embedding),
+            chunk.next_embedding_model,
+        ])
+    return buffer.getvalue()
+
+
+def copy_document_chunks(db: Session, chunks: list, binary: bool = True) -> int:
+    """
+    Insere os chunks em 'document_chunks' com COPY, dentro da transação atual
+    da sessão (o commit continua sendo responsabilidade de quem chama).
+    Aceita qualquer objeto com os atributos de CHUNK_COLUMNS (ex: DocumentChunk).
+    Retorna quantas linhas foram gravadas.
+    """
+    if not chunks:
+        return 0
+
+    columns = ", ".join(CHUNK_COLUMNS)
+    if binary:
+        sql = f"COPY document_chunks ({columns}) FROM STDIN WITH (FORMAT binary)"
+        payload = io.BytesIO(encode_binary_rows(chunks))
+    else:
+        # Em CSV, campo vazio sem aspas é NULL
+        sql = f"COPY document_chunks ({columns}) FROM STDIN WITH (FORMAT csv)"
+        payload = io.StringIO(encode_csv_rows(chunks))
+
+    # Conexão DBAPI (psycopg2) da transação em andamento na sessão
+    dbapi_connection = db.connection().connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(sql, payload)
+    return len(chunks)
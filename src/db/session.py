@@ -1,10 +1,40 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.core.config import settings
 
 # Cria a "engine" de conexão com o banco de dados usando a URL do .env
+# (síncrona: usada pelo worker do Celery, pelo Alembic e pelos benchmarks)
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 
 # Cria uma fábrica de sessões configurada
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _async_database_url(url: str):
+    """
+    Converte a DATABASE_URL (postgresql:// ou postgresql+psycopg2://) para o driver asyncpg.
+    """
+    return make_url(url).set(drivername="postgresql+asyncpg").update_query_dict(
+        {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+    )
+
+
+# Engine assíncrona (asyncpg), usada pelos endpoints da API.
+# Cada requisição em espera no banco não ocupa mais uma thread do threadpool,
+# então a concorrência passa a ser limitada pelo pool de conexões.
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    # Cache de prepared statements do próprio asyncpg (0 desliga; necessário com PgBouncer em modo transaction)
+    connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+)
+
+# 'expire_on_commit=False': os objetos continuam legíveis após o commit
+# sem disparar novas consultas (que exigiriam 'await').
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
\ No newline at end of file
@@ -1,11 +1,34 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
 # 1. Importe o novo módulo
-from src.api.v1.endpoints import auth, users, documents, search 
+from src.api.v1.endpoints import admin, auth, users, documents, search 
+from src.core import metrics
+from src.core.config import settings
+from src.db.session import AsyncSessionLocal
+from src.services import search_service
+from src.services.reranker import reranker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.VECTOR_INDEX_STARTUP_CHECK:
+        async with AsyncSessionLocal() as db:
+            await search_service.check_vector_index(db)
+    # O cross-encoder carrega antes de a API aceitar requisições: dentro do
+    # orçamento de RERANK_TIMEOUT_MS, as primeiras consultas só estourariam
+    if settings.RERANK_PRELOAD:
+        await run_in_threadpool(reranker.warm_up)
+    yield
+
 
 app = FastAPI(
     title="IntelliDocs AI - API",
     description="Backend da plataforma IntelliDocs AI para gerenciamento inteligente de documentos.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # 2. Inclua o novo roteador na aplicação
@@ -13,6 +36,42 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(documents.router, prefix="/api/v1/documents", tags=["Documents"])
 app.include_router(search.router, prefix="/api/v1/search", tags=["Search"]) # <<< ADICIONE ESTA LINHA
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
+
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """
+    Mede a latência de cada requisição por rota (o template, ex:
+    /api/v1/documents/{document_id}, para não criar uma série por id) e
+    abre o trace da requisição, cujas etapas voltam no cabeçalho Server-Timing.
+    Em respostas em streaming, mede até o envio dos cabeçalhos.
+    """
+    if not settings.METRICS_ENABLED or request.url.path == "/metrics":
+        return await call_next(request)
+
+    start = time.perf_counter()
+    status_code = 500
+    with metrics.trace(f"{request.method} {request.url.path}") as root:
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            route = request.scope.get("route")
+            metrics.REQUEST_LATENCY.labels(
+                method=request.method,
+                route=route.path if route is not None else "unmatched",
+                status=str(status_code),
+            ).observe(time.perf_counter() - start)
+    if root.children:
+        response.headers["Server-Timing"] = metrics.server_timing(root)
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    payload, content_type = metrics.render_latest()
+    return Response(content=payload, media_type=content_type)
 
 
 @app.get("/")
@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, JSON, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship
+from pgvector.sqlalchemy import Vector
 
 from src.db.base import Base
 
@@ -11,7 +13,10 @@ class Document(Base):
     file_path = Column(String, nullable=False)  # Caminho no storage (ex: S3, local)
     file_size = Column(Integer, nullable=False)
     mime_type = Column(String, nullable=False)
+    content_hash = Column(String(64), nullable=True)  # SHA-256 do arquivo, para deduplicação
     status = Column(String, default="PENDING_PROCESSING", index=True) # PENDING, PROCESSING, COMPLETED, FAILED
+    # Última página cujos chunks já estão todos salvos (checkpoint para retomar o processamento)
+    last_committed_page = Column(Integer, nullable=True)
     category = Column(String, nullable=True)
     tags = Column(JSON, nullable=True)
     
@@ -20,6 +25,12 @@ class Document(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_documents_organization_id_content_hash", "organization_id", "content_hash"),
+        # Paginação por keyset da listagem de documentos
+        Index("ix_documents_organization_id_created_at_id", "organization_id", "created_at", "id"),
+    )
+    
     organization = relationship("Organization")
     uploaded_by = relationship("User")
     chunks = relationship("DocumentChunk", back_populates="document", cascade="all, delete-orphan")
@@ -30,9 +41,27 @@ class DocumentChunk(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String, nullable=False)
+    # Vetor de busca full-text, gerado pelo próprio Postgres a partir de 'content'
+    content_tsv = Column(TSVECTOR, Computed("to_tsvector('portuguese', content)", persisted=True))
+    # SHA-256 do texto do chunk: trechos idênticos reaproveitam o mesmo embedding
+    content_hash = Column(String(64), nullable=True, index=True)
     page_number = Column(Integer, nullable=False)
-    
+    # Posição do trecho dentro do texto da página (chunks em janela deslizante)
+    char_start = Column(Integer, nullable=True)
+    char_end = Column(Integer, nullable=True)
+    # Vetor de embedding (paraphrase-multilingual-MiniLM-L12-v2 tem 384 dimensões)
+    embedding = Column(Vector(384), nullable=True)
+    # Modelo que gerou 'embedding'
+    embedding_model = Column(String, nullable=True)
+    # Migração de modelo: vetor do modelo de destino (dimensão livre) e o modelo que o gerou
+    next_embedding = Column(Vector(), nullable=True)
+    next_embedding_model = Column(String, nullable=True)
     
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
 
+    __table_args__ = (
+        # Retomada do processamento: apaga os chunks após o checkpoint do documento
+        Index("ix_document_chunks_document_id_page_number", "document_id", "page_number"),
+    )
+
     document = relationship("Document", back_populates="chunks")
\ No newline at end of file
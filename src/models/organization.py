@@ -8,6 +8,11 @@ class Organization(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
+    # Modelo de embedding usado na busca da organização (None = EMBEDDING_MODEL_NAME).
+    # Só muda para o modelo de destino depois que o backfill da organização termina.
+    embedding_model = Column(String, nullable=True)
+    # Backend da busca vetorial: "pgvector" ou "local" (None = VECTOR_INDEX_BACKEND)
+    vector_index = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     users = relationship("User", back_populates="organization")
\ No newline at end of file
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import Literal
+
+
+class VectorIndexUpdate(BaseModel):
+    """
+    Schema para trocar o backend da busca vetorial da organização.
+    """
+    # "pgvector": índice ANN no PostgreSQL; "local": índice em memória (NumPy) na API
+    backend: Literal["pgvector", "local"]
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 class SearchQuery(BaseModel):
     """
@@ -8,6 +8,21 @@ class SearchQuery(BaseModel):
     query: str
     top_k: int = 5  # Quantos resultados retornar (default 5)
 
+    # Ajuste fino de recall x latência do índice ANN.
+    # Se omitidos, usam os padrões do servidor (SEARCH_HNSW_EF_SEARCH / SEARCH_IVFFLAT_PROBES).
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)  # Índice HNSW
+    probes: Optional[int] = Field(default=None, ge=1, le=1000)  # Índice IVFFlat (ou partições IVF do índice local)
+
+    # "vector": só busca semântica; "hybrid": semântica + full-text com fusão de rankings
+    mode: Literal["vector", "hybrid"] = "vector"
+    # Candidatos por perna na busca híbrida (padrão: SEARCH_HYBRID_CANDIDATES)
+    candidate_k: Optional[int] = Field(default=None, ge=1, le=1000)
+
+    # Reordena os candidatos com um cross-encoder antes de devolver os top_k
+    rerank: bool = False
+    # Quantos candidatos são reordenados (padrão: RERANK_CANDIDATES)
+    rerank_candidates: Optional[int] = Field(default=None, ge=1, le=100)
+
 
 class SearchResultChunk(BaseModel):
     """
@@ -17,6 +32,7 @@ class SearchResultChunk(BaseModel):
     page_number: int
     content: str
     similarity: float # Quão relevante é o resultado (0.0 a 1.0)
+    rerank_score: Optional[float] = None  # Pontuação do cross-encoder, quando houve rerank
 
     class Config:
         from_attributes = True
@@ -26,4 +42,22 @@ class SearchResponse(BaseModel):
     """
     Schema para a resposta completa da busca.
     """
-    results: List[SearchResultChunk]
\ No newline at end of file
+    results: List[SearchResultChunk]
+    reranked: bool = False  # False também quando o rerank estourou o orçamento
+    rerank_ms: Optional[float] = None  # Tempo gasto no rerank (quando pedido)
+
+
+class QAQuery(BaseModel):
+    """
+    Schema para uma pergunta enviada ao fluxo de RAG.
+    """
+    query: str
+    mode: Literal["vector", "hybrid"] = "vector"
+
+
+class QAResponse(BaseModel):
+    """
+    Schema para a resposta do fluxo de perguntas e respostas (RAG).
+    """
+    answer: str
+    sources: List[SearchResultChunk]
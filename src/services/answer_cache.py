@@ -0,0 +1,129 @@
+# src/services/answer_cache.py
+
+import threading
+import time
+from typing import Hashable, NamedTuple
+
+import numpy as np
+
+from src.core.config import settings
+from src.schemas.search import QAResponse
+from src.services.document_versions import get_document_versions
+
+
+class CachedAnswer(NamedTuple):
+    embedding: np.ndarray  # Embedding normalizado da pergunta original
+    response: dict  # QAResponse serializado
+    versions: dict[int, int]  # Versão de cada documento citado no momento da resposta
+    expires_at: float
+    llm_ms: float  # Quanto a chamada ao LLM levou (latência economizada a cada acerto)
+
+
+def _normalize(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticAnswerCache:
+    """
+    Cache de respostas do RAG por organização, consultado por similaridade:
+    uma pergunta nova reaproveita a resposta de uma pergunta anterior cujo
+    embedding tenha similaridade de cosseno >= min_similarity.
+
+    As entradas ficam na memória do processo; as versões dos documentos
+    ficam no Redis (ver 'document_versions'), então reprocessar ou remover
+    um documento invalida as respostas que o citaram em todas as réplicas.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, min_similarity: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_similarity = min_similarity
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_llm_ms = 0.0
+        self._buckets: dict[Hashable, list[CachedAnswer]] = {}
+        self._lock = threading.Lock()
+
+    def _best_match(self, bucket: Hashable, query: np.ndarray) -> CachedAnswer | None:
+        now = time.monotonic()
+        with self._lock:
+            entries = [entry for entry in self._buckets.get(bucket, []) if entry.expires_at > now]
+            self._buckets[bucket] = entries
+            if not entries:
+                return None
+            similarities = np.stack([entry.embedding for entry in entries]) @ query
+            best = int(np.argmax(similarities))
+            return entries[best] if similarities[best] >= self.min_similarity else None
+
+    def _discard(self, bucket: Hashable, entry: CachedAnswer) -> None:
+        with self._lock:
+            entries = self._buckets.get(bucket, [])
+            if entry in entries:
+                entries.remove(entry)
+            self.invalidations += 1
+
+    def lookup(self, bucket: Hashable, embedding) -> QAResponse | None:
+        """
+        Retorna a resposta em cache mais parecida com a pergunta, se houver uma
+        acima do limiar e se nenhum documento citado mudou desde então.
+        Faz I/O no Redis apenas quando há um candidato.
+        """
+        entry = self._best_match(bucket, _normalize(embedding))
+        if entry is not None and get_document_versions(list(entry.versions)) != entry.versions:
+            self._discard(bucket, entry)
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_llm_ms += entry.llm_ms
+        return QAResponse.model_validate(entry.response)
+
+    def store(
+        self,
+        bucket: Hashable,
+        embedding,
+        response: QAResponse,
+        versions: dict[int, int],
+        llm_ms: float
+    ) -> None:
+        """
+        Guarda a resposta. 'versions' deve ser lido antes da chamada ao LLM,
+        para que um reprocessamento durante a geração também a invalide.
+        """
+        entry = CachedAnswer(
+            embedding=_normalize(embedding),
+            response=response.model_dump(),
+            versions=versions,
+            expires_at=time.monotonic() + self.ttl,
+            llm_ms=llm_ms,
+        )
+        with self._lock:
+            entries = self._buckets.setdefault(bucket, [])
+            entries.append(entry)
+            if len(entries) > self.max_entries:
+                del entries[0]  # Remove a mais antiga
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": sum(len(entries) for entries in self._buckets.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "saved_llm_ms": round(self.saved_llm_ms, 1),
+            }
+
+
+answer_cache = SemanticAnswerCache(
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+    ttl=settings.ANSWER_CACHE_TTL_SECONDS,
+    min_similarity=settings.ANSWER_CACHE_MIN_SIMILARITY,
+)
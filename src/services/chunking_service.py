@@ -0,0 +1,56 @@
+# src/services/chunking_service.py
+
+from typing import Iterable, Iterator, NamedTuple
+
+
+class TextChunk(NamedTuple):
+    """
+    Um pedaço de texto de uma página, pronto para virar um DocumentChunk.
+    'char_start'/'char_end' são as posições do trecho dentro do texto da página.
+    """
+    page_number: int
+    char_start: int
+    char_end: int
+    content: str
+
+
+def iter_page_chunks(
+    pages: Iterable[tuple[int, str]],
+    tokenizer,
+    max_tokens: int,
+    overlap_tokens: int,
+) -> Iterator[TextChunk]:
+    """
+    Divide o texto de cada página em janelas deslizantes de até 'max_tokens'
+    tokens, com 'overlap_tokens' tokens de sobreposição entre janelas vizinhas.
+
+    Usa o próprio tokenizer do modelo de embedding (com 'offset_mapping'),
+    então cada janela cabe inteira no limite do modelo e nada é truncado.
+    Funciona como gerador: só uma página fica em memória por vez.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens deve ser maior que zero.")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens deve estar entre 0 e max_tokens - 1.")
+
+    step = max_tokens - overlap_tokens
+
+    for page_number, page_text in pages:
+        encoding = tokenizer(
+            page_text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False,
+        )
+        offsets = encoding["offset_mapping"]
+
+        for start in range(0, len(offsets), step):
+            window = offsets[start:start + max_tokens]
+            char_start, char_end = window[0][0], window[-1][1]
+            content = page_text[char_start:char_end]
+            if content.strip():
+                yield TextChunk(page_number, char_start, char_end, content)
+
+            # A última janela já chegou ao fim da página
+            if start + max_tokens >= len(offsets):
+                break
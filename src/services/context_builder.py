@@ -0,0 +1,143 @@
+# src/services/context_builder.py
+
+from typing import Callable, NamedTuple, Sequence
+
+import numpy as np
+
+from src.schemas.search import SearchResultChunk
+
+
+class ContextCandidate(NamedTuple):
+    """
+    Um chunk candidato ao contexto do RAG, como vem da busca.
+    'similarity' é a distância de cosseno até a consulta (menor = mais relevante).
+    """
+    document_id: int
+    page_number: int
+    char_start: int | None
+    char_end: int | None
+    content: str
+    similarity: float
+    embedding: np.ndarray
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def mmr_order(
+    query_embedding: Sequence[float],
+    candidates: list[ContextCandidate],
+    mmr_lambda: float,
+    duplicate_similarity: float
+) -> list[ContextCandidate]:
+    """
+    Ordena os candidatos por Maximal Marginal Relevance:
+    a cada passo escolhe o que maximiza
+        mmr_lambda * sim(consulta, c) - (1 - mmr_lambda) * max sim(c, já escolhidos).
+    Candidatos quase idênticos a um já escolhido (similaridade >= duplicate_similarity)
+    são descartados. Usa os embeddings que já vieram do banco; nada é recalculado.
+    """
+    if not candidates:
+        return []
+
+    embeddings = _normalize_rows(np.stack([np.asarray(c.embedding, dtype=np.float32) for c in candidates]))
+    query = _normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+    relevance = embeddings @ query
+    pairwise = embeddings @ embeddings.T
+
+    remaining = list(range(len(candidates)))
+    selected: list[int] = []
+    while remaining:
+        if selected:
+            redundancy = pairwise[np.ix_(remaining, selected)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining), dtype=np.float32)
+        scores = mmr_lambda * relevance[remaining] - (1 - mmr_lambda) * redundancy
+        best = int(np.argmax(scores))
+        index = remaining.pop(best)
+        if redundancy[best] < duplicate_similarity:
+            selected.append(index)
+    return [candidates[i] for i in selected]
+
+
+def pack_to_budget(
+    candidates: list[ContextCandidate],
+    token_budget: int,
+    count_tokens: Callable[[str], int]
+) -> list[ContextCandidate]:
+    """
+    Percorre os candidatos em ordem de prioridade e inclui cada um que ainda
+    caiba no orçamento de tokens (os que não cabem são pulados, não cortados).
+    """
+    packed = []
+    used = 0
+    for candidate in candidates:
+        tokens = count_tokens(candidate.content)
+        if used + tokens <= token_budget:
+            packed.append(candidate)
+            used += tokens
+    return packed
+
+
+def merge_adjacent(candidates: list[ContextCandidate]) -> list[ContextCandidate]:
+    """
+    Junta chunks vizinhos (sobrepostos ou encostados) da mesma página do mesmo
+    documento em um único trecho, removendo o texto repetido da sobreposição.
+    Cada trecho resultante fica na posição do seu chunk mais prioritário.
+    """
+    priority = {id(candidate): position for position, candidate in enumerate(candidates)}
+    groups: dict[tuple[int, int], list[ContextCandidate]] = {}
+    for candidate in candidates:
+        groups.setdefault((candidate.document_id, candidate.page_number), []).append(candidate)
+
+    merged: list[tuple[int, ContextCandidate]] = []
+    for group in groups.values():
+        # Chunks antigos, sem posições, não são mesclados
+        positioned = sorted((c for c in group if c.char_start is not None), key=lambda c: c.char_start)
+        merged.extend((priority[id(c)], c) for c in group if c.char_start is None)
+
+        current, current_priority = None, None
+        for candidate in positioned:
+            if current is not None and candidate.char_start <= current.char_end:
+                overlap = current.char_end - candidate.char_start
+                current = current._replace(
+                    char_end=max(current.char_end, candidate.char_end),
+                    content=current.content + candidate.content[overlap:],
+                    similarity=min(current.similarity, candidate.similarity),
+                )
+                current_priority = min(current_priority, priority[id(candidate)])
+                continue
+            if current is not None:
+                merged.append((current_priority, current))
+            current, current_priority = candidate, priority[id(candidate)]
+        if current is not None:
+            merged.append((current_priority, current))
+
+    return [candidate for _, candidate in sorted(merged, key=lambda item: item[0])]
+
+
+def build_context(
+    query_embedding: Sequence[float],
+    candidates: list[ContextCandidate],
+    token_budget: int,
+    count_tokens: Callable[[str], int],
+    mmr_lambda: float,
+    duplicate_similarity: float
+) -> list[SearchResultChunk]:
+    """
+    Monta o contexto do RAG a partir de um conjunto amplo de candidatos:
+    MMR (relevância + diversidade) -> orçamento de tokens -> junção de vizinhos.
+    """
+    ordered = mmr_order(query_embedding, candidates, mmr_lambda, duplicate_similarity)
+    packed = pack_to_budget(ordered, token_budget, count_tokens)
+    return [
+        SearchResultChunk(
+            document_id=c.document_id,
+            page_number=c.page_number,
+            content=c.content,
+            similarity=c.similarity
+        )
+        for c in merge_adjacent(packed)
+    ]
@@ -0,0 +1,52 @@
+# src/services/document_locks.py
+
+import redis
+from redis.lock import Lock
+
+from src.core.cache import get_redis
+from src.core.config import settings
+
+REDIS_KEY_PREFIX = "intellidocs:document_lock:"
+
+# Folga entre o limite de tempo da tarefa (quando o Celery mata o processo)
+# e a expiração da trava: uma trava esquecida por um worker morto some sozinha.
+LOCK_TIMEOUT_MARGIN_SECONDS = 120
+
+
+def _key(document_id: int) -> str:
+    return f"{REDIS_KEY_PREFIX}{document_id}"
+
+
+def lock_timeout_seconds() -> int:
+    """
+    Tempo até a trava expirar sozinha (ex: o worker que estava com ela morreu).
+    """
+    return settings.INGESTION_TASK_TIME_LIMIT_SECONDS + LOCK_TIMEOUT_MARGIN_SECONDS
+
+
+def acquire_document_lock(document_id: int) -> Lock | None:
+    """
+    Trava do documento no Redis, para que só uma etapa da ingestão rode por
+    vez (ex: a mesma mensagem reentregue enquanto a primeira entrega ainda
+    está em execução). Espera no máximo DOCUMENT_LOCK_WAIT_SECONDS (a etapa
+    anterior dispara a seguinte antes de soltar a trava) e retorna None se
+    outra execução continua com o documento. Erros de conexão com o Redis
+    são propagados (transitórios).
+    """
+    lock = get_redis().lock(_key(document_id), timeout=lock_timeout_seconds())
+    wait_seconds = settings.DOCUMENT_LOCK_WAIT_SECONDS
+    acquired = lock.acquire(blocking=wait_seconds > 0, blocking_timeout=wait_seconds or None)
+    return lock if acquired else None
+
+
+def release_document_lock(lock: Lock | None) -> None:
+    """
+    Libera a trava; pode ser chamada mais de uma vez (a trava já liberada,
+    expirada ou tomada por outra execução é ignorada).
+    """
+    if lock is None:
+        return
+    try:
+        lock.release()
+    except redis.RedisError:  # LockError inclusive
+        pass
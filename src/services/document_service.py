@@ -1,52 +1,157 @@
+import base64
+import hashlib
+import json
 import os
-from sqlalchemy.orm import Session
-from fastapi import UploadFile
+import re
+import tempfile
+from datetime import datetime
+from typing import NamedTuple
 
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+
+from src.core.config import settings
 from src.models import document as doc_model
 from src.schemas import document as doc_schema
 from src.models.user import User
 
-# Define um diretório local para salvar os uploads. Em produção, isso seria um bucket S3.
-UPLOAD_DIRECTORY = "./uploads"
-os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
 
-def save_uploaded_file(upload_file: UploadFile) -> str:
+class StoredFile(NamedTuple):
     """
-    Salva o arquivo enviado em um diretório local e retorna o caminho.
+    Resultado da gravação de um upload no storage.
     """
-    file_path = os.path.join(UPLOAD_DIRECTORY, upload_file.filename)
-    with open(file_path, "wb") as buffer:
-        buffer.write(upload_file.file.read())
-    return file_path
+    path: str
+    sha256: str
+    size: int
+
 
-def create_document(db: Session, upload_file: UploadFile, current_user: User) -> doc_model.Document:
+def _content_addressed_path(sha256: str, filename: str | None) -> str:
+    """
+    Caminho do arquivo derivado do seu conteúdo: <raiz>/ab/cd/<sha256><ext>.
+    Dois uploads com o mesmo nome não se sobrescrevem mais, e arquivos
+    idênticos ocupam o mesmo lugar.
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if not re.fullmatch(r"\.[a-z0-9]{1,10}", extension):
+        extension = ""
+    return os.path.join(settings.UPLOAD_ROOT, sha256[:2], sha256[2:4], sha256 + extension)
+
+
+def save_uploaded_file(upload_file: UploadFile) -> StoredFile:
+    """
+    Salva o arquivo enviado no storage local em blocos de UPLOAD_CHUNK_SIZE,
+    calculando o SHA-256 durante a cópia. Apenas um bloco fica em memória.
+    Levanta 413 se o arquivo passar de UPLOAD_MAX_BYTES.
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Arquivo excede o tamanho máximo de {settings.UPLOAD_MAX_BYTES} bytes."
+    )
+    if upload_file.size is not None and upload_file.size > settings.UPLOAD_MAX_BYTES:
+        raise too_large
+
+    tmp_directory = os.path.join(settings.UPLOAD_ROOT, "tmp")
+    os.makedirs(tmp_directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_directory)
+
+    try:
+        hasher = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as buffer:
+            while block := upload_file.file.read(settings.UPLOAD_CHUNK_SIZE):
+                size += len(block)
+                if size > settings.UPLOAD_MAX_BYTES:
+                    raise too_large
+                hasher.update(block)
+                buffer.write(block)
+
+        sha256 = hasher.hexdigest()
+        file_path = _content_addressed_path(sha256, upload_file.filename)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # Renomeação atômica: leitores nunca veem um arquivo pela metade
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return StoredFile(path=file_path, sha256=sha256, size=size)
+
+async def create_document(db: AsyncSession, upload_file: UploadFile, current_user: User) -> doc_model.Document:
     """
     Cria a entrada do documento no banco de dados.
     """
-    # Salva o arquivo fisicamente
-    file_path = save_uploaded_file(upload_file)
+    # Salva o arquivo fisicamente (I/O de disco bloqueante, fora do event loop)
+    stored_file = await run_in_threadpool(save_uploaded_file, upload_file)
 
     # Cria o objeto Pydantic com os dados do documento
     doc_in = doc_schema.DocumentCreate(
         file_name=upload_file.filename,
-        file_path=file_path,
-        file_size=upload_file.size,
+        file_path=stored_file.path,
+        file_size=stored_file.size,
         mime_type=upload_file.content_type,
+        content_hash=stored_file.sha256,
         organization_id=current_user.organization_id,
         uploaded_by_id=current_user.id
     )
-    
+
     # Cria o modelo SQLAlchemy e salva no banco
     db_document = doc_model.Document(**doc_in.dict())
     db.add(db_document)
-    db.commit()
-    db.refresh(db_document)
+    await db.commit()
+    await db.refresh(db_document)
     return db_document
 
-def get_documents_by_organization(db: Session, organization_id: int, skip: int = 0, limit: int = 100):
+def encode_cursor(created_at: datetime, document_id: int) -> str:
+    """
+    Cursor opaco da paginação: a posição (created_at, id) do último item da página.
+    """
+    raw = json.dumps([created_at.isoformat(), document_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Levanta ValueError se o cursor for inválido.
+    """
+    try:
+        created_at, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(document_id)
+    except Exception as e:
+        raise ValueError("Cursor de paginação inválido.") from e
+
+async def get_documents_by_organization(
+    db: AsyncSession,
+    organization_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    status: str | None = None,
+    category: str | None = None
+):
     """
-    Retorna uma lista de documentos de uma organização específica.
+    Retorna uma lista de documentos de uma organização específica,
+    do mais recente para o mais antigo.
+
+    Com 'cursor', usa paginação por keyset em (created_at, id), servida pelo
+    índice (organization_id, created_at, id): o custo não cresce com a
+    profundidade da página, ao contrário do 'offset' (mantido por compatibilidade).
+    Seleciona apenas as colunas de DocumentRead, sem carregar objetos ORM.
     """
-    return db.query(doc_model.Document).filter(
-        doc_model.Document.organization_id == organization_id
-    ).offset(skip).limit(limit).all()
\ No newline at end of file
+    Document = doc_model.Document
+    columns = [getattr(Document, name) for name in doc_schema.DocumentRead.model_fields]
+
+    query = select(*columns).where(Document.organization_id == organization_id)
+    if status:
+        query = query.where(Document.status == status)
+    if category:
+        query = query.where(Document.category == category)
+
+    if cursor:
+        query = query.where(tuple_(Document.created_at, Document.id) < decode_cursor(cursor))
+    else:
+        query = query.offset(skip)
+
+    query = query.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit)
+    return (await db.execute(query)).all()
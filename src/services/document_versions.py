@@ -0,0 +1,44 @@
+# src/services/document_versions.py
+
+import redis
+from sqlalchemy import event
+
+from src.core.cache import get_redis
+from src.models.document import Document
+
+REDIS_KEY_PREFIX = "intellidocs:document_version:"
+
+
+def _key(document_id: int) -> str:
+    return f"{REDIS_KEY_PREFIX}{document_id}"
+
+
+def bump_document_version(document_id: int) -> None:
+    """
+    Incrementa a versão do documento no Redis, invalidando em todos os
+    processos as respostas em cache que o citaram.
+    Chamado quando o documento é (re)processado ou removido.
+    """
+    try:
+        get_redis().incr(_key(document_id))
+    except redis.RedisError as e:
+        print(f"[CACHE] Não foi possível incrementar a versão do documento ID: {document_id}. Erro: {e}")
+
+
+def get_document_versions(document_ids: list[int]) -> dict[int, int] | None:
+    """
+    Retorna a versão atual de cada documento (0 se nunca foi incrementada),
+    ou None se o Redis estiver indisponível.
+    """
+    if not document_ids:
+        return {}
+    try:
+        values = get_redis().mget([_key(document_id) for document_id in document_ids])
+    except redis.RedisError:
+        return None
+    return {document_id: int(value or 0) for document_id, value in zip(document_ids, values)}
+
+
+@event.listens_for(Document, "after_delete")
+def _bump_on_delete(mapper, connection, target: Document) -> None:
+    bump_document_version(target.id)
@@ -0,0 +1,130 @@
+# src/services/embedding_backends.py
+
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+import numpy as np
+
+from src.core.config import settings
+
+
+class EmbeddingBackend(ABC):
+    """
+    Interface comum para os backends de embedding usados pela API e pelo worker.
+    'encode' segue a convenção do SentenceTransformer: uma string gera um
+    vetor 1-D e uma lista de strings gera uma matriz (n, dimensão).
+    """
+    name: str = ""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @property
+    def key(self) -> str:
+        """
+        Identifica o modelo + backend (usado, por exemplo, em chaves de cache),
+        já que backends diferentes geram vetores ligeiramente diferentes.
+        """
+        return f"{self.model_name}@{self.name}"
+
+    @property
+    @abstractmethod
+    def tokenizer(self):
+        ...
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        ...
+
+    @abstractmethod
+    def encode(self, texts: str | list[str], batch_size: int = 32) -> np.ndarray:
+        ...
+
+
+class TorchBackend(EmbeddingBackend):
+    """
+    Modelo PyTorch original, em FP32. É a referência de qualidade.
+    """
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        self.model = self._load()
+
+    def _load(self):
+        # Import tardio: só quem carrega o modelo (API e fila de embeddings) importa o PyTorch
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(self.model_name, device="cpu")
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: str | list[str], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+
+class TorchInt8Backend(TorchBackend):
+    """
+    Modelo PyTorch com as camadas Linear quantizadas dinamicamente para int8.
+    Não exige dependências extras.
+    """
+    name = "torch-int8"
+
+    def _load(self):
+        import torch
+
+        model = super()._load()
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxBackend(TorchBackend):
+    """
+    Modelo exportado para ONNX e executado pelo ONNX Runtime.
+    Por padrão usa a variante quantizada em int8 publicada junto do modelo.
+    Requer 'optimum[onnxruntime]'.
+    """
+    name = "onnx"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(
+            self.model_name,
+            device="cpu",
+            backend="onnx",
+            model_kwargs={"file_name": settings.EMBEDDING_ONNX_FILE_NAME},
+        )
+
+
+BACKENDS: dict[str, type[EmbeddingBackend]] = {
+    backend.name: backend for backend in (TorchBackend, TorchInt8Backend, OnnxBackend)
+}
+
+
+@lru_cache
+def get_embedding_backend(backend: str | None = None, model_name: str | None = None) -> EmbeddingBackend:
+    """
+    Retorna (e carrega uma única vez por processo) o backend de embedding.
+    Sem argumentos, usa EMBEDDING_BACKEND e EMBEDDING_MODEL_NAME do Settings.
+    """
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"EMBEDDING_BACKEND inválido: {backend}. Opções: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](model_name or settings.EMBEDDING_MODEL_NAME)
+
+
+def cosine_parity(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """
+    Similaridade de cosseno linha a linha entre os vetores de referência (FP32)
+    e os vetores do backend candidato.
+    """
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return np.sum(reference * candidate, axis=1)
@@ -0,0 +1,101 @@
+# src/services/embedding_batcher.py
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+import numpy as np
+
+
+class MicroBatchEncoder:
+    """
+    Agrupa consultas de requisições concorrentes em um único 'encode'.
+
+    Cada chamada a 'encode' entra em uma fila e espera seu resultado.
+    Uma thread de fundo pega a primeira consulta da fila, aguarda até
+    'max_wait_ms' por outras (no máximo 'max_batch_size') e executa um
+    só forward pass para o lote inteiro, devolvendo cada vetor à sua
+    requisição. Sob carga, isso troca dezenas de forward passes pequenos
+    por poucos grandes; sem concorrência, o custo extra é de no máximo
+    'max_wait_ms'.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[..., np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue: queue.Queue[tuple[str, Future]] = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker_pid: int | None = None
+
+    def _ensure_worker(self) -> None:
+        # A thread é criada sob demanda (e recriada após um fork),
+        # pois threads não sobrevivem ao fork dos workers do servidor.
+        if self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, name="embedding-microbatch", daemon=True).start()
+                self._worker_pid = os.getpid()
+
+    def _collect_batch(self) -> list[tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = self.encode_fn(texts, batch_size=len(texts))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+    def submit(self, text: str) -> Future:
+        """
+        Enfileira uma consulta e retorna um Future com o seu embedding.
+        """
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, text: str) -> np.ndarray:
+        """
+        Versão bloqueante de 'submit', com a mesma assinatura de uso de
+        'SentenceTransformer.encode' para uma única consulta.
+        """
+        return self.submit(text).result()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
@@ -0,0 +1,120 @@
+# src/services/embedding_cache.py
+
+import hashlib
+import threading
+import unicodedata
+from typing import Callable
+
+import numpy as np
+import redis
+
+from src.core.cache import TTLCache, get_redis
+from src.core.config import settings
+
+REDIS_KEY_PREFIX = "intellidocs:query_embedding:"
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normaliza o texto da consulta para a chave do cache:
+    forma Unicode NFKC e espaços colapsados. A caixa é preservada,
+    pois o modelo de embedding diferencia maiúsculas de minúsculas.
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).split())
+
+
+class QueryEmbeddingCache:
+    """
+    Cache de embeddings de consultas em dois níveis:
+    1. LRU em memória do processo (TTLCache), sempre ativo;
+    2. Redis compartilhado entre processos/réplicas, opcional.
+    A chave combina o nome do modelo e o texto normalizado da consulta.
+    """
+
+    def __init__(self, maxsize: int, ttl: int, use_redis: bool):
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.redis_hits = 0
+        self.redis_errors = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_name: str, query: str) -> str:
+        return f"{model_name}:{normalize_query(query)}"
+
+    def _redis_get(self, key: str) -> np.ndarray | None:
+        try:
+            raw = get_redis().get(REDIS_KEY_PREFIX + hashlib.sha256(key.encode()).hexdigest())
+        except redis.RedisError:
+            with self._lock:
+                self.redis_errors += 1
+            return None
+        if raw is None:
+            return None
+        with self._lock:
+            self.redis_hits += 1
+        return np.frombuffer(raw, dtype=np.float32)
+
+    def _redis_set(self, key: str, embedding: np.ndarray) -> None:
+        try:
+            get_redis().setex(
+                REDIS_KEY_PREFIX + hashlib.sha256(key.encode()).hexdigest(),
+                self.ttl,
+                embedding.tobytes(),
+            )
+        except redis.RedisError:
+            with self._lock:
+                self.redis_errors += 1
+
+    def get_local(self, query: str, model_name: str) -> np.ndarray | None:
+        """
+        Consulta apenas o nível em memória (sem I/O), seguro para o event loop.
+        """
+        return self.local.get(self._key(model_name, query))
+
+    def get_or_compute(
+        self,
+        query: str,
+        model_name: str,
+        compute: Callable[[str], np.ndarray],
+        check_local: bool = True
+    ) -> np.ndarray:
+        """
+        Retorna o embedding (float32) da consulta, calculando com 'compute'
+        somente se ele não estiver em nenhum dos níveis do cache.
+        'check_local=False' pula o nível em memória (já consultado com 'get_local').
+        """
+        key = self._key(model_name, query)
+        if check_local:
+            embedding = self.local.get(key)
+            if embedding is not None:
+                return embedding
+
+        if self.use_redis:
+            embedding = self._redis_get(key)
+            if embedding is not None:
+                self.local.set(key, embedding)
+                return embedding
+
+        embedding = np.asarray(compute(query), dtype=np.float32)
+        self.local.set(key, embedding)
+        if self.use_redis:
+            self._redis_set(key, embedding)
+        return embedding
+
+    def stats(self) -> dict:
+        stats = self.local.stats()
+        stats.update(
+            redis_enabled=self.use_redis,
+            redis_hits=self.redis_hits,
+            redis_errors=self.redis_errors,
+        )
+        return stats
+
+
+query_embedding_cache = QueryEmbeddingCache(
+    maxsize=settings.QUERY_EMBEDDING_CACHE_SIZE,
+    ttl=settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+    use_redis=settings.QUERY_EMBEDDING_CACHE_REDIS,
+)
@@ -0,0 +1,127 @@
+# src/services/embedding_migration.py
+
+from typing import NamedTuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.models.document import Document, DocumentChunk
+from src.models.organization import Organization
+from src.services.embedding_backends import EmbeddingBackend, get_embedding_backend
+
+# Migração de modelo em duas colunas:
+# - 'embedding' guarda o vetor do modelo atual (EMBEDDING_MODEL_NAME);
+# - 'next_embedding' guarda o vetor do modelo de destino (EMBEDDING_NEXT_MODEL_NAME),
+#   preenchido pelo backfill e pela ingestão (escrita dupla) durante a migração.
+# Cada organização busca na coluna do modelo em 'organizations.embedding_model',
+# que só passa ao modelo de destino quando todos os seus chunks têm 'next_embedding'.
+
+NEXT_EMBEDDING_INDEX = "ix_document_chunks_next_embedding_hnsw"
+
+_org_model_cache = TTLCache(maxsize=10000, ttl=settings.EMBEDDING_ORG_MODEL_CACHE_TTL_SECONDS)
+
+
+class EmbeddingSlot(NamedTuple):
+    """
+    Onde e com qual modelo uma organização busca: o backend que codifica a
+    consulta e a expressão SQL da coluna de vetores correspondente.
+    """
+    backend: EmbeddingBackend
+    column: str
+
+
+def chunk_vector_column(model_name: str):
+    """
+    Coluna ORM de 'document_chunks' com os vetores do modelo dado
+    (usada pelos workers, que leem os vetores pelo ORM).
+    """
+    if migration_configured() and model_name == settings.EMBEDDING_NEXT_MODEL_NAME:
+        return DocumentChunk.next_embedding
+    return DocumentChunk.embedding
+
+
+def next_embedding_column() -> str:
+    # O cast para a dimensão fixa é o que permite usar o índice de expressão
+    return f"CAST(dc.next_embedding AS vector({settings.EMBEDDING_NEXT_DIMENSION}))"
+
+
+def migration_configured() -> bool:
+    return bool(settings.EMBEDDING_NEXT_MODEL_NAME and settings.EMBEDDING_NEXT_DIMENSION)
+
+
+def get_next_backend() -> EmbeddingBackend | None:
+    """
+    Backend do modelo de destino, ou None se não há migração em andamento.
+    """
+    if not migration_configured():
+        return None
+    return get_embedding_backend(settings.EMBEDDING_NEXT_BACKEND, settings.EMBEDDING_NEXT_MODEL_NAME)
+
+
+async def get_active_embedding_model(db: AsyncSession, organization_id: int) -> str:
+    """
+    Modelo usado na busca da organização (com cache curto em memória).
+    """
+    model = _org_model_cache.get(organization_id)
+    if model is None:
+        model = await db.scalar(
+            select(Organization.embedding_model).where(Organization.id == organization_id)
+        )
+        model = model or settings.EMBEDDING_MODEL_NAME
+        _org_model_cache.set(organization_id, model)
+    return model
+
+
+async def resolve_search_slot(db: AsyncSession, organization_id: int) -> EmbeddingSlot:
+    model = await get_active_embedding_model(db, organization_id)
+    if migration_configured() and model == settings.EMBEDDING_NEXT_MODEL_NAME:
+        return EmbeddingSlot(get_next_backend(), next_embedding_column())
+    if model != settings.EMBEDDING_MODEL_NAME:
+        print(f"[EMBEDDING] Organização ID: {organization_id} usa '{model}', que não está configurado; "
+              f"buscando com {settings.EMBEDDING_MODEL_NAME}.")
+    return EmbeddingSlot(get_embedding_backend(), "dc.embedding")
+
+
+def invalidate_cached_org_model(organization_id: int) -> None:
+    _org_model_cache.pop(organization_id)
+
+
+async def get_migration_progress(db: AsyncSession, organization_id: int) -> dict:
+    """
+    Progresso do backfill da organização para o modelo de destino.
+    """
+    total, done = (await db.execute(
+        select(
+            func.count(DocumentChunk.id),
+            func.count(DocumentChunk.id).filter(
+                DocumentChunk.next_embedding_model == settings.EMBEDDING_NEXT_MODEL_NAME
+            ),
+        )
+        .join(Document, DocumentChunk.document_id == Document.id)
+        .where(Document.organization_id == organization_id)
+    )).one()
+    return {
+        "current_model": settings.EMBEDDING_MODEL_NAME,
+        "target_model": settings.EMBEDDING_NEXT_MODEL_NAME,
+        "active_model": await get_active_embedding_model(db, organization_id),
+        "total_chunks": total,
+        "migrated_chunks": done,
+        "progress": done / total if total else 1.0,
+    }
+
+
+def ensure_next_embedding_index(engine: Engine) -> None:
+    """
+    Cria (uma vez) o índice HNSW sobre 'next_embedding' na dimensão do modelo
+    de destino. CONCURRENTLY não bloqueia a escrita, por isso roda fora de transação.
+    O índice começa vazio e é preenchido à medida que o backfill grava os vetores.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {NEXT_EMBEDDING_INDEX} ON document_chunks "
+            f"USING hnsw (({next_embedding_column().replace('dc.', '')}) vector_cosine_ops) "
+            f"WITH (m = {settings.HNSW_M}, ef_construction = {settings.HNSW_EF_CONSTRUCTION})"
+        ))
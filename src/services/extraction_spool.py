@@ -0,0 +1,84 @@
+# src/services/extraction_spool.py
+
+import json
+import os
+import shutil
+from typing import Iterable, Iterator
+
+from src.core.config import settings
+
+# Texto extraído de cada intervalo de páginas, guardado fora do broker:
+# o chord da extração devolve só os metadados dos arquivos, e a etapa de
+# embeddings lê as páginas uma a uma (memória constante, como em 'iter_pages').
+#
+# EXTRACTION_SPOOL_ROOT/<documento>/<início>-<fim>.jsonl, uma página por
+# linha: [page_number, texto]
+
+
+def _document_dir(document_id: int) -> str:
+    return os.path.join(settings.EXTRACTION_SPOOL_ROOT, str(document_id))
+
+
+def write_range(document_id: int, start: int, end: int, pages: Iterable[tuple[int, str]]) -> dict:
+    """
+    Grava as páginas de um intervalo e retorna os metadados que vão pelo chord.
+    O arquivo só aparece completo (escrita em um temporário + os.replace),
+    então uma extração repetida nunca deixa um intervalo pela metade.
+    """
+    directory = _document_dir(document_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{start:06d}-{end:06d}.jsonl")
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    count, last_page = 0, None
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for page_number, page_text in pages:
+            f.write(json.dumps([page_number, page_text], ensure_ascii=False))
+            f.write("\n")
+            count, last_page = count + 1, page_number
+    os.replace(tmp_path, path)
+    return {"path": path, "start": start, "end": end, "pages": count, "last_page": last_page}
+
+
+def read_pages(
+    ranges: list[dict],
+    after_page: int = 0,
+    cursor: dict | None = None,
+    until_page: int | None = None
+) -> Iterator[tuple[int, str]]:
+    """
+    Gera (page_number, texto) dos intervalos, na ordem das páginas,
+    pulando as páginas até 'after_page' (checkpoint) e parando antes das
+    páginas depois de 'until_page' (se informado).
+
+    'cursor' ({"range": índice do intervalo, "offset": bytes}) é atualizado
+    a cada página gerada para a posição logo depois dela; uma fatia seguinte
+    que recebe o mesmo cursor começa a leitura ali, sem reler o arquivo.
+    """
+    if cursor is None:
+        cursor = {"range": 0, "offset": 0}
+    for index in range(cursor["range"], len(ranges)):
+        extracted = ranges[index]
+        if extracted["last_page"] is None or extracted["last_page"] <= after_page:
+            continue
+        offset = cursor["offset"] if index == cursor["range"] else 0
+        with open(extracted["path"], "rb") as f:
+            f.seek(offset)
+            for line in f:
+                offset += len(line)
+                page_number, page_text = json.loads(line)
+                if until_page is not None and page_number > until_page:
+                    return
+                if page_number > after_page:
+                    cursor.update(range=index, offset=offset)
+                    yield page_number, page_text
+
+
+def last_page(ranges: list[dict]) -> int:
+    """
+    Última página com texto entre todos os intervalos (0 se nenhuma).
+    """
+    return max((extracted["last_page"] or 0 for extracted in ranges), default=0)
+
+
+def remove_document(document_id: int) -> None:
+    shutil.rmtree(_document_dir(document_id), ignore_errors=True)
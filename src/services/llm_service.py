@@ -0,0 +1,89 @@
+# src/services/llm_service.py
+
+import asyncio
+import os
+from typing import AsyncIterator
+
+from litellm import acompletion, token_counter
+
+from src.core.config import settings
+
+# Configura a chave de API da Groq
+os.environ["GROQ_API_KEY"] = settings.GROQ_API_KEY
+
+FAKE_MODEL = "fake"
+
+
+async def _fake_stream(messages: list[dict]) -> AsyncIterator[str]:
+    """
+    LLM local para desenvolvimento e testes: devolve, palavra por palavra,
+    o início do contexto enviado, com um atraso fixo entre os tokens.
+    """
+    words = messages[-1]["content"].split()[:80]
+    for word in words:
+        await asyncio.sleep(settings.FAKE_LLM_TOKEN_DELAY_MS / 1000)
+        yield word + " "
+
+
+async def _aclose(response) -> None:
+    """
+    Fecha o stream do provedor (e a conexão HTTP por trás dele), se possível.
+    """
+    for target in (response, getattr(response, "completion_stream", None)):
+        aclose = getattr(target, "aclose", None)
+        if aclose is not None:
+            try:
+                await aclose()
+            except Exception as e:
+                print(f"[LLM] Erro ao fechar o stream: {e}")
+            return
+
+
+async def stream_completion(messages: list[dict]) -> AsyncIterator[str]:
+    """
+    Gera a resposta do LLM token a token (acompletion com stream=True).
+    Se o consumidor parar de iterar (ex: cliente desconectou e a tarefa foi
+    cancelada), o stream do provedor é fechado para interromper a geração.
+    """
+    if settings.LLM_MODEL == FAKE_MODEL:
+        async for token in _fake_stream(messages):
+            yield token
+        return
+
+    response = await acompletion(
+        model=settings.LLM_MODEL,
+        messages=messages,
+        temperature=settings.LLM_TEMPERATURE,
+        stream=True
+    )
+    try:
+        async for chunk in response:
+            token = chunk.choices[0].delta.content
+            if token:
+                yield token
+    finally:
+        await _aclose(response)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Conta os tokens de um texto no tokenizer do LLM configurado
+    (o LLM "fake" usa o tokenizer padrão do litellm).
+    """
+    model = "" if settings.LLM_MODEL == FAKE_MODEL else settings.LLM_MODEL
+    return token_counter(model=model, text=text)
+
+
+async def complete(messages: list[dict]) -> str:
+    """
+    Gera a resposta completa do LLM (sem streaming).
+    """
+    if settings.LLM_MODEL == FAKE_MODEL:
+        return "".join([token async for token in _fake_stream(messages)])
+
+    response = await acompletion(
+        model=settings.LLM_MODEL,
+        messages=messages,
+        temperature=settings.LLM_TEMPERATURE
+    )
+    return response.choices[0].message.content
@@ -0,0 +1,351 @@
+# src/services/local_vector_store.py
+
+import fcntl
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from src.core.config import settings
+
+DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+# Quantização escalar int8: os vetores normalizados têm componentes em
+# [-1, 1], então uma escala fixa basta (sem calibração por coluna)
+INT8_SCALE = 127.0
+
+# Linhas multiplicadas de cada vez na busca exata (limita a memória temporária
+# quando os vetores estão em float16/int8 e precisam ser convertidos)
+SEARCH_BLOCK_ROWS = 65536
+
+
+class _Snapshot(NamedTuple):
+    meta_version: tuple
+    count: int
+    vectors: np.ndarray
+    ids: np.ndarray
+    lists: np.ndarray | None
+    centroids: np.ndarray | None
+
+
+def _slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _quantize(vectors: np.ndarray, dtype: str) -> np.ndarray:
+    if dtype == "int8":
+        return np.clip(np.rint(vectors * INT8_SCALE), -127, 127).astype(np.int8)
+    return vectors.astype(DTYPES[dtype])
+
+
+def _as_float32(block: np.ndarray) -> np.ndarray:
+    if block.dtype == np.int8:
+        return np.asarray(block, dtype=np.float32) / INT8_SCALE
+    return np.asarray(block, dtype=np.float32)
+
+
+def train_ivf(vectors: np.ndarray, lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    K-means esférico (produto interno em vetores normalizados) sobre uma
+    amostra dos vetores. Retorna os centróides normalizados (lists, dim).
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), lists * 64)
+    sample = _normalize(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+    centroids = sample[rng.choice(len(sample), min(lists, len(sample)), replace=False)]
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for list_id in range(len(centroids)):
+            members = sample[assignment == list_id]
+            if len(members):
+                centroids[list_id] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignment = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+        block = _as_float32(vectors[start:start + SEARCH_BLOCK_ROWS])
+        assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+class LocalVectorStore:
+    """
+    Índice vetorial local de uma organização para um modelo de embedding:
+    uma matriz (n, dim) de vetores normalizados em um arquivo memory-mapped,
+    buscada com produtos internos vetorizados (NumPy), mais os ids dos chunks.
+
+    Arquivos em LOCAL_INDEX_ROOT/<organização>/<modelo>/:
+      meta.json           geração atual, dimensão, dtype, quantidade de linhas e IVF
+      vectors-<g>.bin     float32/float16/int8, uma linha por chunk (só cresce)
+      ids-<g>.bin         int64, id do chunk de cada linha
+      lists-<g>.bin       int32, partição IVF de cada linha (só com IVF)
+      centroids-<g>.npy   centróides das partições IVF
+      .lock               fcntl.flock dos escritores (workers do Celery; só
+                          vale entre processos do mesmo host)
+
+    As linhas são gravadas antes do meta.json, que é substituído de forma
+    atômica, então leitores nunca enxergam linhas incompletas. Uma
+    reconstrução grava uma nova geração e só então troca o meta.json.
+    """
+
+    def __init__(self, organization_id: int, model_name: str, root: str | None = None):
+        self.directory = os.path.join(root or settings.LOCAL_INDEX_ROOT, str(organization_id), _slug(model_name))
+        self._snapshot: _Snapshot | None = None
+        self._snapshot_lock = threading.Lock()
+
+    # --- Arquivos ---
+
+    def _path(self, name: str, generation: int | None = None) -> str:
+        if generation is not None:
+            name = name.replace("<g>", str(generation))
+        return os.path.join(self.directory, name)
+
+    def read_meta(self) -> dict | None:
+        try:
+            with open(self._path("meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, meta: dict) -> None:
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path("meta.json"))
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _append_rows(self, name: str, generation: int, committed_rows: int, data: np.ndarray) -> None:
+        path = self._path(name, generation)
+        row_bytes = data.itemsize * (data.shape[1] if data.ndim == 2 else 1)
+        with open(path, "ab") as f:
+            # Descarta restos de uma escrita interrompida (além do que o meta.json confirma)
+            f.truncate(committed_rows * row_bytes)
+            f.write(np.ascontiguousarray(data).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_generation(self, generation: int, ids: np.ndarray, vectors: np.ndarray, dtype: str) -> dict:
+        meta = {
+            "generation": generation,
+            "dimension": int(vectors.shape[1]),
+            "dtype": dtype,
+            "count": 0,
+            "ivf": False,
+        }
+        for name in ("vectors-<g>.bin", "ids-<g>.bin", "lists-<g>.bin"):
+            open(self._path(name, generation), "wb").close()
+        if len(ids) >= settings.LOCAL_INDEX_IVF_MIN_VECTORS:
+            centroids = train_ivf(vectors, settings.LOCAL_INDEX_IVF_LISTS)
+            np.save(self._path("centroids-<g>.npy", generation), centroids)
+            self._append_rows("lists-<g>.bin", generation, 0, assign_lists(vectors, centroids))
+            meta["ivf"] = True
+        self._append_rows("vectors-<g>.bin", generation, 0, _quantize(vectors, dtype))
+        self._append_rows("ids-<g>.bin", generation, 0, ids)
+        meta["count"] = len(ids)
+        return meta
+
+    def _remove_generation(self, generation: int) -> None:
+        for name in ("vectors-<g>.bin", "ids-<g>.bin", "lists-<g>.bin", "centroids-<g>.npy"):
+            try:
+                os.remove(self._path(name, generation))
+            except FileNotFoundError:
+                pass
+
+    # --- Escrita (worker) ---
+
+    def rebuild(self, load: Callable[[], tuple[np.ndarray, np.ndarray]]) -> int:
+        """
+        Reconstrói o índice inteiro (nova geração) com os (ids, vetores)
+        devolvidos por 'load', chamado já com o índice travado.
+        Com LOCAL_INDEX_IVF_MIN_VECTORS linhas ou mais, treina as partições IVF.
+        """
+        with self._locked():
+            ids, vectors = load()
+            ids = np.asarray(ids, dtype=np.int64)
+            vectors = _normalize(vectors)
+            old = self.read_meta()
+            generation = old["generation"] + 1 if old else 0
+            dtype = old["dtype"] if old else settings.LOCAL_INDEX_DTYPE
+            if len(ids) == 0:
+                dimension = old["dimension"] if old else 0
+                vectors = np.zeros((0, dimension), dtype=np.float32)
+            self._write_meta(self._write_generation(generation, ids, vectors, dtype))
+            if old:
+                # Leitores com o arquivo antigo aberto continuam funcionando (unlink no Linux)
+                self._remove_generation(old["generation"])
+        return len(ids)
+
+    def append(self, ids, vectors) -> int:
+        """
+        Acrescenta linhas ao índice (incremental, após cada lote salvo no banco).
+        Ao passar de LOCAL_INDEX_IVF_MIN_VECTORS linhas, reconstrói com IVF.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return 0
+        with self._locked():
+            return self._append_locked(ids, vectors)
+
+    def append_missing(self, ids, load: Callable[[np.ndarray], tuple[np.ndarray, np.ndarray]]) -> int:
+        """
+        Acrescenta, dos 'ids', só os que ainda não estão no índice. 'load'
+        recebe esses ids e devolve (ids, vetores); é chamado com o índice
+        travado, então um 'append' concorrente não gera linhas repetidas.
+        """
+        with self._locked():
+            missing = self.missing(ids)
+            if len(missing) == 0:
+                return 0
+            found_ids, vectors = load(missing)
+            found_ids = np.asarray(found_ids, dtype=np.int64)
+            if len(found_ids) == 0:
+                return 0
+            return self._append_locked(found_ids, vectors)
+
+    def _append_locked(self, ids: np.ndarray, vectors) -> int:
+        # Chamado com o índice já travado ('append' e 'append_missing')
+        vectors = _normalize(vectors)
+        meta = self.read_meta()
+        if meta is None or meta["count"] == 0 and meta["dimension"] != vectors.shape[1]:
+            # Índice novo (ou vazio, criado antes de haver vetores para saber a dimensão)
+            if meta:
+                self._remove_generation(meta["generation"])
+            generation = meta["generation"] + 1 if meta else 0
+            meta = self._write_generation(generation, ids[:0], vectors[:0], settings.LOCAL_INDEX_DTYPE)
+        if meta["dimension"] != vectors.shape[1]:
+            raise ValueError(
+                f"Dimensão {vectors.shape[1]} diferente da do índice local ({meta['dimension']})."
+            )
+
+        generation, count = meta["generation"], meta["count"]
+        if meta["ivf"]:
+            centroids = np.load(self._path("centroids-<g>.npy", generation))
+            self._append_rows("lists-<g>.bin", generation, count, assign_lists(vectors, centroids))
+        self._append_rows("vectors-<g>.bin", generation, count, _quantize(vectors, meta["dtype"]))
+        self._append_rows("ids-<g>.bin", generation, count, ids)
+        meta["count"] = count + len(ids)
+        self._write_meta(meta)
+
+        if not meta["ivf"] and meta["count"] >= settings.LOCAL_INDEX_IVF_MIN_VECTORS:
+            snapshot = self._open(meta, ())
+            self._write_meta(self._write_generation(
+                generation + 1, np.array(snapshot.ids), _as_float32(snapshot.vectors), meta["dtype"]
+            ))
+            self._remove_generation(generation)
+        return len(ids)
+
+    # --- Leitura (API) ---
+
+    def missing(self, ids) -> np.ndarray:
+        """
+        Dos 'ids', os que não estão no índice (ordenados, sem repetição).
+        Percorre os ids do índice em blocos: uma leitura sequencial do arquivo.
+        """
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        snapshot = self.snapshot()
+        if snapshot is None or snapshot.count == 0 or len(ids) == 0:
+            return ids
+        present = np.zeros(len(ids), dtype=bool)
+        for start in range(0, snapshot.count, SEARCH_BLOCK_ROWS):
+            present |= np.isin(ids, snapshot.ids[start:start + SEARCH_BLOCK_ROWS])
+        return ids[~present]
+
+    def _open(self, meta: dict, meta_version: tuple) -> _Snapshot:
+        generation, count, dimension = meta["generation"], meta["count"], meta["dimension"]
+        dtype = DTYPES[meta["dtype"]]
+
+        def mapped(name: str, item_dtype, shape) -> np.ndarray:
+            if count == 0:
+                return np.zeros(shape, dtype=item_dtype)
+            return np.memmap(self._path(name, generation), dtype=item_dtype, mode="r", shape=shape)
+
+        lists = centroids = None
+        if meta["ivf"]:
+            lists = mapped("lists-<g>.bin", np.int32, (count,))
+            centroids = np.load(self._path("centroids-<g>.npy", generation))
+        return _Snapshot(
+            meta_version=meta_version,
+            count=count,
+            vectors=mapped("vectors-<g>.bin", dtype, (count, dimension)),
+            ids=mapped("ids-<g>.bin", np.int64, (count,)),
+            lists=lists,
+            centroids=centroids,
+        )
+
+    def snapshot(self) -> _Snapshot | None:
+        """
+        Estado atual do índice; reabre os arquivos só quando o meta.json muda.
+        """
+        try:
+            # O meta.json é sempre substituído (os.replace), então o inode muda a cada escrita
+            stat = os.stat(self._path("meta.json"))
+            meta_version = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+        with self._snapshot_lock:
+            if self._snapshot is None or self._snapshot.meta_version != meta_version:
+                meta = self.read_meta()
+                self._snapshot = self._open(meta, meta_version) if meta else None
+            return self._snapshot
+
+    def search(self, query_embedding, top_k: int, probes: int | None = None) -> list[tuple[int, float]] | None:
+        """
+        Retorna até top_k pares (chunk_id, distância de cosseno), do mais
+        próximo ao mais distante, ou None se o índice não existe.
+        Com IVF, só as 'probes' partições mais próximas da consulta são lidas.
+        """
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return None
+        if snapshot.count == 0:
+            return []
+
+        query = _normalize(query_embedding)
+        if snapshot.centroids is not None:
+            probes = min(probes or settings.LOCAL_INDEX_IVF_PROBES, len(snapshot.centroids))
+            nearest_lists = np.argpartition(-(snapshot.centroids @ query), probes - 1)[:probes]
+            rows = np.flatnonzero(np.isin(snapshot.lists, nearest_lists))
+        else:
+            rows = None
+
+        if rows is not None:
+            scores = _as_float32(snapshot.vectors[rows]) @ query
+        elif snapshot.vectors.dtype == np.float32:
+            scores = snapshot.vectors @ query
+        else:
+            scores = np.concatenate([
+                _as_float32(snapshot.vectors[start:start + SEARCH_BLOCK_ROWS]) @ query
+                for start in range(0, snapshot.count, SEARCH_BLOCK_ROWS)
+            ])
+
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        positions = rows[best] if rows is not None else best
+        return [(int(snapshot.ids[p]), float(1 - scores[b])) for p, b in zip(positions, best)]
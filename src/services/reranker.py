@@ -0,0 +1,156 @@
+# src/services/reranker.py
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from src.core.config import settings
+from src.core.metrics import span
+from src.schemas.search import SearchResultChunk
+
+
+class CrossEncoderReranker:
+    """
+    Reordena os candidatos da busca com um cross-encoder, que lê a consulta
+    e o trecho juntos e pontua a relevância melhor que o bi-encoder.
+
+    O modelo é carregado na subida da API ('warm_up', com RERANK_PRELOAD)
+    ou, sem isso, no primeiro uso. Todos os pares (consulta, trecho) de uma
+    requisição são pontuados em um único forward pass na CPU.
+    """
+
+    def __init__(self, model_name: str, max_length: int, max_in_flight: int):
+        self.model_name = model_name
+        self.max_length = max_length
+        self.calls = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.total_ms = 0.0
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # Liberado quando a pontuação termina no threadpool, não quando a
+        # requisição desiste dela: cálculos abandonados continuam contando
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._slot_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    print(f"[RERANK] Carregando cross-encoder: {self.model_name}...")
+                    self._model = CrossEncoder(self.model_name, device="cpu", max_length=self.max_length)
+                    print("[RERANK] Cross-encoder carregado com sucesso.")
+        return self._model
+
+    def score(self, query: str, contents: list[str]) -> np.ndarray:
+        """
+        Pontua cada trecho contra a consulta (quanto maior, mais relevante).
+        """
+        pairs = [(query, content) for content in contents]
+        return self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False, convert_to_numpy=True)
+
+    def warm_up(self) -> None:
+        """
+        Carrega o modelo e faz uma predição descartável (a primeira
+        execução na CPU é bem mais lenta que as seguintes).
+        """
+        self.score("aquecimento", ["aquecimento"])
+
+    def _score_in_slot(self, call: dict, query: str, contents: list[str]) -> np.ndarray | None:
+        # Roda no threadpool; o slot já foi tomado por 'rerank'. Se a requisição
+        # desistiu antes de a thread começar, quem libera o slot é ela
+        with self._slot_lock:
+            if call["abandoned"]:
+                return None
+            call["started"] = True
+        try:
+            return self.score(query, contents)
+        finally:
+            self._in_flight.release()
+
+    def _abandon(self, call: dict) -> None:
+        with self._slot_lock:
+            call["abandoned"] = True
+            started = call["started"]
+        if not started:
+            self._in_flight.release()
+
+    async def rerank(
+        self,
+        query: str,
+        results: list[SearchResultChunk],
+        top_k: int,
+        timeout_ms: float
+    ) -> tuple[list[SearchResultChunk], float, bool]:
+        """
+        Reordena 'results' e devolve (top_k resultados, tempo em ms, se o rerank foi aplicado).
+        Se o cross-encoder não responder em 'timeout_ms', mantém a ordem do
+        bi-encoder. O cálculo em andamento não é interrompido (roda no
+        threadpool), mas a requisição não espera por ele. Com
+        RERANK_MAX_IN_FLIGHT pontuações já rodando, nem tenta: mantém a ordem
+        sem ocupar mais uma thread do threadpool.
+        """
+        if len(results) <= 1:
+            return results[:top_k], 0.0, False
+
+        if not self._in_flight.acquire(blocking=False):
+            with self._stats_lock:
+                self.calls += 1
+                self.skipped += 1
+            print("[RERANK] Cross-encoder ocupado; mantendo a ordem do bi-encoder.")
+            return results[:top_k], 0.0, False
+
+        start = time.perf_counter()
+        call = {"started": False, "abandoned": False}
+        try:
+            with span("rerank"):
+                scores = await asyncio.wait_for(
+                    run_in_threadpool(self._score_in_slot, call, query, [r.content for r in results]),
+                    timeout=timeout_ms / 1000
+                )
+        except asyncio.CancelledError:
+            # Cliente desconectou; a thread pode nem ter saído da fila do threadpool
+            self._abandon(call)
+            raise
+        except asyncio.TimeoutError:
+            self._abandon(call)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._stats_lock:
+                self.calls += 1
+                self.timeouts += 1
+                self.total_ms += elapsed_ms
+            print(f"[RERANK] Orçamento de {timeout_ms:.0f} ms excedido; mantendo a ordem do bi-encoder.")
+            return results[:top_k], elapsed_ms, False
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self.calls += 1
+            self.total_ms += elapsed_ms
+
+        order = np.argsort(-scores)[:top_k]
+        reranked = [results[i].model_copy(update={"rerank_score": float(scores[i])}) for i in order]
+        return reranked, elapsed_ms, True
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "loaded": self._model is not None,
+                "calls": self.calls,
+                "timeouts": self.timeouts,
+                "skipped": self.skipped,
+                "avg_ms": self.total_ms / self.calls if self.calls else 0.0,
+            }
+
+
+reranker = CrossEncoderReranker(
+    model_name=settings.RERANK_MODEL_NAME,
+    max_length=settings.RERANK_MAX_LENGTH,
+    max_in_flight=settings.RERANK_MAX_IN_FLIGHT,
+)
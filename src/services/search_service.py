@@ -1,71 +1,541 @@
 # src/services/search_service.py
 
-import os
-from sqlalchemy.orm import Session
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import AsyncIterator, NamedTuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text
-from sentence_transformers import SentenceTransformer
-from litellm import completion
+from src.core.cache import TTLCache
 from src.core.config import settings
+from src.core import metrics
+from src.core.metrics import observe_stage, span
 
 from src.models.document import DocumentChunk
+from src.models.organization import Organization
 from src.schemas.search import SearchResultChunk, QAResponse
+from src.services import context_builder, llm_service
+from src.services.answer_cache import answer_cache
+from src.services.document_versions import get_document_versions
+from src.services.embedding_backends import EmbeddingBackend, get_embedding_backend
+from src.services.embedding_batcher import MicroBatchEncoder
+from src.services.embedding_cache import query_embedding_cache
+from src.services.embedding_migration import EmbeddingSlot, resolve_search_slot
+from src.services.local_vector_store import LocalVectorStore
 
-# Configura a chave de API da Groq
-os.environ["GROQ_API_KEY"] = settings.GROQ_API_KEY
+# EMBEDDINGS (Hugging Face Local, backend escolhido em EMBEDDING_BACKEND)
+# Organizações já migradas para EMBEDDING_NEXT_MODEL_NAME usam o backend
+# do modelo de destino (ver 'embedding_migration.resolve_search_slot').
+embedding_model = get_embedding_backend()
 
-# EMBEDDINGS (Hugging Face Local)
-MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
-embedding_model = SentenceTransformer(MODEL_NAME)
 
+@lru_cache
+def get_query_encoder(backend: EmbeddingBackend) -> MicroBatchEncoder:
+    # Consultas concorrentes (de várias requisições) são codificadas em lote
+    return MicroBatchEncoder(
+        backend.encode,
+        max_batch_size=settings.QUERY_MICROBATCH_MAX_SIZE,
+        max_wait_ms=settings.QUERY_MICROBATCH_MAX_WAIT_MS,
+    )
 
-def semantic_search(
-    db: Session, 
-    query: str, 
-    organization_id: int, 
-    top_k: int = 5
-) -> list[SearchResultChunk]:
+
+query_encoder = get_query_encoder(embedding_model)
+
+
+def _encode_fn(backend: EmbeddingBackend):
+    return get_query_encoder(backend).encode if settings.QUERY_MICROBATCH_ENABLED else backend.encode
+
+
+def encode_query(query: str, backend: EmbeddingBackend | None = None) -> list[float]:
     """
-    Realiza a busca semântica no banco de dados.
+    Gera o embedding da consulta, reaproveitando o cache quando possível.
+    Em caso de falha no cache, a consulta entra no micro-batch compartilhado.
+    """
+    backend = backend or embedding_model
+    embedding = query_embedding_cache.get_or_compute(query, backend.key, _encode_fn(backend))
+    return embedding.tolist()
+
+
+async def encode_query_async(query: str, backend: EmbeddingBackend | None = None) -> list[float]:
+    """
+    Versão de 'encode_query' para o event loop: o acerto no cache em memória
+    é resolvido na hora; Redis e modelo (bloqueantes) rodam no threadpool.
+    """
+    backend = backend or embedding_model
+    with span("query_encode"):
+        embedding = query_embedding_cache.get_local(query, backend.key)
+        if embedding is None:
+            embedding = await run_in_threadpool(
+                query_embedding_cache.get_or_compute, query, backend.key, _encode_fn(backend), False
+            )
+    return embedding.tolist()
+
+
+async def apply_index_params(
+    db: AsyncSession,
+    top_k: int,
+    ef_search: int | None = None,
+    probes: int | None = None
+) -> None:
+    """
+    Ajusta o recall do índice ANN apenas para a transação atual (SET LOCAL),
+    sem afetar outras conexões do pool.
+    """
+    if settings.VECTOR_INDEX_TYPE == "ivfflat":
+        await db.execute(
+            text("SELECT set_config('ivfflat.probes', :value, true)"),
+            {"value": str(probes or settings.SEARCH_IVFFLAT_PROBES)}
+        )
+    else:
+        # O HNSW nunca devolve mais que 'ef_search' candidatos
+        ef_search = max(ef_search or settings.SEARCH_HNSW_EF_SEARCH, top_k)
+        await db.execute(
+            text("SELECT set_config('hnsw.ef_search', :value, true)"),
+            {"value": str(ef_search)}
+        )
+
+
+async def execute_search(
+    db: AsyncSession,
+    sql_query,
+    params: dict,
+    top_k: int,
+    index_k: int,
+    ef_search: int | None = None,
+    probes: int | None = None
+) -> list:
+    """
+    Executa a busca pelo índice ANN e, se vierem menos de top_k linhas,
+    refaz a mesma consulta sem ele (busca exata).
+
+    O índice é um só para todas as organizações: o HNSW devolve no máximo
+    'ef_search' candidatos (o IVFFlat, os de 'probes' listas) e o filtro por
+    organização é aplicado depois. Em uma organização pequena, poucos ou
+    nenhum desses candidatos são dela. A busca exata da organização pequena
+    é barata: com 'enable_indexscan' desligado, o índice ANN (que não tem
+    bitmap scan) sai do plano, mas os índices B-tree dos filtros continuam.
+    """
+    await apply_index_params(db, top_k=index_k, ef_search=ef_search, probes=probes)
+    rows = (await db.execute(sql_query, params)).fetchall()
+    if len(rows) >= top_k or not settings.SEARCH_EXACT_FALLBACK:
+        return rows
+    metrics.SEARCH_EXACT_FALLBACKS.inc()
+    previous = await db.scalar(text("SELECT current_setting('enable_indexscan')"))
+    await db.execute(text("SELECT set_config('enable_indexscan', 'off', true)"))
+    rows = (await db.execute(sql_query, params)).fetchall()
+    # O restante da transação (ex: as consultas do RAG) volta a usar os índices
+    await db.execute(text("SELECT set_config('enable_indexscan', :value, true)"), {"value": previous})
+    return rows
+
+
+# '{embedding}' é a coluna de vetores da organização: 'dc.embedding' ou,
+# para organizações migradas, 'next_embedding' (ver 'search_sql').
+SEARCH_COLUMNS = """
+        dc.document_id,
+        dc.page_number,
+        dc.content,
+        {embedding} <=> CAST(:query_embedding AS vector) AS similarity"""
+
+# A montagem do contexto do RAG também usa as posições e os embeddings dos chunks
+CONTEXT_COLUMNS = SEARCH_COLUMNS + """,
+        dc.char_start,
+        dc.char_end,
+        {embedding} AS embedding"""
+
+VECTOR_SEARCH_TEMPLATE = """
+    SELECT {columns}
+    FROM 
+        document_chunks AS dc
+    JOIN 
+        documents AS d ON dc.document_id = d.id
+    WHERE 
+        d.organization_id = :organization_id
+    ORDER BY 
+        similarity
+    LIMIT :top_k
+    """
+
+# Perna vetorial: ids e distância exata dos {limit} vizinhos mais próximos
+VECTOR_CANDIDATES = """
+            SELECT dc.id, {embedding} <=> CAST(:query_embedding AS vector) AS distance
+            FROM document_chunks AS dc
+            JOIN documents AS d ON dc.document_id = d.id
+            WHERE d.organization_id = :organization_id
+            ORDER BY distance
+            LIMIT {limit}"""
+
+# Com VECTOR_QUANTIZATION, a primeira passada percorre o índice quantizado
+# ('{first_pass}') e traz :rescore_k candidatos, que são reordenados pela
+# distância exata sobre o vetor float32 (calculada só para esses candidatos).
+QUANTIZED_VECTOR_CANDIDATES = """
+            SELECT id, distance
+            FROM (
+                SELECT dc.id, {embedding} <=> CAST(:query_embedding AS vector) AS distance
+                FROM document_chunks AS dc
+                JOIN documents AS d ON dc.document_id = d.id
+                WHERE d.organization_id = :organization_id
+                ORDER BY {first_pass}
+                LIMIT :rescore_k
+            ) AS q
+            ORDER BY distance
+            LIMIT {limit}"""
+
+QUANTIZED_VECTOR_SEARCH_TEMPLATE = """
+    SELECT {columns}
+    FROM ({vector_candidates}
+    ) AS v
+    JOIN document_chunks AS dc ON dc.id = v.id
+    ORDER BY v.distance
+    LIMIT :top_k
+    """
+
+# Distância da primeira passada, idêntica à expressão do índice criado pela migração
+QUANTIZED_DISTANCES = {
+    "halfvec": "CAST({embedding} AS halfvec({dim})) <=> CAST(:query_embedding AS halfvec({dim}))",
+    "binary": "CAST(binary_quantize({embedding}) AS bit({dim})) <~> binary_quantize(CAST(:query_embedding AS vector({dim})))",
+}
+
+# Busca híbrida em uma única ida ao banco: as duas "pernas" (vetorial e
+# full-text em português) trazem até :candidate_k candidatos cada, e a
+# fusão por Reciprocal Rank Fusion soma 1 / (:rrf_k + posição) de cada perna.
+# 'similarity' continua sendo a distância de cosseno, como na busca vetorial.
+HYBRID_SEARCH_TEMPLATE = """
+    WITH vector_leg AS (
+        SELECT id, row_number() OVER (ORDER BY distance) AS rank
+        FROM ({vector_candidates}
+        ) AS v
+    ),
+    lexical_leg AS (
+        SELECT id, row_number() OVER (ORDER BY score DESC) AS rank
+        FROM (
+            SELECT dc.id, ts_rank_cd(dc.content_tsv, q.query) AS score
+            FROM document_chunks AS dc
+            JOIN documents AS d ON dc.document_id = d.id,
+                websearch_to_tsquery('portuguese', :query) AS q(query)
+            WHERE d.organization_id = :organization_id
+              AND dc.content_tsv @@ q.query
+            ORDER BY score DESC
+            LIMIT :candidate_k
+        ) AS l
+    ),
+    fused AS (
+        SELECT
+            COALESCE(v.id, l.id) AS id,
+            COALESCE(1.0 / (:rrf_k + v.rank), 0) + COALESCE(1.0 / (:rrf_k + l.rank), 0) AS score
+        FROM vector_leg AS v
+        FULL OUTER JOIN lexical_leg AS l ON v.id = l.id
+    )
+    SELECT {columns}
+    FROM fused AS f
+    JOIN document_chunks AS dc ON dc.id = f.id
+    ORDER BY f.score DESC
+    LIMIT :top_k
+    """
+
+# Candidatos vindos do índice local: a distância é recalculada no banco só
+# para esses ids (pela chave primária), o que também descarta chunks que já
+# foram apagados e chunks de outras organizações.
+CHUNKS_BY_ID_TEMPLATE = """
+    SELECT {columns}
+    FROM 
+        document_chunks AS dc
+    JOIN 
+        documents AS d ON dc.document_id = d.id
+    WHERE 
+        dc.id = ANY(CAST(:ids AS integer[]))
+        AND d.organization_id = :organization_id
+    ORDER BY 
+        similarity
+    LIMIT :top_k
     """
-    
-    # --- 1. A LINHA CORRIGIDA ESTÁ AQUI ---
-    # Gera o embedding da consulta do usuário.
-    query_embedding = embedding_model.encode(query).tolist()
-    # ------------------------------------
 
-    # 2. Executar a consulta SQL com pgvector
-    db.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+SEARCH_TEMPLATES = {
+    "vector": VECTOR_SEARCH_TEMPLATE,
+    "hybrid": HYBRID_SEARCH_TEMPLATE,
+    "ids": CHUNKS_BY_ID_TEMPLATE,
+}
 
-    sql_query = text(
+
+def quantized_search(embedding_column: str) -> bool:
+    # O índice quantizado só existe sobre 'embedding'; 'next_embedding'
+    # (migração de modelo) continua com o índice em precisão total
+    return settings.VECTOR_QUANTIZATION != "none" and embedding_column == "dc.embedding"
+
+
+# Índice ANN que a consulta de cada VECTOR_QUANTIZATION usa (criado pelas
+# migrações) e a classe de operadores que a definição dele precisa ter
+VECTOR_INDEXES = {
+    "none": ("ix_document_chunks_embedding_ann", "vector_cosine_ops"),
+    "halfvec": ("ix_document_chunks_embedding_quantized", "halfvec_cosine_ops"),
+    "binary": ("ix_document_chunks_embedding_quantized", "bit_hamming_ops"),
+}
+
+
+async def check_vector_index(db: AsyncSession) -> None:
+    """
+    Confere, na subida da API, se o índice ANN do banco corresponde a
+    VECTOR_QUANTIZATION. A migração escolhe o índice pelo valor da variável
+    no 'alembic upgrade'; a consulta, pelo valor em tempo de execução. Se
+    divergirem, toda busca cairia em varredura sequencial: melhor não subir.
+    """
+    if settings.VECTOR_QUANTIZATION not in VECTOR_INDEXES:
+        raise RuntimeError(f"VECTOR_QUANTIZATION inválido: {settings.VECTOR_QUANTIZATION}")
+    index_name, opclass = VECTOR_INDEXES[settings.VECTOR_QUANTIZATION]
+    result = await db.execute(
+        text("SELECT indexdef FROM pg_indexes WHERE tablename = 'document_chunks' AND indexname = :name"),
+        {"name": index_name}
+    )
+    indexdef = result.scalar_one_or_none()
+    if indexdef is None or opclass not in indexdef:
+        raise RuntimeError(
+            f"VECTOR_QUANTIZATION={settings.VECTOR_QUANTIZATION!r}, mas o banco não tem o índice "
+            f"{index_name} ({opclass}); encontrado: {indexdef or 'nenhum'}. Rode as migrações "
+            f"com o mesmo valor ('alembic downgrade 6c1e9f4b2d87 && alembic upgrade head') "
+            f"ou corrija a variável."
+        )
+    print(f"[BUSCA] Índice ANN conferido: {index_name} ({opclass}).")
+
+
+def rescore_k(limit: int) -> int:
+    return limit * settings.SEARCH_RESCORE_FACTOR
+
+
+@lru_cache
+def search_sql(mode: str, embedding_column: str = "dc.embedding", with_context_columns: bool = False):
+    """
+    Monta (uma vez por combinação) a consulta vetorial, híbrida ou por ids
+    sobre a coluna de vetores indicada, com a primeira passada no índice
+    quantizado quando VECTOR_QUANTIZATION está ativa.
+    """
+    template = SEARCH_TEMPLATES.get(mode, VECTOR_SEARCH_TEMPLATE)
+    if quantized_search(embedding_column):
+        candidates = QUANTIZED_VECTOR_CANDIDATES.format(
+            embedding=embedding_column,
+            first_pass=QUANTIZED_DISTANCES[settings.VECTOR_QUANTIZATION].format(
+                embedding=embedding_column, dim=DocumentChunk.embedding.type.dim
+            ),
+            limit="{limit}",
+        )
+        if mode == "vector":
+            template = QUANTIZED_VECTOR_SEARCH_TEMPLATE
+    else:
+        candidates = VECTOR_CANDIDATES
+    columns = CONTEXT_COLUMNS if with_context_columns else SEARCH_COLUMNS
+    sql = text(template.format(
+        columns=columns.format(embedding=embedding_column),
+        vector_candidates=candidates.format(
+            embedding=embedding_column,
+            limit=":candidate_k" if mode == "hybrid" else ":top_k",
+        ),
+        embedding=embedding_column,
+    ))
+    if with_context_columns:
+        sql = sql.columns(embedding=DocumentChunk.next_embedding.type)
+    return sql
+
+
+class VectorIndex(ABC):
+    """
+    Backend da busca vetorial (k vizinhos mais próximos) de uma organização.
+    Devolve linhas no formato de 'search_sql': document_id, page_number,
+    content, similarity (distância de cosseno) e, com 'with_context_columns',
+    char_start, char_end e embedding.
+    """
+    name: str
+
+    @abstractmethod
+    async def search(
+        self,
+        db: AsyncSession,
+        organization_id: int,
+        slot: EmbeddingSlot,
+        query_embedding: list[float],
+        top_k: int,
+        ef_search: int | None = None,
+        probes: int | None = None,
+        with_context_columns: bool = False
+    ) -> list | None:
         """
-        SELECT 
-            dc.document_id,
-            dc.page_number,
-            dc.content,
-            dc.embedding <=> CAST(:query_embedding AS vector) AS similarity
-        FROM 
-            document_chunks AS dc
-        JOIN 
-            documents AS d ON dc.document_id = d.id
-        WHERE 
-            d.organization_id = :organization_id
-        ORDER BY 
-            similarity
-        LIMIT :top_k
+        None indica que o índice não está disponível para a organização
+        (ex: ainda não construído); o chamador recorre ao pgvector.
         """
-    )
-    
-    # Executa a query
-    results = db.execute(
-        sql_query,
-        {
-            "query_embedding": str(query_embedding), # Agora esta variável existe
+
+
+class PgVectorIndex(VectorIndex):
+    """
+    Índice ANN (HNSW/IVFFlat) do pgvector, dentro do PostgreSQL.
+    """
+    name = "pgvector"
+
+    async def search(self, db, organization_id, slot, query_embedding, top_k,
+                     ef_search=None, probes=None, with_context_columns=False):
+        index_k = rescore_k(top_k) if quantized_search(slot.column) else top_k
+        params = {
+            "query_embedding": str(query_embedding),
+            "organization_id": organization_id,
+            "top_k": top_k,
+            "rescore_k": index_k
+        }
+        sql_query = search_sql("vector", slot.column, with_context_columns)
+        with span("search_sql"):
+            return await execute_search(db, sql_query, params, top_k, index_k, ef_search, probes)
+
+
+class LocalVectorIndex(VectorIndex):
+    """
+    Índice em memória do próprio processo da API: um arquivo memory-mapped
+    por organização e modelo (ver 'LocalVectorStore'), com busca exata por
+    produto interno ou, em organizações grandes, por partições IVF.
+    Os workers acrescentam os chunks a cada lote gravado; a API só lê.
+
+    O banco só é consultado pela chave primária dos candidatos, para trazer
+    o conteúdo e reordenar os candidatos pela distância exata (float32), o
+    que corrige a aproximação dos vetores float16/int8 do arquivo. Como
+    chunks apagados (reprocessamentos) continuam no arquivo até a próxima
+    reconstrução, são pedidos SEARCH_RESCORE_FACTOR candidatos por resultado.
+    """
+    name = "local"
+
+    def __init__(self):
+        self._stores: dict[tuple[int, str], LocalVectorStore] = {}
+        self._lock = threading.Lock()
+
+    def store(self, organization_id: int, model_name: str) -> LocalVectorStore:
+        # Uma instância por (organização, modelo) mantém os arquivos abertos entre as consultas
+        key = (organization_id, model_name)
+        with self._lock:
+            if key not in self._stores:
+                self._stores[key] = LocalVectorStore(organization_id, model_name)
+            return self._stores[key]
+
+    async def search(self, db, organization_id, slot, query_embedding, top_k,
+                     ef_search=None, probes=None, with_context_columns=False):
+        store = self.store(organization_id, slot.backend.model_name)
+        with span("local_index"):
+            hits = await run_in_threadpool(store.search, query_embedding, rescore_k(top_k), probes)
+        if not hits:
+            return hits
+        params = {
+            "ids": [chunk_id for chunk_id, _ in hits],
+            "query_embedding": str(query_embedding),
             "organization_id": organization_id,
             "top_k": top_k
         }
-    ).fetchall()
+        sql_query = search_sql("ids", slot.column, with_context_columns)
+        with span("search_sql"):
+            return (await db.execute(sql_query, params)).fetchall()
+
+
+vector_indexes: dict[str, VectorIndex] = {index.name: index for index in (PgVectorIndex(), LocalVectorIndex())}
+
+# Backend de cada organização, com o mesmo cache curto do modelo de embedding
+_org_index_cache = TTLCache(maxsize=10000, ttl=settings.EMBEDDING_ORG_MODEL_CACHE_TTL_SECONDS)
 
-    # 3. Formata os resultados
+
+async def resolve_vector_index(db: AsyncSession, organization_id: int) -> VectorIndex:
+    name = _org_index_cache.get(organization_id)
+    if name is None:
+        name = await db.scalar(
+            select(Organization.vector_index).where(Organization.id == organization_id)
+        )
+        name = name or settings.VECTOR_INDEX_BACKEND
+        _org_index_cache.set(organization_id, name)
+    return vector_indexes.get(name, vector_indexes["pgvector"])
+
+
+def invalidate_cached_vector_index(organization_id: int) -> None:
+    _org_index_cache.pop(organization_id)
+
+
+class SearchRows(NamedTuple):
+    rows: list
+    query_embedding: list[float]
+    backend: EmbeddingBackend
+
+
+async def _search_rows(
+    db: AsyncSession,
+    query: str,
+    organization_id: int,
+    top_k: int,
+    ef_search: int | None,
+    probes: int | None,
+    mode: str,
+    candidate_k: int | None,
+    with_context_columns: bool = False
+) -> SearchRows:
+    """
+    Executa a busca (vetorial ou híbrida) e devolve as linhas do banco,
+    junto com o embedding da consulta e o backend (modelo) usado.
+    'with_context_columns' inclui posições e embeddings dos chunks.
+    """
+    # 1. Gera (ou busca no cache) o embedding da consulta com o modelo da organização.
+    slot = await resolve_search_slot(db, organization_id)
+    query_embedding = await encode_query_async(query, slot.backend)
+
+    # 2. Busca vetorial no backend da organização (pgvector ou índice local)
+    if mode != "hybrid":
+        index = await resolve_vector_index(db, organization_id)
+        rows = await index.search(
+            db, organization_id, slot, query_embedding, top_k, ef_search, probes, with_context_columns
+        )
+        if rows is None:
+            print(f"[BUSCA] Índice '{index.name}' indisponível para a organização ID: {organization_id}; "
+                  f"usando o pgvector.")
+            rows = await vector_indexes["pgvector"].search(
+                db, organization_id, slot, query_embedding, top_k, ef_search, probes, with_context_columns
+            )
+        return SearchRows(rows, query_embedding, slot.backend)
+
+    # 2. Busca híbrida: a perna full-text já exige o banco, então as duas
+    # pernas e a fusão continuam em uma única consulta com pgvector
+    candidate_k = max(candidate_k or settings.SEARCH_HYBRID_CANDIDATES, top_k)
+    index_k = rescore_k(candidate_k) if quantized_search(slot.column) else candidate_k
+    params = {
+        "query_embedding": str(query_embedding),
+        "organization_id": organization_id,
+        "top_k": top_k,
+        "query": query,
+        "candidate_k": candidate_k,
+        "rescore_k": index_k,
+        "rrf_k": settings.SEARCH_RRF_K
+    }
+    with span("search_sql"):
+        rows = await execute_search(
+            db, search_sql(mode, slot.column, with_context_columns), params, top_k, index_k, ef_search, probes
+        )
+    return SearchRows(rows, query_embedding, slot.backend)
+
+
+async def semantic_search(
+    db: AsyncSession, 
+    query: str, 
+    organization_id: int, 
+    top_k: int = 5,
+    ef_search: int | None = None,
+    probes: int | None = None,
+    mode: str = "vector",
+    candidate_k: int | None = None
+) -> list[SearchResultChunk]:
+    """
+    Realiza a busca semântica no banco de dados.
+    A ordenação por 'embedding <=> query' usa o índice ANN criado pela migração;
+    'ef_search'/'probes' controlam o recall (None = padrão do servidor).
+
+    Com mode="hybrid", combina a busca vetorial com a busca full-text (que
+    acha identificadores exatos, como números de contrato e CNPJs) via
+    Reciprocal Rank Fusion. 'candidate_k' é a profundidade de cada perna.
+
+    A busca vetorial usa o backend da organização ('organizations.vector_index'):
+    o pgvector ou o índice local em memória (ver 'VectorIndex').
+    """
+    results = (await _search_rows(
+        db, query, organization_id, top_k, ef_search, probes, mode, candidate_k
+    )).rows
+
+    # 3. Formata os resultados (as etapas 1 e 2 ficam em '_search_rows')
     search_results = [
         SearchResultChunk(
             document_id=row.document_id,
@@ -78,28 +548,53 @@ def semantic_search(
     return search_results
 
 
-def answer_question(
-    db: Session, 
-    query: str, 
-    organization_id: int
-) -> QAResponse:
+NO_CONTEXT_ANSWER = "Não encontrei informações relevantes sobre este tópico nos seus documentos."
+LLM_ERROR_ANSWER = "Ocorreu um erro ao gerar a resposta. Tente novamente."
+
+
+async def retrieve_context(
+    db: AsyncSession,
+    query: str,
+    organization_id: int,
+    mode: str = "vector"
+) -> list[SearchResultChunk]:
     """
-    Realiza o fluxo de RAG (Retrieval-Augmented Generation).
+    Etapa de "Retrieve" do RAG: traz RAG_CANDIDATES chunks e monta o contexto
+    com MMR (sem trechos quase repetidos), junção de chunks vizinhos e
+    limite de RAG_CONTEXT_TOKEN_BUDGET tokens.
     """
-    
-    # 1. Retrieve: Busca os 3 chunks mais relevantes
-    # Esta chamada agora funcionará corretamente.
-    context_chunks = semantic_search(
-        db, query=query, organization_id=organization_id, top_k=3
+    rows, query_embedding, _ = await _search_rows(
+        db, query, organization_id, top_k=settings.RAG_CANDIDATES, ef_search=None,
+        probes=None, mode=mode, candidate_k=None, with_context_columns=True
     )
-    
-    if not context_chunks:
-        return QAResponse(
-            answer="Não encontrei informações relevantes sobre este tópico nos seus documentos.",
-            sources=[]
+    candidates = [
+        context_builder.ContextCandidate(
+            document_id=row.document_id,
+            page_number=row.page_number,
+            char_start=row.char_start,
+            char_end=row.char_end,
+            content=row.content,
+            similarity=row.similarity,
+            embedding=row.embedding
+        )
+        for row in rows
+        if row.embedding is not None
+    ]
+    with span("context_build"):
+        return context_builder.build_context(
+            query_embedding,
+            candidates,
+            token_budget=settings.RAG_CONTEXT_TOKEN_BUDGET,
+            count_tokens=llm_service.count_tokens,
+            mmr_lambda=settings.RAG_MMR_LAMBDA,
+            duplicate_similarity=settings.RAG_NEAR_DUPLICATE_SIMILARITY
         )
 
-    # 2. Augment: Cria o contexto e o prompt
+
+def build_rag_messages(query: str, context_chunks: list[SearchResultChunk]) -> list[dict]:
+    """
+    Etapa de "Augment" do RAG: monta o contexto e o prompt enviados ao LLM.
+    """
     context_str = "\n\n---\n\n".join(
         [f"Trecho (Página {chunk.page_number}, Documento {chunk.document_id}):\n{chunk.content}" 
          for chunk in context_chunks]
@@ -113,22 +608,145 @@ def answer_question(
     )
     
     user_prompt = f"Contexto:\n{context_str}\n\n---\n\nPergunta do Usuário: {query}"
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+class AnswerCacheKey(NamedTuple):
+    # Embeddings de modelos diferentes não são comparáveis entre si,
+    # então o modelo da organização faz parte do 'bucket'
+    bucket: tuple
+    query_embedding: list[float]
+
+
+async def lookup_cached_answer(
+    db: AsyncSession,
+    query: str,
+    organization_id: int,
+    mode: str = "vector"
+) -> tuple[QAResponse | None, AnswerCacheKey | None]:
+    """
+    Procura no cache semântico uma resposta para uma pergunta equivalente.
+    Retorna (resposta ou None, chave para guardar a resposta gerada depois).
+    """
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None, None
+    slot = await resolve_search_slot(db, organization_id)
+    key = AnswerCacheKey(
+        bucket=(organization_id, slot.backend.key, mode),
+        query_embedding=await encode_query_async(query, slot.backend),
+    )
+    with span("answer_cache"):
+        cached = await run_in_threadpool(answer_cache.lookup, key.bucket, key.query_embedding)
+    return cached, key
+
+
+async def cited_document_versions(context_chunks: list[SearchResultChunk]) -> dict[int, int] | None:
+    """
+    Versões atuais dos documentos citados, lidas antes da chamada ao LLM.
+    None desativa o cache desta resposta (cache desligado ou Redis indisponível).
+    """
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    document_ids = sorted({chunk.document_id for chunk in context_chunks})
+    return await run_in_threadpool(get_document_versions, document_ids)
+
+
+def cache_answer(
+    key: AnswerCacheKey | None,
+    response: QAResponse,
+    versions: dict[int, int] | None,
+    llm_ms: float
+) -> None:
+    if key is None or versions is None:
+        return
+    answer_cache.store(key.bucket, key.query_embedding, response, versions, llm_ms)
+
+
+async def answer_question(
+    db: AsyncSession, 
+    query: str, 
+    organization_id: int,
+    mode: str = "vector"
+) -> QAResponse:
+    """
+    Realiza o fluxo de RAG (Retrieval-Augmented Generation).
+    Perguntas equivalentes a uma já respondida na organização são servidas
+    pelo cache semântico, sem busca nem chamada ao LLM.
+    """
+    cached, cache_key = await lookup_cached_answer(db, query, organization_id, mode)
+    if cached is not None:
+        return cached
+
+    # 1. Retrieve
+    context_chunks = await retrieve_context(db, query, organization_id, mode=mode)
     
-    # 3. Generate: Chama o LLM (Groq)
+    if not context_chunks:
+        return QAResponse(answer=NO_CONTEXT_ANSWER, sources=[])
+
+    # 2. Augment + 3. Generate
+    versions = await cited_document_versions(context_chunks)
+    start = time.perf_counter()
     try:
-        response = completion(
-            model="groq/mixtral-8x7b-32768", 
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.1
-        )
-        
-        answer = response.choices[0].message.content
-        
+        with span("llm"):
+            answer = await llm_service.complete(build_rag_messages(query, context_chunks))
+    except Exception as e:
+        print(f"Erro ao chamar o LLM ({settings.LLM_MODEL}): {e}")
+        return QAResponse(answer=LLM_ERROR_ANSWER, sources=context_chunks)
+    llm_ms = (time.perf_counter() - start) * 1000
+
+    response = QAResponse(answer=answer, sources=context_chunks)
+    cache_answer(cache_key, response, versions, llm_ms)
+    return response
+
+
+async def stream_cached_answer(response: QAResponse) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Emite uma resposta do cache semântico no mesmo formato de 'stream_answer'.
+    """
+    yield "sources", {"sources": [chunk.model_dump() for chunk in response.sources]}
+    yield "token", {"text": response.answer}
+    yield "done", {"ttft_ms": 0.0, "total_ms": 0.0, "tokens": 1, "cached": True}
+
+
+async def stream_answer(
+    query: str,
+    context_chunks: list[SearchResultChunk],
+    cache_key: AnswerCacheKey | None = None
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Versão em streaming da etapa de "Generate": produz eventos (nome, dados)
+    na ordem 'sources' -> 'token'... -> 'done' (ou 'error').
+    O evento 'done' traz o tempo até o primeiro token e o tempo total de geração.
+    Respostas geradas até o fim entram no cache semântico (se 'cache_key' for dada).
+    """
+    yield "sources", {"sources": [chunk.model_dump() for chunk in context_chunks]}
+
+    if not context_chunks:
+        yield "token", {"text": NO_CONTEXT_ANSWER}
+        yield "done", {"ttft_ms": 0.0, "total_ms": 0.0, "tokens": 1}
+        return
+
+    versions = await cited_document_versions(context_chunks)
+    start = time.perf_counter()
+    ttft_ms = None
+    tokens = []
+    try:
+        async for token in llm_service.stream_completion(build_rag_messages(query, context_chunks)):
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - start) * 1000
+                observe_stage("llm_ttft", ttft_ms / 1000)
+            tokens.append(token)
+            yield "token", {"text": token}
     except Exception as e:
-        print(f"Erro ao chamar o LLM (Groq): {e}")
-        answer = "Ocorreu um erro ao gerar a resposta. Tente novamente."
+        print(f"Erro ao chamar o LLM ({settings.LLM_MODEL}): {e}")
+        yield "error", {"detail": LLM_ERROR_ANSWER}
+        return
 
-    return QAResponse(answer=answer, sources=context_chunks)
\ No newline at end of file
+    total_ms = (time.perf_counter() - start) * 1000
+    observe_stage("llm", total_ms / 1000)
+    print(f"[QA] Resposta em streaming: {len(tokens)} tokens, TTFT {ttft_ms or 0:.0f} ms, total {total_ms:.0f} ms")
+    cache_answer(cache_key, QAResponse(answer="".join(tokens), sources=context_chunks), versions, total_ms)
+    yield "done", {"ttft_ms": round(ttft_ms or 0.0, 1), "total_ms": round(total_ms, 1), "tokens": len(tokens)}
\ No newline at end of file
@@ -1,16 +1,54 @@
 # src/services/user_service.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.cache import TTLCache
+from src.core.config import settings
 from src.models import user as user_model
 from src.schemas import user as user_schema
 
 # Importamos o Enum de papéis
 from src.models.user import UserRole
 
-def get_user_by_firebase_uid(db: Session, firebase_uid: str):
-    return db.query(user_model.User).filter(user_model.User.firebase_uid == firebase_uid).first()
+# Cache curto dos dados do usuário autenticado, indexado pelo firebase_uid.
+# Guarda apenas os valores das colunas (id, role, organization_id, ...),
+# nunca objetos ligados a uma sessão do banco.
+_user_cache = TTLCache(
+    maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL_SECONDS
+)
 
-def create_user(db: Session, user_in: user_schema.UserCreate, organization_id: int):
+async def get_user_by_firebase_uid(db: AsyncSession, firebase_uid: str):
+    result = await db.execute(
+        select(user_model.User).where(user_model.User.firebase_uid == firebase_uid)
+    )
+    return result.scalars().first()
+
+async def get_user_by_firebase_uid_cached(db: AsyncSession, firebase_uid: str) -> user_model.User | None:
+    """
+    Versão com cache de 'get_user_by_firebase_uid', usada na autenticação.
+    Em caso de acerto, retorna um User transiente (fora da sessão) montado
+    a partir do cache, sem nenhuma consulta ao banco.
+    """
+    cached = _user_cache.get(firebase_uid)
+    if cached is not None:
+        return user_model.User(**cached)
+
+    db_user = await get_user_by_firebase_uid(db, firebase_uid=firebase_uid)
+    if db_user:
+        _user_cache.set(firebase_uid, {
+            column.key: getattr(db_user, column.key)
+            for column in user_model.User.__table__.columns
+        })
+    return db_user
+
+def invalidate_cached_user(firebase_uid: str) -> None:
+    """
+    Remove o usuário do cache de autenticação (ex: após mudança de papel).
+    Outros processos da API expiram a entrada em até AUTH_USER_CACHE_TTL_SECONDS.
+    """
+    _user_cache.pop(firebase_uid)
+
+async def create_user(db: AsyncSession, user_in: user_schema.UserCreate, organization_id: int):
     """
     Cria um novo usuário e o associa a uma organização.
     Define o primeiro usuário como 'ADMIN' da organização.
@@ -23,31 +61,33 @@ def create_user(db: Session, user_in: user_schema.UserCreate, organization_id: i
         role=UserRole.ADMIN  # <<< Usamos o Enum aqui
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def get_users_by_organization(db: Session, organization_id: int):
+async def get_users_by_organization(db: AsyncSession, organization_id: int):
     """
     Retorna uma lista de todos os usuários de uma organização específica.
     """
-    return db.query(user_model.User).filter(
-        user_model.User.organization_id == organization_id
-    ).all()
+    result = await db.execute(
+        select(user_model.User).where(user_model.User.organization_id == organization_id)
+    )
+    return result.scalars().all()
 
 # --- NOVA FUNÇÃO 1 ---
-def get_user_by_id(db: Session, user_id: int) -> user_model.User | None:
+async def get_user_by_id(db: AsyncSession, user_id: int) -> user_model.User | None:
     """
     Busca um usuário pelo seu ID primário (integer).
     """
-    return db.query(user_model.User).filter(user_model.User.id == user_id).first()
+    return await db.get(user_model.User, user_id)
 
 # --- NOVA FUNÇÃO 2 ---
-def update_user_role(db: Session, db_user: user_model.User, new_role: UserRole) -> user_model.User:
+async def update_user_role(db: AsyncSession, db_user: user_model.User, new_role: UserRole) -> user_model.User:
     """
     Atualiza o papel (role) de um usuário no banco de dados.
     """
     db_user.role = new_role
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_cached_user(db_user.firebase_uid)
     return db_user
\ No newline at end of file
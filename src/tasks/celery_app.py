@@ -0,0 +1,146 @@
+import gc
+import os
+import sys
+import time
+from datetime import datetime
+
+from celery import Celery
+from celery.signals import before_task_publish, task_prerun, worker_init, worker_process_init
+from kombu import Queue
+
+from src.core import metrics
+from src.core.config import settings
+
+REDIS_URL = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0"
+
+# Filas separadas por tipo de trabalho, cada uma com os seus workers
+# (concurrency e prefetch próprios, ver docker-compose.yaml):
+# - extraction: leitura dos PDFs (I/O e PyMuPDF; não carrega o modelo)
+# - embedding: chunks, embeddings e gravação no banco (CPU, modelo na memória)
+# - finalization: tarefas curtas de conclusão e manutenção
+QUEUE_EXTRACTION = "extraction"
+QUEUE_EMBEDDING = "embedding"
+QUEUE_FINALIZATION = "finalization"
+
+VISIBILITY_TIMEOUT_SECONDS = 2 * (
+    settings.INGESTION_TASK_TIME_LIMIT_SECONDS + settings.INGESTION_RETRY_BACKOFF_MAX_SECONDS
+)
+
+# Instância única do Celery. O Redis é o broker e também o backend de
+# resultados (necessário para os chords da extração).
+celery_app = Celery(
+    "intellidocs",
+    broker=REDIS_URL,
+    backend=REDIS_URL,
+    include=["src.tasks.document_tasks", "src.tasks.embedding_tasks", "src.tasks.index_tasks"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    timezone="UTC",
+    # Resultados só interessam enquanto o chord está em andamento
+    result_expires=3600,
+    # Um worker sem '-Q' consome todas as filas (ambiente de desenvolvimento)
+    task_queues=[Queue(QUEUE_EXTRACTION), Queue(QUEUE_EMBEDDING), Queue(QUEUE_FINALIZATION)],
+    task_default_queue=QUEUE_FINALIZATION,
+    task_routes={
+        "process_document_task": {"queue": QUEUE_EXTRACTION},
+        "extract_page_range_task": {"queue": QUEUE_EXTRACTION},
+        "embed_extracted_pages_task": {"queue": QUEUE_EMBEDDING},
+        "backfill_embeddings_task": {"queue": QUEUE_EMBEDDING},
+        "finalize_document_task": {"queue": QUEUE_FINALIZATION},
+        "mark_document_failed_task": {"queue": QUEUE_FINALIZATION},
+        "rebuild_local_index_task": {"queue": QUEUE_FINALIZATION},
+    },
+    # Cada processo reserva uma mensagem por vez: uma tarefa longa não
+    # prende na fila do processo as mensagens que outro processo livre
+    # poderia executar (os workers de filas curtas aumentam o valor com
+    # '--prefetch-multiplier')
+    worker_prefetch_multiplier=1,
+    # Com acks_late, o Redis devolve à fila uma mensagem não confirmada depois
+    # do visibility_timeout (padrão: 1 h), mesmo com a tarefa ainda rodando; as
+    # novas tentativas com countdown também ficam sem confirmação até executar.
+    # O prazo cobre a tarefa mais longa e o maior backoff, com folga (a trava
+    # do documento, em document_locks, segura o que escapar disso).
+    broker_transport_options={"visibility_timeout": VISIBILITY_TIMEOUT_SECONDS},
+)
+
+
+# --- Métricas ---
+# O horário de publicação vai em um cabeçalho da mensagem; ao iniciar a
+# tarefa, a diferença é o tempo de espera na fila (descontando o 'countdown'/'eta').
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers["published_at"] = time.time()
+
+
+@task_prerun.connect
+def record_queue_wait(task=None, **kwargs):
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is None or not settings.METRICS_ENABLED:
+        return
+    ready_at = published_at
+    if task.request.eta:
+        ready_at = max(ready_at, datetime.fromisoformat(task.request.eta).timestamp())
+    metrics.CELERY_QUEUE_WAIT.labels(task=task.name).observe(max(time.time() - ready_at, 0.0))
+
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    metrics.start_worker_metrics_server()
+
+
+# --- Processos do worker ---
+# O pool 'prefork' cria os processos filhos com fork() depois do
+# 'worker_init'. O que o processo principal carrega antes disso (o modelo
+# de embedding) é compartilhado por todos os filhos, sem uma cópia por processo.
+
+_worker_concurrency = 1
+
+
+def consumes_queue(worker, queue: str) -> bool:
+    selected = worker.app.amqp.queues.consume_from
+    return not selected or queue in selected
+
+
+@worker_init.connect
+def preload_embedding_model(sender=None, **kwargs):
+    global _worker_concurrency
+    _worker_concurrency = getattr(sender, "concurrency", None) or 1
+    if sender is None or not settings.WORKER_PRELOAD_MODEL or not consumes_queue(sender, QUEUE_EMBEDDING):
+        return
+
+    # Import tardio: workers só de extração/finalização não carregam o PyTorch
+    from src.services.embedding_backends import get_embedding_backend
+    from src.services.embedding_migration import get_next_backend
+
+    print(f"[WORKER] Carregando modelo de embedding: {settings.EMBEDDING_MODEL_NAME} "
+          f"({settings.EMBEDDING_BACKEND}) antes do fork...")
+    get_embedding_backend()
+    get_next_backend()
+    # Move os objetos já criados para a geração permanente do coletor de lixo:
+    # sem isso, cada coleta nos filhos escreve nos cabeçalhos desses objetos e
+    # o copy-on-write acaba copiando as páginas do modelo para cada processo
+    gc.freeze()
+    print("[WORKER] Modelo de embedding carregado; os processos filhos compartilham a memória.")
+
+
+@worker_process_init.connect
+def limit_torch_threads(**kwargs):
+    """
+    Cada processo filho usa só a sua parte dos núcleos: com o padrão do
+    PyTorch (todos os núcleos em cada processo), 'concurrency' processos
+    disputam as mesmas CPUs e a vazão cai.
+    """
+    threads = settings.WORKER_TORCH_THREADS or max(1, (os.cpu_count() or 1) // _worker_concurrency)
+    # Vale para bibliotecas carregadas depois (OpenMP/MKL leem na inicialização)
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    if "torch" in sys.modules:
+        import torch
+
+        torch.set_num_threads(threads)
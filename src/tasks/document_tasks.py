@@ -1,93 +1,651 @@
+import hashlib
+import time
+from collections import Counter
+from contextlib import closing
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
 import fitz  # PyMuPDF
+import psycopg2
+import redis
+from celery import chord
+from celery.exceptions import Retry
+from redis.lock import Lock
+from sqlalchemy import exc as sa_exc, insert, literal, select
 from sqlalchemy.orm import Session
-from sentence_transformers import SentenceTransformer
 
 from .celery_app import celery_app
+from .index_tasks import index_new_chunks, reconcile_document_chunks
+from src.core import metrics
+from src.core.config import settings
+from src.db.copy_writer import copy_document_chunks
 from src.db.session import SessionLocal
-from src.services import document_servicedocker
 from src.models.document import Document, DocumentChunk
+from src.services import extraction_spool
+from src.services.chunking_service import TextChunk, iter_page_chunks
+from src.services.document_locks import acquire_document_lock, lock_timeout_seconds, release_document_lock
+from src.services.document_versions import bump_document_version
+from src.services.embedding_migration import get_next_backend
+from src.services.embedding_backends import get_embedding_backend
 
 # --- Carregamento do Modelo de IA ---
-# O modelo é carregado UMA VEZ quando o worker inicia,
-# economizando muito tempo e memória.
-MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
-print(f"Carregando modelo de embedding: {MODEL_NAME}...")
-embedding_model = SentenceTransformer(MODEL_NAME)
-print("Modelo de embedding carregado com sucesso.")
+# O modelo é carregado UMA VEZ por processo, no primeiro uso
+# ('get_embedding_backend' guarda a instância). Nos workers da fila de
+# embeddings ele já vem carregado do processo principal, antes do fork
+# (ver 'preload_embedding_model' em celery_app); os workers de extração
+# e finalização nunca o carregam.
 
 def get_db() -> Session:
     return SessionLocal()
 
-@celery_app.task(name="process_document_task")
-def process_document_task(document_id: int):
+
+# Erros transitórios (conexão com o banco/Redis caiu, timeout...): a tarefa é
+# reenfileirada com backoff exponencial e retoma do último checkpoint.
+# Qualquer outro erro marca o documento como FAILED na hora.
+TRANSIENT_ERRORS = (
+    sa_exc.OperationalError,
+    sa_exc.InterfaceError,
+    psycopg2.OperationalError,  # O COPY usa o cursor do psycopg2 diretamente
+    psycopg2.InterfaceError,
+    redis.ConnectionError,
+    redis.TimeoutError,
+)
+
+RETRY_OPTIONS = dict(
+    bind=True,
+    autoretry_for=TRANSIENT_ERRORS,
+    retry_backoff=True,
+    retry_backoff_max=settings.INGESTION_RETRY_BACKOFF_MAX_SECONDS,
+    retry_jitter=True,
+    max_retries=settings.INGESTION_MAX_RETRIES,
+    # Só confirma a mensagem ao terminar: se o worker morrer (ex: máquina
+    # preemptível), a tarefa volta para a fila e retoma do checkpoint.
+    # O broker reentrega mensagens não confirmadas depois do visibility_timeout
+    # (ver celery_app), que precisa ser maior que o limite de tempo abaixo.
+    acks_late=True,
+    reject_on_worker_lost=True,
+    # O limite "soft" vira uma exceção (documento FAILED); o outro mata o processo
+    soft_time_limit=settings.INGESTION_TASK_TIME_LIMIT_SECONDS,
+    time_limit=settings.INGESTION_TASK_TIME_LIMIT_SECONDS + 60,
+)
+
+
+# --- Pipeline de ingestão (geradores) ---
+# Cada etapa consome a anterior de forma preguiçosa, então apenas uma página
+# e um lote de chunks ficam em memória por vez, independente do tamanho do PDF.
+
+def iter_pages(pdf_document: fitz.Document, start: int = 0, end: int | None = None) -> Iterator[tuple[int, str]]:
+    """
+    Extrai o texto do PDF página por página (opcionalmente só do intervalo [start, end)).
+    Gera tuplas (page_number, texto), pulando páginas em branco.
+    As páginas são 1-indexadas para o usuário.
+    """
+    end = len(pdf_document) if end is None else end
+    for page_num in range(start, end):
+        page = pdf_document.load_page(page_num)
+        page_text = page.get_text("text")
+        if not page_text.strip():
+            continue
+        yield page_num + 1, page_text
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """
+    Agrupa um iterável em listas de até 'size' elementos.
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def find_existing_embeddings(
+    db: Session,
+    organization_id: int,
+    hashes: set[str],
+    vector_column=DocumentChunk.embedding,
+    model_column=DocumentChunk.embedding_model,
+    model_name: str | None = None
+) -> dict[str, list[float]]:
+    """
+    Busca embeddings já calculados para trechos de texto idênticos
+    (mesmo hash) em documentos da mesma organização, gerados pelo mesmo modelo.
+    Por padrão olha a coluna 'embedding'; a migração de modelo usa 'next_embedding'.
+    """
+    rows = db.execute(
+        select(DocumentChunk.content_hash, vector_column.label("vector"))
+        .join(Document, DocumentChunk.document_id == Document.id)
+        .where(
+            Document.organization_id == organization_id,
+            DocumentChunk.content_hash.in_(hashes),
+            vector_column.is_not(None),
+            model_column == (model_name or settings.EMBEDDING_MODEL_NAME),
+        )
+        .distinct(DocumentChunk.content_hash)
+    ).all()
+    return {row.content_hash: row.vector.tolist() for row in rows}
+
+
+def embed_with_reuse(
+    db: Session,
+    organization_id: int,
+    texts: dict[str, str],
+    backend,
+    vector_column=DocumentChunk.embedding,
+    model_column=DocumentChunk.embedding_model
+) -> tuple[dict[str, list[float]], int]:
+    """
+    Gera os embeddings de 'texts' (hash -> texto) com UMA chamada ao 'encode',
+    só para os textos que ainda não têm embedding salvo para o mesmo modelo.
+    Retorna (embeddings por hash, quantos textos foram codificados).
+    """
+    embeddings = find_existing_embeddings(
+        db, organization_id, set(texts), vector_column, model_column, backend.model_name
+    )
+    pending = {h: text for h, text in texts.items() if h not in embeddings}
+    if pending:
+        vectors = backend.encode(list(pending.values()), batch_size=settings.EMBEDDING_BATCH_SIZE)
+        # O 'tolist()' converte o vetor numpy em uma lista Python
+        embeddings.update(zip(pending, (vector.tolist() for vector in vectors)))
+    return embeddings, len(pending)
+
+
+def embed_batches(
+    db: Session,
+    organization_id: int,
+    chunk_batches: Iterable[list[TextChunk]],
+    stats: Counter
+) -> Iterator[list[DocumentChunk]]:
+    """
+    Gera os embeddings de cada lote de chunks com UMA chamada ao modelo
+    e devolve os DocumentChunks correspondentes (ainda sem 'document_id').
+
+    Trechos repetidos (cabeçalhos, páginas de modelo, ...) reaproveitam o
+    embedding já salvo no banco ou já calculado no lote, e só os textos
+    inéditos vão para o 'encode'. 'stats' acumula os chunks deduplicados.
+
+    Durante uma migração de modelo (EMBEDDING_NEXT_MODEL_NAME), cada chunk
+    também recebe o vetor do modelo de destino ('next_embedding'), para que
+    documentos novos não fiquem de fora quando a organização trocar de modelo.
+    """
+    embedding_model = get_embedding_backend()
+    next_backend = get_next_backend()
+    for batch in chunk_batches:
+        hashes = [content_hash(chunk.content) for chunk in batch]
+        texts = {h: chunk.content for h, chunk in zip(hashes, batch)}
+        with metrics.span("ingestion.embed"):
+            embeddings, encoded = embed_with_reuse(db, organization_id, texts, embedding_model)
+
+        next_embeddings = {}
+        if next_backend is not None:
+            with metrics.span("ingestion.embed_next"):
+                next_embeddings, _ = embed_with_reuse(
+                    db, organization_id, texts, next_backend,
+                    DocumentChunk.next_embedding, DocumentChunk.next_embedding_model
+                )
+
+        stats["chunks"] += len(batch)
+        stats["deduplicated_chunks"] += len(batch) - encoded
+        yield [
+            DocumentChunk(
+                content=chunk.content,
+                content_hash=h,
+                page_number=chunk.page_number,
+                char_start=chunk.char_start,
+                char_end=chunk.char_end,
+                embedding=embeddings[h],
+                embedding_model=embedding_model.model_name,
+                next_embedding=next_embeddings.get(h),
+                next_embedding_model=next_backend.model_name if next_backend else None,
+            )
+            for chunk, h in zip(batch, hashes)
+        ]
+
+
+def find_duplicate_document(db: Session, doc: Document) -> Document | None:
+    """
+    Procura um documento já processado com o mesmo conteúdo (SHA-256 do arquivo)
+    na mesma organização.
+    """
+    if not doc.content_hash:
+        return None
+    return db.query(Document).filter(
+        Document.organization_id == doc.organization_id,
+        Document.content_hash == doc.content_hash,
+        Document.status == "COMPLETED",
+        Document.id != doc.id,
+    ).first()
+
+
+def copy_chunks(db: Session, source_document_id: int, target_document_id: int) -> int:
+    """
+    Copia, dentro do banco, todos os chunks (com embeddings) de um documento
+    para outro, sem extrair nem codificar nada. Retorna quantos foram copiados.
+    """
+    columns = [
+        "content", "content_hash", "page_number", "char_start", "char_end",
+        "embedding", "embedding_model", "next_embedding", "next_embedding_model",
+    ]
+    result = db.execute(
+        insert(DocumentChunk).from_select(
+            ["document_id", *columns],
+            select(
+                literal(target_document_id),
+                *[getattr(DocumentChunk, column) for column in columns],
+            ).where(DocumentChunk.document_id == source_document_id),
+        )
+    )
+    return result.rowcount
+
+
+def flush_chunks(db: Session, doc: Document, chunks: list[DocumentChunk], checkpoint: int | None = None) -> int:
+    """
+    Salva um lote de chunks no banco e faz o commit, liberando a memória do lote.
+    Por padrão usa COPY (binário), bem mais rápido que o ORM para vetores;
+    INGESTION_WRITER="orm" volta ao 'bulk_save_objects'.
+    'checkpoint' (última página completa) é gravado na mesma transação dos chunks.
+    Depois do commit, os chunks entram no índice local (organizações com esse backend).
+    Retorna quantos chunks foram salvos.
+    """
+    for chunk in chunks:
+        chunk.document_id = doc.id
+    with metrics.span("ingestion.write"):
+        if settings.INGESTION_WRITER == "orm":
+            db.bulk_save_objects(chunks)
+        else:
+            copy_document_chunks(db, chunks, binary=settings.INGESTION_COPY_BINARY)
+        if checkpoint is not None and checkpoint > (doc.last_committed_page or 0):
+            doc.last_committed_page = checkpoint
+        db.commit()
+    with metrics.span("ingestion.local_index"):
+        index_new_chunks(db, doc, len(chunks))
+    return len(chunks)
+
+
+def prepare_resume(db: Session, doc: Document) -> int:
+    """
+    Prepara o documento para (re)processamento e retorna o checkpoint:
+    a última página cujos chunks estão todos salvos (0 = começar do início).
+    Apaga os chunks após o checkpoint (a página em andamento pode ter ficado
+    pela metade), então retomar nunca duplica chunks, e acrescenta ao índice
+    local os chunks salvos que não chegaram a ser indexados.
+    Um documento já COMPLETED sendo processado de novo começa do zero.
+    """
+    if doc.status == "COMPLETED":
+        doc.last_committed_page = None
+    checkpoint = doc.last_committed_page or 0
+    db.query(DocumentChunk).filter(
+        DocumentChunk.document_id == doc.id,
+        DocumentChunk.page_number > checkpoint,
+    ).delete(synchronize_session=False)
+    db.commit()
+    if checkpoint:
+        print(f"[RETOMADA] Documento ID: {doc.id} - retomando após a página {checkpoint}.")
+        with metrics.span("ingestion.local_index"):
+            reconcile_document_chunks(db, doc)
+    return checkpoint
+
+
+def record_ingestion_throughput(pages: int, chunks: int, seconds: float) -> None:
+    """
+    Páginas/s e chunks/s desta execução (inclui extração, embeddings e gravação).
+    """
+    metrics.INGESTED_PAGES.inc(pages)
+    metrics.INGESTED_CHUNKS.inc(chunks)
+    if pages and seconds > 0:
+        metrics.INGESTION_PAGES_PER_SECOND.observe(pages / seconds)
+        metrics.INGESTION_CHUNKS_PER_SECOND.observe(chunks / seconds)
+
+
+def ingest_pages(db: Session, doc: Document, pages: Iterable[tuple[int, str]]) -> Counter:
+    """
+    Executa o pipeline de ingestão sobre um iterável de páginas (page_number, texto):
+    chunks -> lotes -> embeddings -> gravação no banco.
+    Cada lote salvo avança o checkpoint do documento ('last_committed_page').
+    Retorna as estatísticas (total de chunks e chunks deduplicados).
+    """
+    stats = Counter(chunks=0, deduplicated_chunks=0)
+    last_page = doc.last_committed_page or 0
+    page_count = 0
+    start = time.perf_counter()
+
+    def track_pages(pages: Iterable[tuple[int, str]]) -> Iterator[tuple[int, str]]:
+        nonlocal last_page, page_count
+        for page_number, page_text in pages:
+            last_page = page_number
+            page_count += 1
+            yield page_number, page_text
+
+    text_chunks = iter_page_chunks(
+        track_pages(pages),
+        tokenizer=get_embedding_backend().tokenizer,
+        max_tokens=settings.CHUNK_MAX_TOKENS,
+        overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+    )
+    chunk_batches = batched(text_chunks, settings.INGESTION_BATCH_SIZE)
+    for chunks in embed_batches(db, doc.organization_id, chunk_batches, stats):
+        # A página do último chunk do lote pode continuar no próximo lote
+        flush_chunks(db, doc, chunks, checkpoint=chunks[-1].page_number - 1)
+
+    # Todas as páginas foram consumidas; quem chama faz o commit do checkpoint
+    doc.last_committed_page = max(last_page, doc.last_committed_page or 0)
+    record_ingestion_throughput(page_count, stats["chunks"], time.perf_counter() - start)
+    return stats
+
+
+def complete_document(db: Session, doc: Document, stats: Counter, reused_document_id: int | None = None) -> dict:
+    doc.status = "COMPLETED"
+    db.commit()
+    extraction_spool.remove_document(doc.id)
+    # Respostas em cache geradas com os chunks parciais deixam de valer
+    bump_document_version(doc.id)
+    print(f"[STATUS] Documento ID: {doc.id} - Status: COMPLETED. {stats['chunks']} chunks processados, "
+          f"{stats['deduplicated_chunks']} deduplicados.")
+    return {"document_id": doc.id, "reused_document_id": reused_document_id, **stats}
+
+
+def fail_document(db: Session, document_id: int, error: Exception | str) -> None:
+    db.rollback()
+    doc = db.query(Document).filter(Document.id == document_id).first()
+    if doc:
+        doc.status = "FAILED"
+        db.commit()
+    # Uma nova tentativa extrai de novo a partir do checkpoint
+    extraction_spool.remove_document(document_id)
+    print(f"[ERRO] Falha ao processar o documento ID: {document_id}. Erro: {error}")
+
+
+def retry_or_fail(task, db: Session, document_id: int, error: Exception) -> None:
+    """
+    Erro transitório com tentativas restantes: relança para o 'autoretry_for'
+    do Celery reagendar a tarefa (o documento continua em PROCESSING e a
+    próxima tentativa retoma do checkpoint). Caso contrário, marca FAILED.
+    """
+    if isinstance(error, Retry):
+        # Esperando a trava do documento (ver 'hold_document_lock')
+        raise error
+    if isinstance(error, TRANSIENT_ERRORS) and task.request.retries < task.max_retries:
+        db.rollback()
+        print(f"[RETRY] Documento ID: {document_id} - erro transitório "
+              f"(tentativa {task.request.retries + 1} de {task.max_retries}): {error}")
+        raise error
+    fail_document(db, document_id, error)
+
+
+def is_repeated_delivery(task) -> bool:
+    """
+    A mensagem já foi entregue antes: reentregue pelo broker (worker morto,
+    visibility_timeout) ou reagendada por 'retry'.
+    """
+    delivery_info = task.request.delivery_info or {}
+    return task.request.retries > 0 or bool(delivery_info.get("redelivered"))
+
+
+def hold_document_lock(
+    task,
+    db: Session,
+    document_id: int,
+    step_done: Callable[[Document], bool]
+) -> tuple[Lock | None, Document | None]:
+    """
+    Trava o documento durante a etapa e o carrega. Retorna (trava, documento);
+    o documento é None quando não há nada a fazer: ele não existe ou
+    'step_done' diz que a etapa já foi concluída (ex: a mesma mensagem
+    reentregue enquanto a primeira entrega ainda rodava; quando a primeira
+    termina, a segunda não repete a etapa).
+
+    Se outra execução está com o documento e a etapa ainda não foi concluída,
+    a tarefa volta para a fila e tenta de novo depois, até a trava ter tido
+    tempo de expirar sozinha; se ainda assim não for liberada, o documento
+    fica FAILED.
+    """
+    lock = acquire_document_lock(document_id)
+    doc = db.query(Document).filter(Document.id == document_id).first()
+    if not doc:
+        print(f"[ERRO] Documento ID: {document_id} não encontrado.")
+        return lock, None
+    if step_done(doc):
+        print(f"[LOCK] Documento ID: {document_id} - etapa '{task.name}' já concluída por outra execução.")
+        return lock, None
+    if lock is None:
+        wait_seconds = settings.DOCUMENT_LOCK_RETRY_SECONDS + settings.DOCUMENT_LOCK_WAIT_SECONDS
+        lock_retries = -(-lock_timeout_seconds() // wait_seconds) + 1  # Divisão com arredondamento para cima
+        print(f"[LOCK] Documento ID: {document_id} em uso por outra execução; "
+              f"nova tentativa em {settings.DOCUMENT_LOCK_RETRY_SECONDS}s.")
+        raise task.retry(
+            countdown=settings.DOCUMENT_LOCK_RETRY_SECONDS,
+            max_retries=task.max_retries + lock_retries,
+        )
+    return lock, doc
+
+
+def slice_end_page(start_page: int, last_page: int) -> int:
+    """
+    Última página da fatia de 'embed_extracted_pages_task' que começa depois
+    de 'start_page' (até EMBEDDING_TASK_MAX_PAGES páginas, 0 = sem limite).
+    """
+    limit = settings.EMBEDDING_TASK_MAX_PAGES
+    return min(start_page + limit, last_page) if limit else last_page
+
+
+def page_ranges(page_count: int, parts: int, first_page: int = 0) -> list[tuple[int, int]]:
+    """
+    Divide as páginas [first_page, page_count) em até 'parts' intervalos
+    contíguos de tamanho parecido.
+    """
+    size = -(-(page_count - first_page) // parts)  # Divisão com arredondamento para cima
+    return [(start, min(start + size, page_count)) for start in range(first_page, page_count, size)]
+
+
+@celery_app.task(name="process_document_task", **RETRY_OPTIONS)
+def process_document_task(self, document_id: int):
     """
-    Tarefa assíncrona para processar um documento:
-    1. Atualiza o status para 'PROCESSING'
-    2. Lê o arquivo PDF
-    3. Extrai o texto página por página
-    4. Gera o embedding para o texto de cada página
-    5. Salva o chunk (texto, página, embedding) no banco
-    6. Atualiza o status para 'COMPLETED' ou 'FAILED'
+    Tarefa assíncrona para processar um documento (fila 'extraction'):
+    1. Obtém o documento (se um arquivo idêntico já foi processado na
+       organização, apenas copia os chunks dele e termina; se uma execução
+       anterior foi interrompida, retoma após a última página salva)
+    2. Lê o arquivo PDF, dispara um chord do Celery (a extração do texto
+       por intervalos de páginas seguida de 'embed_extracted_pages_task')
+       e atualiza o status para 'PROCESSING'
+       (documentos com PARALLEL_EXTRACTION_MIN_PAGES páginas ou mais são
+       divididos em EXTRACTION_PARALLELISM intervalos extraídos em paralelo;
+       os demais, em um só)
+    3-5. Na fila 'embedding': chunks de até CHUNK_MAX_TOKENS tokens, em lotes
+       de INGESTION_BATCH_SIZE, embeddings de cada lote em uma única chamada
+       ao modelo (trechos já conhecidos reaproveitam o embedding salvo) e
+       gravação no banco
+    6. Na fila 'finalization': status 'COMPLETED' (ver 'finalize_document_task');
+       ou 'FAILED' em qualquer etapa
+       (erros transitórios reagendam a tarefa com backoff; ver TRANSIENT_ERRORS)
+    Retorna os intervalos de páginas disparados (ou o resumo, se deduplicado).
     """
     print(f"[TASK INICIADA] Processando documento ID: {document_id}")
     db = get_db()
-    
+    lock = None
+
     try:
-        # 1. Obter o documento e atualizar status
-        doc = db.query(Document).filter(Document.id == document_id).first()
+        # 1. Obter o documento. Uma reentrega desta mensagem que o encontra em
+        # PROCESSING não faz nada: a extração já foi disparada (ver o passo 2)
+        lock, doc = hold_document_lock(
+            self, db, document_id,
+            step_done=lambda doc: is_repeated_delivery(self) and doc.status in ("PROCESSING", "COMPLETED"),
+        )
         if not doc:
-            print(f"[ERRO] Documento ID: {document_id} não encontrado.")
             return
 
+        checkpoint = prepare_resume(db, doc)
+        # Reprocessamento: invalida as respostas em cache que citaram o documento
+        bump_document_version(doc.id)
+
+        # Arquivo idêntico já processado: reaproveita todos os chunks
+        duplicate = find_duplicate_document(db, doc) if not checkpoint else None
+        if duplicate:
+            copied = copy_chunks(db, source_document_id=duplicate.id, target_document_id=doc.id)
+            print(f"[DEDUP] Documento ID: {doc.id} - {copied} chunks reaproveitados do documento ID: {duplicate.id}.")
+            stats = Counter(chunks=copied, deduplicated_chunks=copied)
+            result = complete_document(db, doc, stats, reused_document_id=duplicate.id)
+            index_new_chunks(db, doc, copied)
+            return result
+
+        with fitz.open(doc.file_path) as pdf_document:
+            page_count = len(pdf_document)
+
+        # 2. Extração em um chord; documentos grandes são divididos em intervalos paralelos
+        # (as páginas são 1-indexadas, então o checkpoint é o índice da próxima página)
+        remaining_pages = page_count - checkpoint
+        parts = settings.EXTRACTION_PARALLELISM if remaining_pages >= settings.PARALLEL_EXTRACTION_MIN_PAGES else 1
+        ranges = page_ranges(page_count, max(parts, 1), first_page=checkpoint) if remaining_pages > 0 else []
+        embed = embed_extracted_pages_task.s(
+            doc.id, cursor={"range": 0, "offset": 0, "page": checkpoint}
+        ).on_error(mark_document_failed_task.si(doc.id))
+        if ranges:
+            chord(extract_page_range_task.s(doc.id, doc.file_path, start, end) for start, end in ranges)(embed)
+        else:
+            # Todas as páginas já estavam salvas: só falta concluir
+            embed.delay([])
+        # O status muda só depois do disparo: se a mensagem for publicada e o
+        # worker morrer antes do commit, a reentrega dispara a extração de novo
+        # (as fatias repetidas são descartadas pelo checkpoint)
         doc.status = "PROCESSING"
         db.commit()
         print(f"[STATUS] Documento ID: {doc.id} - Status: PROCESSING")
+        print(f"[STATUS] Documento ID: {doc.id} - {remaining_pages} páginas divididas em {len(ranges)} intervalos.")
+        return {"document_id": doc.id, "page_ranges": ranges}
+
+    except Exception as e:
+        # 6. Reagendar (erro transitório) ou atualizar status para FAILED
+        retry_or_fail(self, db, document_id, e)
+    finally:
+        release_document_lock(lock)
+        db.close()
+
+
+@celery_app.task(name="extract_page_range_task")
+def extract_page_range_task(document_id: int, file_path: str, start: int, end: int) -> dict:
+    """
+    Extrai o texto das páginas [start, end) de um PDF. Cada subtarefa abre
+    o arquivo de forma independente, então os intervalos rodam em paralelo
+    em processos (ou máquinas) diferentes.
+
+    O texto vai para o spool de extração (EXTRACTION_SPOOL_ROOT), página a
+    página; o resultado do chord leva só os metadados do arquivo, não o texto.
+    """
+    with fitz.open(file_path) as pdf_document:
+        return extraction_spool.write_range(document_id, start, end, iter_pages(pdf_document, start, end))
 
-        # 2. Abrir o arquivo PDF
-        pdf_document = fitz.open(doc.file_path)
-        
-        chunks_para_salvar = []
-
-        # 3. Iterar página por página
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            page_text = page.get_text("text") # Extrai o texto
-            
-            if not page_text.strip(): # Pula páginas em branco
-                continue
-
-            # 4. Gerar o embedding para o texto da página
-            # O 'tolist()' converte o vetor numpy em uma lista Python
-            embedding = embedding_model.encode(page_text).tolist()
-
-            # 5. Criar o objeto DocumentChunk
-            new_chunk = DocumentChunk(
-                document_id=doc.id,
-                content=page_text,
-                page_number=page_num + 1,  # Páginas são 1-indexadas para o usuário
-                embedding=embedding
-            )
-            chunks_para_salvar.append(new_chunk)
 
-        pdf_document.close()
+@celery_app.task(name="embed_extracted_pages_task", **RETRY_OPTIONS)
+def embed_extracted_pages_task(
+    self,
+    extracted_ranges: list[dict],
+    document_id: int,
+    previous_stats: dict | None = None,
+    cursor: dict | None = None
+):
+    """
+    Callback do chord de extração: recebe os metadados de cada intervalo na
+    ordem em que os intervalos foram criados (ou seja, na ordem das páginas),
+    lê o texto do spool uma página por vez e executa o restante do pipeline
+    (chunks, embeddings, gravação). Uma nova tentativa lê os mesmos arquivos
+    e pula as páginas já salvas.
+
+    Cada execução processa no máximo EMBEDDING_TASK_MAX_PAGES páginas e
+    reenfileira o restante (com as estatísticas acumuladas em
+    'previous_stats'): um documento grande volta para o fim da fila a cada
+    fatia, e os pequenos que chegaram depois não esperam por ele inteiro.
+    A mensagem seguinte leva o 'cursor' do spool (intervalo e posição em
+    bytes onde a fatia parou, e a página onde a próxima fatia começa), então
+    cada fatia lê só as próprias páginas. Uma fatia termina salvando o
+    checkpoint na última página dela: uma entrega repetida da mesma mensagem
+    encontra o checkpoint ali e não faz nada.
+    """
+    db = get_db()
+    lock = None
+    try:
+        cursor = dict(cursor or {"range": 0, "offset": 0})
+        last_page = extraction_spool.last_page(extracted_ranges)
+        start_page = cursor.get("page")
+
+        def slice_done(doc: Document) -> bool:
+            if doc.status == "COMPLETED":
+                return True
+            if start_page is None:
+                return False
+            return start_page < slice_end_page(start_page, last_page) <= (doc.last_committed_page or 0)
+
+        lock, doc = hold_document_lock(self, db, document_id, step_done=slice_done)
+        if not doc:
+            return
 
-        # Salva todos os chunks no banco de uma vez (mais eficiente)
-        db.bulk_save_objects(chunks_para_salvar)
-        
-        # 6. Atualizar status para COMPLETED
-        doc.status = "COMPLETED"
+        checkpoint = prepare_resume(db, doc)
+        if start_page is None or checkpoint < start_page:
+            # A fatia anterior não chegou a salvar o próprio checkpoint (ou a
+            # mensagem não informa a página inicial): lê o spool desde o começo
+            start_page = checkpoint
+            cursor = {"range": 0, "offset": 0}
+        end_page = slice_end_page(start_page, last_page)
+        with closing(extraction_spool.read_pages(
+            extracted_ranges, after_page=checkpoint, cursor=cursor, until_page=end_page
+        )) as pages:
+            stats = ingest_pages(db, doc, pages)
+        stats.update(previous_stats or {})
+        # As páginas da fatia sem texto também ficam concluídas
+        doc.last_committed_page = max(doc.last_committed_page or 0, end_page)
+
+        # A próxima etapa (outra fatia ou 'finalize_document_task') é disparada
+        # antes do commit do checkpoint: se a publicação falhar, a nova tentativa
+        # não encontra a fatia concluída e dispara de novo. A trava só é solta
+        # no 'finally', então a próxima etapa já lê o checkpoint salvo.
+        if end_page < last_page:
+            # A mensagem leva de novo só os metadados; o texto continua no spool
+            self.apply_async(args=[extracted_ranges, doc.id, dict(stats), {**cursor, "page": end_page}])
+            db.commit()
+            print(f"[STATUS] Documento ID: {doc.id} - até a página {end_page} salva; "
+                  f"restante (até a página {last_page}) reenfileirado.")
+            return {"document_id": doc.id, "last_committed_page": end_page}
+
+        finalize_document_task.delay(doc.id, dict(stats))
         db.commit()
-        print(f"[STATUS] Documento ID: {doc.id} - Status: COMPLETED. {len(chunks_para_salvar)} chunks processados.")
+        return {"document_id": doc.id, **stats}
 
     except Exception as e:
-        db.rollback()
-        # 6. Atualizar status para FAILED
-        doc = db.query(Document).filter(Document.id == document_id).first()
-        if doc:
-            doc.status = "FAILED"
-            db.commit()
-        print(f"[ERRO] Falha ao processar o documento ID: {document_id}. Erro: {e}")
+        retry_or_fail(self, db, document_id, e)
+    finally:
+        release_document_lock(lock)
+        db.close()
+
+
+@celery_app.task(name="finalize_document_task", **RETRY_OPTIONS)
+def finalize_document_task(self, document_id: int, stats: dict):
+    """
+    Última etapa da ingestão (fila 'finalization'): marca o documento como
+    COMPLETED, com as estatísticas de todas as fatias.
+    """
+    db = get_db()
+    lock = None
+    try:
+        lock, doc = hold_document_lock(self, db, document_id, step_done=lambda doc: doc.status == "COMPLETED")
+        if not doc:
+            return
+        return complete_document(db, doc, Counter(stats))
+
+    except Exception as e:
+        retry_or_fail(self, db, document_id, e)
+    finally:
+        release_document_lock(lock)
+        db.close()
+
+
+@celery_app.task(name="mark_document_failed_task")
+def mark_document_failed_task(document_id: int):
+    """
+    Errback do chord: se algum intervalo falhar, o documento não fica preso em PROCESSING.
+    """
+    db = get_db()
+    try:
+        fail_document(db, document_id, "falha na extração de um intervalo de páginas")
     finally:
         db.close()
-        
-    return f"Documento {document_id} processado."
\ No newline at end of file
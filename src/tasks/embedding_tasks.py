@@ -0,0 +1,100 @@
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from .celery_app import celery_app
+from .index_tasks import local_index_model, rebuild_local_index_task
+from src.core.config import settings
+from src.db.session import SessionLocal, engine
+from src.models.document import Document, DocumentChunk
+from src.models.organization import Organization
+from src.services.embedding_migration import ensure_next_embedding_index, get_next_backend
+
+
+def pending_chunks_query(organization_id: int, after_id: int = 0):
+    """
+    Chunks da organização que ainda não têm o vetor do modelo de destino,
+    em ordem de id (paginação por keyset).
+    """
+    return (
+        select(DocumentChunk.id, DocumentChunk.content)
+        .join(Document, DocumentChunk.document_id == Document.id)
+        .where(
+            Document.organization_id == organization_id,
+            DocumentChunk.id > after_id,
+            DocumentChunk.next_embedding_model.is_distinct_from(settings.EMBEDDING_NEXT_MODEL_NAME),
+        )
+        .order_by(DocumentChunk.id)
+    )
+
+
+def switch_organization_model(db: Session, organization_id: int) -> None:
+    db.execute(
+        update(Organization)
+        .where(Organization.id == organization_id)
+        .values(embedding_model=settings.EMBEDDING_NEXT_MODEL_NAME)
+    )
+    db.commit()
+    print(f"[MIGRAÇÃO] Organização ID: {organization_id} - busca trocada para {settings.EMBEDDING_NEXT_MODEL_NAME}.")
+    # O índice local é por modelo: o do modelo de destino é construído agora
+    if local_index_model(db, organization_id):
+        rebuild_local_index_task.delay(organization_id)
+
+
+@celery_app.task(name="backfill_embeddings_task", bind=True)
+def backfill_embeddings_task(self, organization_id: int, after_id: int = 0):
+    """
+    Preenche 'next_embedding' dos chunks da organização com o modelo de destino.
+
+    Throttling: cada execução processa no máximo EMBEDDING_BACKFILL_BATCHES_PER_RUN
+    lotes de EMBEDDING_BACKFILL_BATCH_SIZE chunks (commit por lote) e se
+    reagenda com EMBEDDING_BACKFILL_PAUSE_SECONDS de pausa, continuando do
+    último id processado. Assim o backfill divide o worker com a ingestão e
+    pode ser interrompido a qualquer momento sem perder o que já foi gravado.
+
+    Quando não resta nenhum chunk pendente, a organização passa a buscar
+    com o modelo de destino.
+    """
+    backend = get_next_backend()
+    if backend is None:
+        print("[MIGRAÇÃO] EMBEDDING_NEXT_MODEL_NAME/EMBEDDING_NEXT_DIMENSION não configurados; nada a fazer.")
+        return
+
+    if after_id == 0:
+        ensure_next_embedding_index(engine)
+
+    db = SessionLocal()
+    try:
+        migrated = 0
+        for _ in range(settings.EMBEDDING_BACKFILL_BATCHES_PER_RUN):
+            rows = db.execute(
+                pending_chunks_query(organization_id, after_id).limit(settings.EMBEDDING_BACKFILL_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+
+            vectors = backend.encode([row.content for row in rows], batch_size=settings.EMBEDDING_BATCH_SIZE)
+            # UPDATE em lote pela chave primária (executemany)
+            db.execute(update(DocumentChunk), [
+                {"id": row.id, "next_embedding": vector.tolist(), "next_embedding_model": backend.model_name}
+                for row, vector in zip(rows, vectors)
+            ])
+            db.commit()
+            after_id = rows[-1].id
+            migrated += len(rows)
+        else:
+            # Ainda há lotes: pausa e continua em uma nova execução
+            print(f"[MIGRAÇÃO] Organização ID: {organization_id} - {migrated} chunks migrados nesta execução "
+                  f"(até o chunk ID: {after_id}).")
+            self.apply_async(args=[organization_id, after_id], countdown=settings.EMBEDDING_BACKFILL_PAUSE_SECONDS)
+            return {"organization_id": organization_id, "after_id": after_id, "migrated": migrated}
+
+        # Confere desde o início: chunks gravados sem a escrita dupla (ex: por um
+        # worker sem a configuração da migração) recomeçam a varredura
+        if db.execute(pending_chunks_query(organization_id).limit(1)).first():
+            self.apply_async(args=[organization_id, 0], countdown=settings.EMBEDDING_BACKFILL_PAUSE_SECONDS)
+            return {"organization_id": organization_id, "after_id": 0, "migrated": migrated}
+
+        switch_organization_model(db, organization_id)
+        return {"organization_id": organization_id, "migrated": migrated, "switched": True}
+    finally:
+        db.close()
@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .celery_app import celery_app
+from src.core.config import settings
+from src.db.session import SessionLocal
+from src.models.document import Document, DocumentChunk
+from src.models.organization import Organization
+from src.services.embedding_migration import chunk_vector_column, migration_configured
+from src.services.local_vector_store import LocalVectorStore
+
+# Chunks lidos por vez ao reconstruir o índice local
+REBUILD_BATCH_SIZE = 10000
+
+
+def local_index_model(db: Session, organization_id: int) -> str | None:
+    """
+    Modelo cujos vetores a organização busca, se ela usa o índice local
+    (mesma regra de 'embedding_migration.resolve_search_slot'). None = pgvector.
+    """
+    organization = db.get(Organization, organization_id)
+    if organization is None or (organization.vector_index or settings.VECTOR_INDEX_BACKEND) != "local":
+        return None
+    if migration_configured() and organization.embedding_model == settings.EMBEDDING_NEXT_MODEL_NAME:
+        return settings.EMBEDDING_NEXT_MODEL_NAME
+    return settings.EMBEDDING_MODEL_NAME
+
+
+def index_new_chunks(db: Session, doc: Document, count: int) -> None:
+    """
+    Acrescenta ao índice local da organização os 'count' chunks do documento
+    que acabaram de ser gravados (chamado depois do commit de cada lote).
+    Os ids vêm da sequência da tabela, então os últimos 'count' ids do
+    documento são exatamente os do lote.
+    """
+    if count == 0:
+        return
+    model_name = local_index_model(db, doc.organization_id)
+    if model_name is None:
+        return
+
+    column = chunk_vector_column(model_name)
+    rows = db.execute(
+        select(DocumentChunk.id, column)
+        .where(DocumentChunk.document_id == doc.id, column.isnot(None))
+        .order_by(DocumentChunk.id.desc())
+        .limit(count)
+    ).all()
+    if not rows:
+        return
+    rows.reverse()
+    with rebuild_on_failure(doc.organization_id):
+        LocalVectorStore(doc.organization_id, model_name).append(
+            [row[0] for row in rows], np.stack([row[1] for row in rows])
+        )
+
+
+def reconcile_document_chunks(db: Session, doc: Document) -> None:
+    """
+    Acrescenta ao índice local os chunks já salvos do documento que ficaram
+    de fora dele: o worker pode morrer entre o commit de um lote e o
+    'append', e a retomada não grava esses chunks de novo.
+    Chamado ao retomar um documento (ver 'prepare_resume'); custa uma
+    leitura sequencial dos ids do índice.
+    """
+    model_name = local_index_model(db, doc.organization_id)
+    if model_name is None:
+        return
+
+    column = chunk_vector_column(model_name)
+    chunk_ids = db.execute(
+        select(DocumentChunk.id).where(DocumentChunk.document_id == doc.id, column.isnot(None))
+    ).scalars().all()
+    if not chunk_ids:
+        return
+
+    def load(missing: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        rows = db.execute(
+            select(DocumentChunk.id, column)
+            .where(DocumentChunk.id.in_([int(chunk_id) for chunk_id in missing]))
+            .order_by(DocumentChunk.id)
+        ).all()
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32)
+        return np.array([row[0] for row in rows]), np.stack([row[1] for row in rows])
+
+    with rebuild_on_failure(doc.organization_id):
+        added = LocalVectorStore(doc.organization_id, model_name).append_missing(chunk_ids, load)
+        if added:
+            print(f"[ÍNDICE LOCAL] Documento ID: {doc.id} - {added} chunks que faltavam no índice foram acrescentados.")
+
+
+@contextmanager
+def rebuild_on_failure(organization_id: int):
+    """
+    Se a escrita no índice falhar, agenda uma reconstrução: os chunks já
+    estão no banco e uma nova tentativa da ingestão não os gravaria de novo.
+    """
+    try:
+        yield
+    except (OSError, ValueError) as e:
+        print(f"[ÍNDICE LOCAL] Organização ID: {organization_id} - falha ao acrescentar chunks: {e}. "
+              f"Reconstrução agendada.")
+        rebuild_local_index_task.delay(organization_id)
+
+
+def load_organization_vectors(db: Session, organization_id: int, model_name: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Ids e vetores de todos os chunks da organização (paginação por keyset).
+    """
+    column = chunk_vector_column(model_name)
+    ids, vectors, after_id = [], [], 0
+    while True:
+        rows = db.execute(
+            select(DocumentChunk.id, column)
+            .join(Document, DocumentChunk.document_id == Document.id)
+            .where(Document.organization_id == organization_id, DocumentChunk.id > after_id, column.isnot(None))
+            .order_by(DocumentChunk.id)
+            .limit(REBUILD_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        ids.extend(row[0] for row in rows)
+        vectors.append(np.stack([row[1] for row in rows]).astype(np.float32))
+        after_id = rows[-1][0]
+    if not vectors:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32)
+    return np.asarray(ids, dtype=np.int64), np.concatenate(vectors)
+
+
+@celery_app.task(name="rebuild_local_index_task")
+def rebuild_local_index_task(organization_id: int):
+    """
+    (Re)constrói o índice local da organização a partir do banco: ao ativar o
+    backend local, ao trocar o modelo de embedding e após falhas de escrita.
+    Também descarta as linhas de chunks apagados (reprocessamentos).
+    A leitura do banco acontece com o índice travado, então nenhum lote
+    acrescentado pela ingestão durante a reconstrução se perde.
+    """
+    db = SessionLocal()
+    try:
+        model_name = local_index_model(db, organization_id)
+        if model_name is None:
+            print(f"[ÍNDICE LOCAL] Organização ID: {organization_id} não usa o índice local; nada a fazer.")
+            return
+        count = LocalVectorStore(organization_id, model_name).rebuild(
+            lambda: load_organization_vectors(db, organization_id, model_name)
+        )
+        print(f"[ÍNDICE LOCAL] Organização ID: {organization_id} - índice reconstruído com {count} vetores ({model_name}).")
+        return {"organization_id": organization_id, "model": model_name, "vectors": count}
+    finally:
+        db.close()
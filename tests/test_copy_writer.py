@@ -0,0 +1,159 @@
+import struct
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.db.copy_writer import CHUNK_COLUMNS, encode_binary_rows
+
+SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+
+# Tipo de cada coluna do COPY em 'document_chunks'
+COLUMN_TYPES = {
+    "document_id": "int4",
+    "content": "text",
+    "content_hash": "text",
+    "page_number": "int4",
+    "char_start": "int4",
+    "char_end": "int4",
+    "embedding": "vector",
+    "embedding_model": "text",
+    "next_embedding": "vector",
+    "next_embedding_model": "text",
+}
+
+
+class Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def take(self, size: int) -> bytes:
+        assert self.offset + size <= len(self.data), "fim inesperado do payload"
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def unpack(self, fmt: str):
+        return struct.unpack(fmt, self.take(struct.calcsize(fmt)))
+
+
+def decode_field(column_type: str, data: bytes):
+    if column_type == "int4":
+        assert len(data) == 4
+        return struct.unpack("!i", data)[0]
+    if column_type == "text":
+        return data.decode("utf-8")
+    # pgvector: int16 dimensões, int16 reservado (0), float4 big-endian
+    dimension, unused = struct.unpack("!hh", data[:4])
+    assert unused == 0
+    assert len(data) == 4 + 4 * dimension
+    return np.frombuffer(data[4:], dtype=">f4")
+
+
+def decode_pgcopy(payload: bytes) -> list[dict]:
+    """
+    Decodifica o formato binário do COPY campo a campo, sem usar o módulo testado.
+    """
+    reader = Reader(payload)
+    assert reader.take(len(SIGNATURE)) == SIGNATURE
+    flags, extension_length = reader.unpack("!ii")
+    assert flags == 0
+    reader.take(extension_length)
+
+    rows = []
+    while True:
+        (field_count,) = reader.unpack("!h")
+        if field_count == -1:
+            break
+        assert field_count == len(CHUNK_COLUMNS)
+        row = {}
+        for column in CHUNK_COLUMNS:
+            (length,) = reader.unpack("!i")
+            row[column] = None if length == -1 else decode_field(COLUMN_TYPES[column], reader.take(length))
+        rows.append(row)
+    assert reader.offset == len(payload), "bytes depois do trailer"
+    return rows
+
+
+def make_chunk(**overrides) -> SimpleNamespace:
+    values = {
+        "document_id": 42,
+        "content": "Cláusula 3ª — vigência: 12 meses.",
+        "content_hash": "a" * 64,
+        "page_number": 7,
+        "char_start": 0,
+        "char_end": 34,
+        "embedding": np.linspace(-1, 1, 384, dtype=np.float32),
+        "embedding_model": "paraphrase-multilingual-MiniLM-L12-v2",
+        "next_embedding": None,
+        "next_embedding_model": None,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def assert_row_matches(row: dict, chunk: SimpleNamespace) -> None:
+    for column in CHUNK_COLUMNS:
+        expected = getattr(chunk, column)
+        if COLUMN_TYPES[column] == "vector" and expected is not None:
+            assert row[column].dtype == np.dtype(">f4")
+            np.testing.assert_array_equal(row[column], np.asarray(expected, dtype=np.float32))
+        else:
+            assert row[column] == expected, column
+
+
+def test_empty_payload_has_only_header_and_trailer():
+    payload = encode_binary_rows([])
+    assert payload == SIGNATURE + struct.pack("!ii", 0, 0) + struct.pack("!h", -1)
+    assert decode_pgcopy(payload) == []
+
+
+def test_rows_decode_to_the_input_chunks():
+    chunks = [
+        make_chunk(),
+        # Sem embedding ainda, sem posição e com texto vazio (vazio não é NULL)
+        make_chunk(
+            content="", content_hash=None, page_number=1, char_start=None, char_end=None,
+            embedding=None, embedding_model=None,
+        ),
+        # Migração de modelo: os dois vetores, com dimensões diferentes
+        make_chunk(
+            document_id=2 ** 31 - 1, page_number=1000,
+            embedding=[0.25] * 384, next_embedding=np.arange(768, dtype=np.float32) / 768,
+            next_embedding_model="intfloat/multilingual-e5-base",
+        ),
+    ]
+    rows = decode_pgcopy(encode_binary_rows(chunks))
+
+    assert len(rows) == len(chunks)
+    for row, chunk in zip(rows, chunks):
+        assert_row_matches(row, chunk)
+
+
+def test_null_fields_are_encoded_as_length_minus_one():
+    chunk = make_chunk(char_start=None, embedding=None, next_embedding=None)
+    payload = encode_binary_rows([chunk])
+
+    reader = Reader(payload)
+    reader.take(len(SIGNATURE) + 8)
+    assert reader.unpack("!h") == (len(CHUNK_COLUMNS),)
+    lengths = {}
+    for column in CHUNK_COLUMNS:
+        (length,) = reader.unpack("!i")
+        lengths[column] = length
+        if length > 0:
+            reader.take(length)
+    assert lengths["char_start"] == -1
+    assert lengths["embedding"] == -1
+    assert lengths["next_embedding"] == -1
+    assert lengths["next_embedding_model"] == -1
+    assert lengths["document_id"] == 4
+    assert lengths["content"] == len(chunk.content.encode("utf-8"))
+    assert lengths["embedding_model"] == len(chunk.embedding_model)
+
+
+@pytest.mark.parametrize("value", [0.1, -3.5e-8, 1e30])
+def test_vector_values_are_big_endian_float4(value):
+    rows = decode_pgcopy(encode_binary_rows([make_chunk(embedding=[value] * 3)]))
+    np.testing.assert_array_equal(rows[0]["embedding"], np.float32([value] * 3))
@@ -0,0 +1,142 @@
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from celery.exceptions import MaxRetriesExceededError
+
+from src.core.config import settings
+from src.services import extraction_spool
+from src.tasks import document_tasks
+
+DOCUMENT_ID = 1
+
+
+class FakeSession:
+    """
+    Sessão com um único documento; só registra os checkpoints salvos.
+    """
+    def __init__(self, doc):
+        self.doc = doc
+        self.commits = []
+
+    def query(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self.doc
+
+    def commit(self):
+        self.commits.append(self.doc.last_committed_page)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def doc():
+    return SimpleNamespace(id=DOCUMENT_ID, organization_id=1, status="PROCESSING", last_committed_page=None)
+
+
+@pytest.fixture
+def pipeline(doc, tmp_path, monkeypatch):
+    """
+    Tarefas de embeddings com o spool em disco e o banco, a trava e o broker falsos.
+    """
+    monkeypatch.setattr(settings, "EXTRACTION_SPOOL_ROOT", str(tmp_path))
+    monkeypatch.setattr(settings, "EMBEDDING_TASK_MAX_PAGES", 3)
+    session = FakeSession(doc)
+    ingested, queued, finalized = [], [], []
+
+    def ingest_pages(db, doc, pages):
+        pages = [page_number for page_number, _ in pages]
+        ingested.append(pages)
+        if pages:
+            doc.last_committed_page = max(doc.last_committed_page or 0, pages[-1])
+        return Counter(chunks=len(pages))
+
+    monkeypatch.setattr(document_tasks, "get_db", lambda: session)
+    monkeypatch.setattr(document_tasks, "acquire_document_lock", lambda document_id: object())
+    monkeypatch.setattr(document_tasks, "release_document_lock", lambda lock: None)
+    monkeypatch.setattr(document_tasks, "prepare_resume", lambda db, doc: doc.last_committed_page or 0)
+    monkeypatch.setattr(document_tasks, "ingest_pages", ingest_pages)
+    monkeypatch.setattr(document_tasks.embed_extracted_pages_task, "apply_async", lambda args: queued.append(args))
+    monkeypatch.setattr(document_tasks.finalize_document_task, "delay", lambda *args: finalized.append(args))
+    return SimpleNamespace(session=session, ingested=ingested, queued=queued, finalized=finalized)
+
+
+def spool_ranges() -> list[dict]:
+    # Páginas 1-10 em dois intervalos; 4, 6 e 9 não têm texto
+    return [
+        extraction_spool.write_range(DOCUMENT_ID, 0, 5, ((page, f"p{page}") for page in (1, 2, 3, 5))),
+        extraction_spool.write_range(DOCUMENT_ID, 5, 10, ((page, f"p{page}") for page in (7, 8, 10))),
+    ]
+
+
+def run_embed(args: list, retries: int = 0, redelivered: bool = False):
+    task = document_tasks.embed_extracted_pages_task
+    task.push_request(retries=retries, delivery_info={"redelivered": redelivered})
+    try:
+        return task.run(*args)
+    finally:
+        task.pop_request()
+
+
+def test_slices_cover_every_page_and_save_their_last_page(pipeline):
+    args = [spool_ranges(), DOCUMENT_ID, None, {"range": 0, "offset": 0, "page": 0}]
+    while args:
+        run_embed(args)
+        args = pipeline.queued.pop(0) if pipeline.queued else None
+
+    assert pipeline.ingested == [[1, 2, 3], [5], [7, 8], [10]]
+    assert pipeline.session.commits == [3, 6, 9, 10]
+    assert pipeline.finalized == [(DOCUMENT_ID, {"chunks": 7})]
+
+
+def test_repeated_delivery_of_a_finished_slice_does_nothing(pipeline):
+    args = [spool_ranges(), DOCUMENT_ID, None, {"range": 0, "offset": 0, "page": 0}]
+    run_embed(args)
+    pipeline.queued.clear()
+
+    assert run_embed(args, redelivered=True) is None
+    assert pipeline.ingested == [[1, 2, 3]]
+    assert pipeline.queued == []
+
+
+def test_slice_after_a_lost_checkpoint_rereads_the_missing_pages(pipeline, doc):
+    doc.last_committed_page = 2
+    run_embed([spool_ranges(), DOCUMENT_ID, None, {"range": 1, "offset": 0, "page": 6}])
+
+    assert pipeline.ingested == [[3, 5]]
+    assert pipeline.session.commits == [5]
+    assert pipeline.queued[0][3]["page"] == 5
+
+
+def test_lock_contention_skips_a_finished_step(doc, monkeypatch):
+    monkeypatch.setattr(document_tasks, "acquire_document_lock", lambda document_id: None)
+    doc.status = "COMPLETED"
+
+    lock, found = document_tasks.hold_document_lock(
+        document_tasks.finalize_document_task, FakeSession(doc), DOCUMENT_ID,
+        step_done=lambda doc: doc.status == "COMPLETED",
+    )
+    assert (lock, found) == (None, None)
+
+
+def test_lock_contention_gives_up_once_the_lock_should_have_expired(doc, monkeypatch):
+    monkeypatch.setattr(document_tasks, "acquire_document_lock", lambda document_id: None)
+    task = document_tasks.finalize_document_task
+    wait_seconds = settings.DOCUMENT_LOCK_RETRY_SECONDS + settings.DOCUMENT_LOCK_WAIT_SECONDS
+    retries = task.max_retries + -(-document_tasks.lock_timeout_seconds() // wait_seconds) + 1
+
+    task.push_request(retries=retries, called_directly=False, id="t", args=[DOCUMENT_ID, {}], kwargs={})
+    try:
+        with pytest.raises(MaxRetriesExceededError):
+            document_tasks.hold_document_lock(task, FakeSession(doc), DOCUMENT_ID, step_done=lambda doc: False)
+    finally:
+        task.pop_request()
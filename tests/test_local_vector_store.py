@@ -0,0 +1,164 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.services.local_vector_store import INT8_SCALE, LocalVectorStore
+
+DIMENSION = 8
+
+
+def random_vectors(count: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, DIMENSION)).astype(np.float32)
+
+
+def normalized(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_neighbors(ids, vectors: np.ndarray, query: np.ndarray, top_k: int) -> list[int]:
+    scores = normalized(vectors) @ normalized(query[None])[0]
+    return [int(ids[i]) for i in np.argsort(-scores)[:top_k]]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalVectorStore(organization_id=1, model_name="org/modelo-teste", root=str(tmp_path))
+
+
+def test_search_without_index_returns_none(store):
+    assert store.search(random_vectors(1)[0], top_k=5) is None
+
+
+def test_append_and_search_match_exact_neighbors(store):
+    vectors = random_vectors(20)
+    ids = np.arange(100, 120)
+    store.append(ids, vectors)
+
+    results = store.search(vectors[7], top_k=5)
+    assert [chunk_id for chunk_id, _ in results] == exact_neighbors(ids, vectors, vectors[7], 5)
+    assert results[0] == (107, pytest.approx(0.0, abs=1e-6))
+    distances = [distance for _, distance in results]
+    assert distances == sorted(distances)
+
+
+def test_append_discards_rows_of_an_interrupted_append(store):
+    vectors = random_vectors(10)
+    store.append(np.arange(10), vectors)
+    generation = store.read_meta()["generation"]
+
+    # Escrita interrompida: bytes a mais nos arquivos, meta.json sem a atualização
+    with open(store._path("vectors-<g>.bin", generation), "ab") as f:
+        f.write(b"\x7f" * (DIMENSION * 4 * 2 + 3))
+    with open(store._path("ids-<g>.bin", generation), "ab") as f:
+        f.write(np.array([999, 998], dtype=np.int64).tobytes())
+
+    # Os leitores só enxergam as linhas confirmadas pelo meta.json
+    assert store.snapshot().count == 10
+    assert 999 not in [chunk_id for chunk_id, _ in store.search(vectors[0], top_k=20)]
+
+    extra = random_vectors(5, seed=1)
+    store.append(np.arange(10, 15), extra)
+    assert store.read_meta()["count"] == 15
+    assert os.path.getsize(store._path("vectors-<g>.bin", generation)) == 15 * DIMENSION * 4
+    assert os.path.getsize(store._path("ids-<g>.bin", generation)) == 15 * 8
+
+    results = store.search(extra[2], top_k=15)
+    assert results[0] == (12, pytest.approx(0.0, abs=1e-6))
+    assert sorted(chunk_id for chunk_id, _ in results) == list(range(15))
+    all_vectors = np.concatenate([vectors, extra])
+    assert [chunk_id for chunk_id, _ in results] == exact_neighbors(np.arange(15), all_vectors, extra[2], 15)
+
+
+def test_rebuild_writes_a_new_generation(store):
+    store.append(np.arange(5), random_vectors(5))
+    old_generation = store.read_meta()["generation"]
+
+    vectors = random_vectors(8, seed=2)
+    assert store.rebuild(lambda: (np.arange(50, 58), vectors)) == 8
+
+    meta = store.read_meta()
+    assert meta["generation"] == old_generation + 1
+    assert meta["count"] == 8
+    assert not os.path.exists(store._path("vectors-<g>.bin", old_generation))
+    results = store.search(vectors[3], top_k=8)
+    assert [chunk_id for chunk_id, _ in results] == exact_neighbors(np.arange(50, 58), vectors, vectors[3], 8)
+
+
+def test_rebuild_with_no_rows_keeps_an_empty_index(store):
+    store.append(np.arange(5), random_vectors(5))
+    assert store.rebuild(lambda: (np.empty(0, dtype=np.int64), np.empty((0, DIMENSION)))) == 0
+
+    assert store.read_meta()["count"] == 0
+    assert store.search(random_vectors(1)[0], top_k=5) == []
+
+
+def test_append_promotes_the_index_to_ivf(store, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_INDEX_IVF_MIN_VECTORS", 64)
+    monkeypatch.setattr(settings, "LOCAL_INDEX_IVF_LISTS", 4)
+    vectors = random_vectors(80, seed=3)
+    ids = np.arange(80)
+
+    store.append(ids[:40], vectors[:40])
+    assert not store.read_meta()["ivf"]
+    store.append(ids[40:], vectors[40:])
+
+    meta = store.read_meta()
+    assert meta["ivf"]
+    assert meta["count"] == 80
+    assert meta["generation"] == 1
+    assert not os.path.exists(store._path("vectors-<g>.bin", 0))
+
+    # Lendo todas as partições, a busca IVF é exata
+    for row in (0, 41, 79):
+        results = store.search(vectors[row], top_k=10, probes=4)
+        assert [chunk_id for chunk_id, _ in results] == exact_neighbors(ids, vectors, vectors[row], 10)
+    # Com uma partição, a do próprio vetor (o centróide mais próximo dele) é a lida
+    assert store.search(vectors[10], top_k=1, probes=1)[0][0] == 10
+
+    # Linhas acrescentadas depois da promoção entram nas partições
+    more = random_vectors(3, seed=4)
+    store.append([80, 81, 82], more)
+    assert store.read_meta()["count"] == 83
+    assert store.search(more[1], top_k=1, probes=1)[0][0] == 81
+
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_quantized_vectors_round_trip(store, monkeypatch, dtype):
+    monkeypatch.setattr(settings, "LOCAL_INDEX_DTYPE", dtype)
+    vectors = random_vectors(30, seed=5)
+    store.append(np.arange(30), vectors)
+
+    snapshot = store.snapshot()
+    assert store.read_meta()["dtype"] == dtype
+    assert snapshot.vectors.dtype == np.dtype(dtype)
+    stored = np.asarray(snapshot.vectors, dtype=np.float32)
+    if dtype == "int8":
+        stored /= INT8_SCALE
+    np.testing.assert_allclose(stored, normalized(vectors), atol=0.5 / INT8_SCALE + 1e-6)
+
+    results = store.search(vectors[4], top_k=5)
+    assert results[0][0] == 4
+    assert results[0][1] == pytest.approx(0.0, abs=1e-2)
+    exact = normalized(vectors) @ normalized(vectors[4][None])[0]
+    for chunk_id, distance in results:
+        assert distance == pytest.approx(1 - exact[chunk_id], abs=2e-2)
+
+
+def test_append_missing_adds_only_absent_ids(store):
+    vectors = random_vectors(6)
+    store.append([1, 2, 3], vectors[1:4])
+    np.testing.assert_array_equal(store.missing([3, 4, 5, 4]), [4, 5])
+
+    loaded = []
+
+    def load(ids):
+        loaded.append(ids.tolist())
+        return ids, vectors[ids]
+
+    assert store.append_missing([1, 2, 3, 4, 5], load) == 2
+    assert store.append_missing([1, 2, 3, 4, 5], load) == 0
+    assert loaded == [[4, 5]]
+    assert store.read_meta()["count"] == 5
+    assert store.search(vectors[5], top_k=1)[0][0] == 5
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+from anyio.to_thread import current_default_thread_limiter
+from fastapi.concurrency import run_in_threadpool
+
+from src.schemas.search import SearchResultChunk
+from src.services.reranker import CrossEncoderReranker
+
+MAX_IN_FLIGHT = 2
+
+
+class FakeCrossEncoder:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def predict(self, pairs, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return np.arange(len(pairs), dtype=np.float32)
+
+
+def make_reranker(model: FakeCrossEncoder) -> CrossEncoderReranker:
+    reranker = CrossEncoderReranker("fake", max_length=16, max_in_flight=MAX_IN_FLIGHT)
+    reranker._model = model
+    return reranker
+
+
+def make_results(count: int = 3) -> list[SearchResultChunk]:
+    return [
+        SearchResultChunk(document_id=1, page_number=page, content=f"trecho {page}", similarity=0.5)
+        for page in range(count)
+    ]
+
+
+def free_slots(reranker: CrossEncoderReranker) -> int:
+    acquired = 0
+    while reranker._in_flight.acquire(blocking=False):
+        acquired += 1
+    for _ in range(acquired):
+        reranker._in_flight.release()
+    return acquired
+
+
+async def with_saturated_threadpool(coroutine_factory):
+    """
+    Ocupa todos os tokens do threadpool do anyio: a pontuação do rerank fica
+    na fila do limitador e a thread dela nunca começa durante o teste.
+    """
+    limiter = current_default_thread_limiter()
+    total_tokens = limiter.total_tokens
+    limiter.total_tokens = 1
+    release = threading.Event()
+    blocker = asyncio.ensure_future(run_in_threadpool(release.wait))
+    await asyncio.sleep(0.05)
+    try:
+        return await coroutine_factory()
+    finally:
+        release.set()
+        await blocker
+        limiter.total_tokens = total_tokens
+
+
+def test_rerank_orders_by_score_and_frees_the_slot():
+    reranker = make_reranker(FakeCrossEncoder())
+    results = make_results()
+
+    reranked, _, applied = asyncio.run(reranker.rerank("consulta", results, top_k=2, timeout_ms=1000))
+
+    assert applied
+    assert [r.page_number for r in reranked] == [2, 1]
+    assert free_slots(reranker) == MAX_IN_FLIGHT
+
+
+def test_timeout_before_the_thread_starts_frees_the_slot():
+    model = FakeCrossEncoder()
+    reranker = make_reranker(model)
+    results = make_results()
+
+    async def scenario():
+        outcome = await with_saturated_threadpool(
+            lambda: reranker.rerank("consulta", results, top_k=2, timeout_ms=50)
+        )
+        # A thread sai da fila depois da desistência e não pontua nada
+        await asyncio.sleep(0.05)
+        return outcome
+
+    reranked, _, applied = asyncio.run(scenario())
+
+    assert not applied
+    assert reranked == results[:2]
+    assert reranker.stats()["timeouts"] == 1
+    assert free_slots(reranker) == MAX_IN_FLIGHT
+    assert model.calls == 0
+
+
+def test_cancellation_before_the_thread_starts_frees_the_slot():
+    reranker = make_reranker(FakeCrossEncoder())
+
+    async def cancelled_rerank():
+        task = asyncio.ensure_future(reranker.rerank("consulta", make_results(), top_k=2, timeout_ms=10_000))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    async def scenario():
+        return await with_saturated_threadpool(cancelled_rerank)
+
+    assert asyncio.run(scenario())
+    assert free_slots(reranker) == MAX_IN_FLIGHT
+
+
+def test_timeout_while_scoring_keeps_the_slot_until_the_thread_ends():
+    reranker = make_reranker(FakeCrossEncoder(delay=0.3))
+    results = make_results()
+
+    async def scenario():
+        _, _, applied = await reranker.rerank("consulta", results, top_k=2, timeout_ms=50)
+        busy = free_slots(reranker)
+        await asyncio.sleep(0.4)
+        return applied, busy
+
+    applied, busy = asyncio.run(scenario())
+
+    assert not applied
+    assert busy == MAX_IN_FLIGHT - 1
+    assert free_slots(reranker) == MAX_IN_FLIGHT
+
+
+def test_rerank_is_skipped_when_every_slot_is_busy():
+    reranker = make_reranker(FakeCrossEncoder())
+    for _ in range(MAX_IN_FLIGHT):
+        reranker._in_flight.acquire()
+    results = make_results()
+
+    reranked, elapsed_ms, applied = asyncio.run(reranker.rerank("consulta", results, top_k=2, timeout_ms=1000))
+
+    assert not applied
+    assert elapsed_ms == 0.0
+    assert reranked == results[:2]
+    assert reranker.stats()["skipped"] == 1